@@ -36,6 +36,8 @@ def create_app():
     if not secret_key and not is_debug:
         raise RuntimeError("SECRET_KEY must be set in production environment!")
     app.config['SECRET_KEY'] = secret_key or 'default-dev-key-please-change'
+    # Event codes are keyed by this, or by a key derived from SECRET_KEY when it is unset
+    app.config['EVENT_CODE_KEY'] = os.environ.get('EVENT_CODE_KEY')
     
     # Use the Render database URL if available, otherwise use SQLite
     database_url = os.environ.get('DATABASE_URL', 'sqlite:///event_reviews.db')
@@ -64,6 +66,43 @@ def create_app():
     ratelimit_url = os.environ.get('RATELIMIT_STORAGE_URL')
     if ratelimit_url:
         app.config['RATELIMIT_STORAGE_URL'] = ratelimit_url
+    # Load tests and benchmarks against a real server turn limits off with RATELIMIT_ENABLED=False
+    app.config['RATELIMIT_ENABLED'] = os.environ.get('RATELIMIT_ENABLED', 'True') == 'True'
+
+    # Per-request SQL budgets catching N+1 patterns: warn, raise or off (see app/query_budget.py)
+    app.config['QUERY_BUDGET'] = os.environ.get('QUERY_BUDGET', 'warn')
+    app.config['QUERY_BUDGET_MAX_QUERIES'] = int(os.environ.get('QUERY_BUDGET_MAX_QUERIES', 25))
+    app.config['QUERY_BUDGET_MAX_REPEATS'] = int(os.environ.get('QUERY_BUDGET_MAX_REPEATS', 5))
+
+    # Prometheus metrics at /metrics (see app/metrics.py)
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', 'False') == 'True'
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+    # On-demand request profiling (see app/profiling.py); off unless a sample rate or token is set
+    app.config['PROFILING_SAMPLE_RATE'] = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+    app.config['PROFILING_TOKEN'] = os.environ.get('PROFILING_TOKEN')
+    app.config['PROFILING_MODE'] = os.environ.get('PROFILING_MODE', 'sample')
+    app.config['PROFILING_INTERVAL'] = float(os.environ.get('PROFILING_INTERVAL', 0.005))
+    app.config['PROFILING_DIR'] = os.environ.get('PROFILING_DIR')
+    app.config['PROFILING_MAX_FILES'] = int(os.environ.get('PROFILING_MAX_FILES', 200))
+    # User ids, not usernames: anyone can register a listed name that is not taken yet
+    app.config['PROFILING_ADMIN_IDS'] = {int(user_id) for user_id in os.environ.get('PROFILING_ADMIN_IDS', '').split(',')
+                                         if user_id.strip()}
+
+    # Helpful votes are counted in memory and written to reviews.helpful_votes this often (seconds)
+    app.config['HELPFUL_VOTES_FLUSH_INTERVAL'] = float(os.environ.get('HELPFUL_VOTES_FLUSH_INTERVAL', 1.0))
+    # ...but cached pages of an event getting votes are only refreshed this often (seconds)
+    app.config['HELPFUL_VOTES_REFRESH_INTERVAL'] = float(os.environ.get('HELPFUL_VOTES_REFRESH_INTERVAL', 300))
+
+    # Optional shared cache for lookups repeated across workers (e.g. event by QR code)
+    app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL')
+
+    # Review submissions: 'direct' commits each one, 'queue' batches them in the background
+    app.config['REVIEW_INGEST'] = os.environ.get('REVIEW_INGEST', 'direct')
+    app.config['REVIEW_INGEST_BACKEND'] = os.environ.get('REVIEW_INGEST_BACKEND', 'sqlite')
+    app.config['REVIEW_INGEST_PATH'] = os.environ.get('REVIEW_INGEST_PATH')
+    app.config['REVIEW_INGEST_BATCH_SIZE'] = int(os.environ.get('REVIEW_INGEST_BATCH_SIZE', 200))
+    app.config['REVIEW_INGEST_MAX_PENDING'] = int(os.environ.get('REVIEW_INGEST_MAX_PENDING', 5000))
 
     # Logging setup
     if not app.debug:
@@ -101,6 +140,9 @@ def create_app():
             app.logger.exception('Failed to initialize Sentry')
 
     # Initialize extensions
+    # Metrics first: they may choose the connection pool class the engine is created with
+    from app import metrics
+    metrics.init_app(app)
     db.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
@@ -134,6 +176,21 @@ def create_app():
 
     from app.api import bp as api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
+
+    from app.commands import register_commands
+    register_commands(app)
+
+    from app import ingest
+    ingest.init_app(app)
+
+    from app import helpful_votes
+    helpful_votes.init_app(app)
+
+    from app import query_budget
+    query_budget.init_app(app)
+
+    from app import profiling
+    profiling.init_app(app)
     
     # Global error handlers
     @app.errorhandler(404)
@@ -152,5 +209,5 @@ def create_app():
 # User loader for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
-    from app.models import User
-    return User.query.get(int(user_id))
+    from app.user_cache import load_user as load_cached_user
+    return load_cached_user(user_id)
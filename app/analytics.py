@@ -0,0 +1,158 @@
+"""Time-bucketed review analytics computed in the database.
+
+Reviews are grouped on a truncated ``submitted_at`` (hour, day or ISO week) so
+the payload and query cost are bounded by the number of buckets in the window,
+not by the number of reviews. Results, the recent-activity list included, are
+cached per event and keyed on ``EventStats.updated_at``, which every review
+write bumps (in microseconds, so two writes in the same second still differ),
+so new reviews and moderation changes invalidate them without explicit
+bookkeeping. The version is read from the event's already loaded stats row, so
+a cache hit costs no query.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, select
+from app import db
+from app.cache import LRUCache
+from app.models import Review
+
+BUCKETS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+}
+
+# Longest window allowed per bucket size, which caps the number of buckets returned
+MAX_WINDOW_DAYS = {'hour': 7, 'day': 366, 'week': 728}
+
+DEFAULT_WINDOW_DAYS = 7
+DEFAULT_BUCKET = 'day'
+
+# recent_activity has always covered the last week, whatever the window
+RECENT_ACTIVITY_DAYS = 7
+
+# The window slides with the clock, so entries also expire on their own
+CACHE_TTL = 60
+
+_cache = LRUCache(maxsize=2048, ttl=CACHE_TTL, name='analytics')
+
+
+def truncate(value, bucket):
+    """Python twin of bucket_expression, used to lay out the empty buckets"""
+    if bucket == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    day = datetime(value.year, value.month, value.day)
+    if bucket == 'week':
+        day -= timedelta(days=day.weekday())
+    return day
+
+
+def bucket_expression(bucket):
+    """SQL expression truncating submitted_at to the start of its bucket"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        if bucket == 'hour':
+            return func.strftime('%Y-%m-%d %H:00:00', Review.submitted_at)
+        if bucket == 'week':
+            # Monday on or before the review date
+            return func.strftime('%Y-%m-%d 00:00:00', Review.submitted_at, '-6 days', 'weekday 1')
+        return func.strftime('%Y-%m-%d 00:00:00', Review.submitted_at)
+    return func.date_trunc(bucket, Review.submitted_at)
+
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _rate(part, total):
+    return round(part / total * 100, 1) if total else 0
+
+
+def _version(event):
+    return event.stats.updated_at if event.stats else None
+
+
+def event_analytics(event, window_days=DEFAULT_WINDOW_DAYS, bucket=DEFAULT_BUCKET):
+    """Counts, average rating and recommend rate per bucket plus an attendee-type breakdown, for the window only"""
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+    if not 1 <= window_days <= MAX_WINDOW_DAYS[bucket]:
+        raise ValueError(f'window must be between 1 and {MAX_WINDOW_DAYS[bucket]} days for {bucket} buckets')
+
+    event_id = event.id
+    key = (event_id, window_days, bucket, _version(event))
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    now = datetime.utcnow()
+    start = truncate(now - timedelta(days=window_days), bucket)
+    in_window = (Review.event_id == event_id, Review.is_approved == True, Review.submitted_at >= start)
+    recommended = func.sum(case((Review.would_recommend == True, 1), else_=0))
+
+    bucket_start = bucket_expression(bucket).label('bucket')
+    rows = db.session.execute(
+        select(bucket_start, func.count(Review.id), func.avg(Review.star_rating), recommended)
+        .where(*in_window).group_by(bucket_start).order_by(bucket_start)
+    ).all()
+    by_bucket = {_as_datetime(row[0]): row for row in rows}
+
+    attendee_types = db.session.execute(
+        select(Review.attendee_type, func.count(Review.id), func.avg(Review.star_rating))
+        .where(*in_window).group_by(Review.attendee_type).order_by(func.count(Review.id).desc())
+    ).all()
+
+    # Zero-fill so every bucket in the window is present and evenly spaced
+    series = []
+    cursor = start
+    while cursor <= now:
+        row = by_bucket.get(cursor)
+        count = row[1] if row else 0
+        series.append({
+            'start': cursor.isoformat(),
+            'count': count,
+            'average_rating': round(float(row[2]), 2) if row else None,
+            'recommend_rate': _rate(row[3] or 0, count) if row else None,
+        })
+        cursor += BUCKETS[bucket]
+
+    total = sum(point['count'] for point in series)
+    rating_sum = sum(float(row[2]) * row[1] for row in rows)
+    recommend_total = sum(row[3] or 0 for row in rows)
+    result = {
+        'days': window_days,
+        'bucket': bucket,
+        'start': start.isoformat(),
+        'end': now.isoformat(),
+        'total_reviews': total,
+        'average_rating': round(rating_sum / total, 2) if total else 0,
+        'recommend_rate': _rate(recommend_total, total),
+        'series': series,
+        'attendee_types': [
+            {'attendee_type': attendee_type or 'Unspecified', 'count': count,
+             'average_rating': round(float(average), 2)}
+            for attendee_type, count, average in attendee_types
+        ],
+    }
+    _cache.set(key, result)
+    return result
+
+
+def recent_activity(event):
+    """Approved reviews of the last week, oldest first, as the analytics endpoint has always listed them"""
+    key = (event.id, 'recent', _version(event))
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    since = datetime.utcnow() - timedelta(days=RECENT_ACTIVITY_DAYS)
+    rows = db.session.execute(
+        select(Review.submitted_at, Review.star_rating, Review.reviewer_name)
+        .where(Review.event_id == event.id, Review.is_approved == True, Review.submitted_at >= since)
+        .order_by(Review.submitted_at, Review.id)
+    )
+    result = [{'date': submitted_at.strftime('%Y-%m-%d'), 'rating': rating, 'reviewer': reviewer}
+              for submitted_at, rating, reviewer in rows]
+    _cache.set(key, result)
+    return result
@@ -1,7 +1,37 @@
-from flask import jsonify, request
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+from flask import jsonify, request, render_template
 from flask_login import login_required, current_user
+from sqlalchemy import delete, insert, select, update
+from werkzeug.datastructures import MultiDict
+from app import analytics, csrf, email_filter, helpful_votes, ingest, limiter
 from app.api import bp
-from app.models import Event, Review, db
+from app.codes import event_codes
+from app.forms import EventForm
+from app.models import Event, Review, EventTerm, db, REVIEWS_PER_PAGE, REVIEW_SORTS
+from app.search import search_reviews
+from app.public_events import resolve_event
+from app.review_hooks import (review_approved, review_unapproved, review_removed, review_featured,
+                              reviews_approved, reviews_unapproved, reviews_removed, reviews_changed,
+                              REVIEW_DELTA_COLUMNS)
+
+BULK_MAX_IDS = 10000
+
+IMPORT_MAX_EVENTS = 5000
+IMPORT_BATCH_SIZE = 1000
+IMPORT_FIELDS = ['title', 'category', 'description', 'venue', 'event_date', 'event_time', 'capacity']
+
+# action -> (column values to set, rows that would actually change, touches stats)
+BULK_ACTIONS = {
+    'approve': ({'is_approved': True}, Review.is_approved == False, reviews_approved),
+    'reject': ({'is_approved': False}, Review.is_approved == True, reviews_unapproved),
+    'feature': ({'is_featured': True}, Review.is_featured == False, None),
+    'unfeature': ({'is_featured': False}, Review.is_featured == True, None),
+    'delete': (None, None, reviews_removed),
+}
 
 @bp.route('/review/<int:review_id>/approve', methods=['POST'])
 @login_required
@@ -12,7 +42,9 @@ def approve_review(review_id):
     if review.event.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
 
-    review.is_approved = True
+    if not review.is_approved:
+        review.is_approved = True
+        review_approved(review)
     db.session.commit()
 
     return jsonify({'success': True, 'message': 'Review approved'})
@@ -26,7 +58,9 @@ def reject_review(review_id):
     if review.event.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
 
-    review.is_approved = False
+    if review.is_approved:
+        review.is_approved = False
+        review_unapproved(review)
     db.session.commit()
 
     return jsonify({'success': True, 'message': 'Review rejected'})
@@ -41,6 +75,7 @@ def feature_review(review_id):
         return jsonify({'error': 'Unauthorized'}), 403
 
     review.is_featured = not review.is_featured
+    review_featured(review)
     db.session.commit()
 
     return jsonify({
@@ -59,10 +94,145 @@ def delete_review(review_id):
         return jsonify({'error': 'Unauthorized'}), 403
 
     db.session.delete(review)
+    review_removed(review)
     db.session.commit()
 
     return jsonify({'success': True, 'message': 'Review deleted'})
 
+def _bulk_conditions(data):
+    """Translate a bulk request's ids/filter into WHERE clauses on reviews"""
+    conditions = []
+    ids = data.get('ids')
+    criteria = data.get('filter') or {}
+    if ids is None and not criteria:
+        raise ValueError('Provide review ids or a filter')
+
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            raise ValueError('ids must be a list of integers')
+        if len(ids) > BULK_MAX_IDS:
+            raise ValueError(f'At most {BULK_MAX_IDS} ids per request')
+        conditions.append(Review.id.in_(ids))
+
+    try:
+        if 'event_id' in criteria:
+            conditions.append(Review.event_id == int(criteria['event_id']))
+        if 'star_rating' in criteria:
+            ratings = criteria['star_rating']
+            ratings = ratings if isinstance(ratings, list) else [ratings]
+            conditions.append(Review.star_rating.in_([int(r) for r in ratings]))
+        if 'is_approved' in criteria:
+            conditions.append(Review.is_approved == bool(criteria['is_approved']))
+        if 'is_featured' in criteria:
+            conditions.append(Review.is_featured == bool(criteria['is_featured']))
+        if 'would_recommend' in criteria:
+            conditions.append(Review.would_recommend == bool(criteria['would_recommend']))
+        if 'since' in criteria:
+            conditions.append(Review.submitted_at >= datetime.fromisoformat(criteria['since']))
+        if 'within_minutes' in criteria:
+            since = datetime.utcnow() - timedelta(minutes=int(criteria['within_minutes']))
+            conditions.append(Review.submitted_at >= since)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid filter')
+    return conditions
+
+@bp.route('/reviews/bulk', methods=['POST'])
+@login_required
+def bulk_moderate():
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    if action not in BULK_ACTIONS:
+        return jsonify({'error': f"action must be one of: {', '.join(BULK_ACTIONS)}"}), 400
+
+    try:
+        conditions = _bulk_conditions(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    values, changes, hook = BULK_ACTIONS[action]
+    if changes is not None:
+        conditions.append(changes)
+
+    # Check ownership with a join, so reviews on other organizers' events are never matched
+    selection = select(Review.id).join(Event, Event.id == Review.event_id)\
+                    .where(Event.user_id == current_user.id, *conditions)
+
+    # Read what the affected rows contribute to the per-event aggregates, so the hook can
+    # apply deltas instead of recounting every review of the touched events
+    if hook is None:
+        affected = db.session.scalars(select(Review.event_id).where(Review.id.in_(selection)).distinct()).all()
+    else:
+        affected = db.session.execute(select(*REVIEW_DELTA_COLUMNS).where(Review.id.in_(selection))).all()
+
+    if values is None:
+        statement = delete(Review).where(Review.id.in_(selection))
+    else:
+        statement = update(Review).where(Review.id.in_(selection)).values(**values)
+    result = db.session.execute(statement.execution_options(synchronize_session=False))
+
+    if result.rowcount:
+        if hook is None:
+            reviews_changed(affected)
+        else:
+            hook(affected)
+    db.session.commit()
+
+    return jsonify({'success': True, 'action': action, 'affected': result.rowcount})
+
+def _import_rows():
+    """Event rows from an uploaded CSV/JSON file or a JSON body"""
+    upload = request.files.get('file')
+    if upload:
+        if upload.filename.lower().endswith('.json'):
+            data = json.load(upload.stream)
+        else:
+            return list(csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig')))
+    else:
+        data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('events')
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ValueError('Upload a CSV/JSON file or send {"events": [...]}')
+    return data
+
+@bp.route('/events/import', methods=['POST'])
+@login_required
+def import_events():
+    try:
+        rows = _import_rows()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({'error': str(e) or 'Could not parse upload'}), 400
+    if not rows:
+        return jsonify({'error': 'No events to import'}), 400
+    if len(rows) > IMPORT_MAX_EVENTS:
+        return jsonify({'error': f'At most {IMPORT_MAX_EVENTS} events per import'}), 400
+
+    # Validate everything up front with the create-event form; nothing is inserted on error
+    events, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        formdata = MultiDict({name: str(row[name]) for name in IMPORT_FIELDS if row.get(name) not in (None, '')})
+        form = EventForm(formdata=formdata, meta={'csrf': False})
+        if not form.validate():
+            errors.append({'row': number, 'errors': form.errors})
+            continue
+        events.append({name: form[name].data for name in IMPORT_FIELDS})
+    if errors:
+        return jsonify({'error': 'Some events are invalid', 'rows': errors[:100]}), 400
+
+    codes = event_codes.allocate(len(events))
+    for event, code in zip(events, codes):
+        event.update(user_id=current_user.id, unique_code=code)
+    for start in range(0, len(events), IMPORT_BATCH_SIZE):
+        db.session.execute(insert(Event), events[start:start + IMPORT_BATCH_SIZE])
+    db.session.commit()
+
+    return jsonify({
+        'success': True,
+        'created': len(events),
+        'events': [{'title': event['title'], 'unique_code': event['unique_code'],
+                    'review_url': f"/review/{event['unique_code']}"} for event in events]
+    }), 201
+
 @bp.route('/event/<int:event_id>/analytics', methods=['GET'])
 @login_required
 def event_analytics(event_id):
@@ -72,30 +242,132 @@ def event_analytics(event_id):
     if event.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
 
-    reviews = [r for r in event.reviews if r.is_approved]
+    window = request.args.get('window', analytics.DEFAULT_WINDOW_DAYS, type=int)
+    bucket = request.args.get('bucket', analytics.DEFAULT_BUCKET)
+    try:
+        window_data = analytics.event_analytics(event, window_days=window, bucket=bucket)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    # Calculate analytics
-    analytics = {
-        'total_reviews': len(reviews),
+    # The original keys keep their all-time meaning; the bucketed figures for ?window= sit under 'window'
+    return jsonify({
+        'total_reviews': event.get_approved_count(),
         'average_rating': event.get_average_rating(),
         'rating_distribution': event.get_rating_distribution(),
         'response_rate': event.get_response_rate(),
-        'recent_activity': []
-    }
+        'recent_activity': analytics.recent_activity(event),
+        'category_breakdown': event.get_category_breakdown(),
+        'window': window_data,
+    })
+
+def _review_page(event, template):
+    per_page = max(min(request.args.get('per_page', REVIEWS_PER_PAGE, type=int), 50), 1)
+    search_query = request.args.get('q', '').strip()
+    cursor = request.args.get('cursor')
+    sort = request.args.get('sort', 'newest')
+    if sort not in REVIEW_SORTS:
+        return jsonify({'error': f"sort must be one of: {', '.join(REVIEW_SORTS)}"}), 400
+
+    # ?q= switches from keyset pages in ?sort= order (newest, quality, helpful) to ranked full-text results
+    snippets = {}
+    try:
+        if search_query:
+            reviews, snippets, next_cursor = search_reviews(event.id, search_query, cursor, per_page=per_page)
+        else:
+            reviews, next_cursor = Review.keyset_page(
+                Review.query.filter_by(event_id=event.id, is_approved=True), cursor, per_page=per_page, sort=sort
+            )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    results = []
+    for review in reviews:
+        data = review.to_dict()
+        if review.id in snippets:
+            data['snippet'] = str(snippets[review.id])
+        results.append(data)
+
+    return jsonify({
+        'reviews': results,
+        'html': render_template(template, reviews=reviews),
+        'next_cursor': next_cursor
+    })
+
+@bp.route('/event/<int:event_id>/reviews', methods=['GET'])
+@login_required
+def event_reviews(event_id):
+    event = Event.query.get_or_404(event_id)
+
+    # Check ownership
+    if event.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    return _review_page(event, 'dashboard/_review_cards.html')
+
+@bp.route('/review/<string:unique_code>/reviews', methods=['GET'])
+def public_reviews(unique_code):
+    event = resolve_event(unique_code)
+    if not event:
+        return jsonify({'error': 'Event not found'}), 404
+
+    return _review_page(event, 'review/_review_cards.html')
+
+def _keywords_response(**scope):
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    keywords = EventTerm.top_terms(limit=limit, **scope)
+    return jsonify({'keywords': [{'term': term, 'count': count} for term, count in keywords]})
 
-    # Recent activity (last 7 days)
-    from datetime import datetime, timedelta
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    recent_reviews = [r for r in reviews if r.submitted_at >= week_ago]
+@bp.route('/event/<int:event_id>/keywords', methods=['GET'])
+@login_required
+def event_keywords(event_id):
+    event = Event.query.get_or_404(event_id)
+
+    # Check ownership
+    if event.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
 
-    for review in recent_reviews:
-        analytics['recent_activity'].append({
-            'date': review.submitted_at.strftime('%Y-%m-%d'),
-            'rating': review.star_rating,
-            'reviewer': review.reviewer_name
-        })
+    return _keywords_response(event_id=event.id)
+
+@bp.route('/keywords', methods=['GET'])
+@login_required
+def organizer_keywords():
+    return _keywords_response(user_id=current_user.id)
 
-    return jsonify(analytics)
+@bp.route('/submissions/<string:ticket>', methods=['GET'])
+def submission_status(ticket):
+    if not ingest.enabled():
+        return jsonify({'error': 'Submissions are not queued'}), 404
+
+    status = ingest.submission_status(ticket)
+    if status is None:
+        return jsonify({'error': 'Unknown ticket'}), 404
+
+    return jsonify({'ticket': ticket, 'status': status})
+
+def _same_origin():
+    """True if the request's Origin (or, failing that, Referer) names this host"""
+    source = request.headers.get('Origin') or request.headers.get('Referer')
+    return bool(source) and urlsplit(source).netloc == request.host
+
+@bp.route('/review/<int:review_id>/helpful', methods=['POST'])
+@csrf.exempt
+@limiter.limit('60 per minute')
+def helpful_vote(review_id):
+    # The button is on pages served from the shared page cache, which cannot carry a
+    # per-session CSRF token; an Origin check stops cross-site posts instead
+    if not _same_origin():
+        return jsonify({'error': 'Cross-origin request'}), 403
+    review = db.session.get(Review, review_id)
+    if review is None or not review.is_approved:
+        return jsonify({'error': 'Review not found'}), 404
+
+    counted = helpful_votes.vote(review)
+    return jsonify({
+        'success': True,
+        'counted': counted,
+        'helpful_votes': helpful_votes.count(review),
+        'message': 'Thanks for your feedback' if counted else 'You already marked this review as helpful'
+    })
 
 @bp.route('/check-email', methods=['POST'])
 def check_email():
@@ -106,16 +378,14 @@ def check_email():
     if not email or not unique_code:
         return jsonify({'error': 'Missing data'}), 400
 
-    event = Event.query.filter_by(unique_code=unique_code).first()
+    event = resolve_event(unique_code)
     if not event:
         return jsonify({'error': 'Event not found'}), 404
 
-    existing_review = Review.query.filter_by(
-        event_id=event.id,
-        reviewer_email=email
-    ).first()
+    # Unused emails, the common case, are answered by the in-memory filter without a query
+    exists = email_filter.has_reviewed(event.id, email)
 
     return jsonify({
-        'exists': existing_review is not None,
-        'message': 'You have already reviewed this event' if existing_review else 'Email available'
+        'exists': exists,
+        'message': 'You have already reviewed this event' if exists else 'Email available'
     })
@@ -57,22 +57,24 @@ def logout():
 @bp.route('/profile', methods=['GET', 'POST'])
 @login_required
 def profile():
-    profile_form = ProfileForm(obj=current_user)
+    # current_user is a read-only cached snapshot; edit the real row
+    user = current_user.load()
+    profile_form = ProfileForm(obj=user)
     password_form = ChangePasswordForm()
 
     # Handle profile update
     if profile_form.submit.data and profile_form.validate_on_submit() and request.form.get('profile_submit'):
-        current_user.username = profile_form.username.data
-        current_user.email = profile_form.email.data
-        current_user.full_name = profile_form.full_name.data
-        current_user.organization = profile_form.organization.data
+        user.username = profile_form.username.data
+        user.email = profile_form.email.data
+        user.full_name = profile_form.full_name.data
+        user.organization = profile_form.organization.data
         db.session.commit()
         flash('Profile updated successfully.', 'success')
         return redirect(url_for('auth.profile'))
 
     # Handle password change
     if password_form.submit.data and password_form.validate_on_submit() and request.form.get('password_submit'):
-        current_user.set_password(password_form.new_password.data)
+        user.set_password(password_form.new_password.data)
         db.session.commit()
         flash('Password changed successfully. Please log in again.', 'success')
         logout_user()
@@ -0,0 +1,130 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Named caches, so their hit/miss counters can be exported (see app.metrics)
+caches = {}
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with an optional per-entry TTL (seconds)"""
+
+    def __init__(self, maxsize=1024, ttl=None, name=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        if name:
+            caches[name] = self
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def add(self, key, value, ttl=None):
+        """Set ``key`` unless it already holds a live value; True if it was set"""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                return False
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_matching(self, predicate):
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    """Shared cache backend storing JSON-serializable values in Redis.
+
+    Mirrors LRUCache's get/set/delete so callers can layer the two. Redis
+    errors are logged and treated as misses, so an outage only costs the
+    database round trips the cache would have saved.
+    """
+
+    def __init__(self, url, prefix='', ttl=None, name=None):
+        import redis
+
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._errors = (redis.RedisError,)
+        if name:
+            caches[name] = self
+
+    def get(self, key, default=None):
+        try:
+            raw = self._client.get(self.prefix + key)
+        except self._errors as e:
+            logger.warning('Redis cache get failed: %s', e)
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            self._client.set(self.prefix + key, json.dumps(value), ex=ttl or None)
+        except self._errors as e:
+            logger.warning('Redis cache set failed: %s', e)
+
+    def add(self, key, value, ttl=None):
+        """Set ``key`` unless it exists (SET NX); True if it was set, or if Redis is unavailable"""
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            return bool(self._client.set(self.prefix + key, json.dumps(value), ex=ttl or None, nx=True))
+        except self._errors as e:
+            logger.warning('Redis cache add failed: %s', e)
+            return True
+
+    def delete(self, key):
+        try:
+            self._client.delete(self.prefix + key)
+        except self._errors as e:
+            logger.warning('Redis cache delete failed: %s', e)
@@ -0,0 +1,135 @@
+"""Collision-free allocation of public event codes.
+
+Codes come from a counter in ``code_counters`` that each process advances a
+block at a time in its own short transaction (on SQLite, exactly as many as
+needed inside the caller's transaction), so concurrent creators never share a
+value and creating an event needs no per-code lookup. Each counter
+value goes through a keyed Feistel permutation of the 36^8 code space, so
+consecutive events get unrelated-looking codes, and is written in base 36. The
+key is ``EVENT_CODE_KEY`` or, when that is unset, derived from ``SECRET_KEY``, so
+the sequence cannot be computed from the public source.
+
+Events created before the allocator used random codes, so each fresh block is
+checked against existing codes once and any clash is skipped. That check is
+one SELECT on the unique_code index with an IN list of the block's codes (the
+permutation scatters them, so there is no range to scan instead): about one
+lookup per ``block_size`` events on servers, and one per allocate() call on
+SQLite, which reserves exactly what each call needs.
+"""
+import hashlib
+import os
+import threading
+from collections import deque
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import CodeCounter, Event
+
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+CODE_LENGTH = 8
+HALF_SPACE = len(ALPHABET) ** (CODE_LENGTH // 2)
+CODE_SPACE = HALF_SPACE ** 2
+FEISTEL_ROUNDS = 4
+
+
+def _round_value(key, round_index, value):
+    digest = hashlib.blake2b(f'{round_index}:{value}'.encode(), key=key, digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % HALF_SPACE
+
+
+def permute(value, key):
+    """Bijection on [0, CODE_SPACE): a balanced Feistel network over base-36 halves"""
+    left, right = divmod(value, HALF_SPACE)
+    for round_index in range(FEISTEL_ROUNDS):
+        left, right = right, (left + _round_value(key, round_index, right)) % HALF_SPACE
+    return left * HALF_SPACE + right
+
+
+def encode(value):
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+class CodeAllocator:
+    """Hands out unique codes from blocks reserved on a named counter"""
+
+    def __init__(self, name, block_size=100, key=None):
+        self.name = name
+        self.block_size = block_size
+        self._key = key.encode()[:64] if key else None
+        self._codes = deque()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def key(self):
+        """The permutation key: explicit, EVENT_CODE_KEY, or derived from the app's SECRET_KEY"""
+        if self._key is not None:
+            return self._key
+        configured = current_app.config.get('EVENT_CODE_KEY')
+        if configured:
+            return configured.encode()[:64]
+        secret = current_app.config['SECRET_KEY']
+        if isinstance(secret, str):
+            secret = secret.encode()
+        return hashlib.blake2b(secret, person=b'event-codes', digest_size=32).digest()
+
+    def allocate(self, count=1):
+        if db.engine.dialect.name == 'sqlite':
+            # SQLite has a single writer, so a second connection would wait on any writes
+            # already pending in the session. Reserve exactly what is needed inside the
+            # session's transaction instead; a rollback then releases codes and rows together.
+            codes = []
+            while len(codes) < count:
+                codes += self._reserve(count - len(codes), db.session.connection())
+            return codes
+
+        with self._lock:
+            # A block reserved before a fork must not be handed out by several workers
+            if self._pid != os.getpid():
+                self._codes.clear()
+                self._pid = os.getpid()
+            while len(self._codes) < count:
+                self._codes.extend(self._reserve(max(self.block_size, count - len(self._codes))))
+            return [self._codes.popleft() for _ in range(count)]
+
+    def _reserve(self, size, conn=None):
+        start = self._advance_counter(size, conn)
+        if start + size > CODE_SPACE:
+            raise RuntimeError(f'Code space for {self.name!r} is exhausted')
+        key = self.key
+        codes = [encode(permute(value, key)) for value in range(start, start + size)]
+        taken = set(db.session.scalars(select(Event.unique_code).where(Event.unique_code.in_(codes))))
+        return [code for code in codes if code not in taken]
+
+    def _advance_counter(self, size, conn=None):
+        """Reserve [start, start + size), in a transaction of its own unless ``conn`` is given"""
+        if conn is not None:
+            return self._advance(conn, size)
+        for _ in range(2):
+            try:
+                with db.engine.begin() as conn:
+                    return self._advance(conn, size)
+            except IntegrityError:
+                # Another process created the counter row first; take a block from it instead
+                continue
+        raise RuntimeError(f'Could not reserve codes from counter {self.name!r}')
+
+    def _advance(self, conn, size):
+        counter = CodeCounter.__table__
+        advanced = conn.execute(
+            update(counter).where(counter.c.name == self.name)
+            .values(next_value=counter.c.next_value + size)
+        ).rowcount
+        if not advanced:
+            conn.execute(counter.insert().values(name=self.name, next_value=size))
+            return 0
+        # The row stays locked by our UPDATE until commit, so this read is ours
+        return conn.scalar(select(counter.c.next_value).where(counter.c.name == self.name)) - size
+
+
+event_codes = CodeAllocator('event_code')
@@ -0,0 +1,45 @@
+import click
+from app import db, ingest, search
+from app.models import EventStats, EventTerm
+
+
+def register_commands(app):
+    @app.cli.command('reconcile-stats')
+    @click.option('--event-id', 'event_ids', type=int, multiple=True,
+                  help='Only rebuild these events (repeatable). Defaults to all events.')
+    def reconcile_stats(event_ids):
+        """Rebuild per-event review aggregates from the reviews table."""
+        rebuilt = EventStats.rebuild(event_ids or None)
+        db.session.commit()
+        click.echo(f'Rebuilt review aggregates for {rebuilt} event(s).')
+
+    @app.cli.command('rebuild-keywords')
+    @click.option('--event-id', 'event_ids', type=int, multiple=True,
+                  help='Only rebuild these events (repeatable). Defaults to all events.')
+    def rebuild_keywords(event_ids):
+        """Recount per-event review keywords from the reviews table."""
+        rebuilt = EventTerm.rebuild(event_ids or None)
+        db.session.commit()
+        click.echo(f'Rebuilt keyword counts for {rebuilt} event(s).')
+
+    @app.cli.command('search-reindex')
+    def search_reindex():
+        """Create the review full-text index if missing and rebuild it."""
+        dialect = search.reindex()
+        db.session.commit()
+        click.echo(f'Review search index rebuilt ({dialect}).')
+
+    @app.cli.command('ingest-drain')
+    def ingest_drain():
+        """Write all queued review submissions now (REVIEW_INGEST=queue)."""
+        if app.config.get('REVIEW_INGEST') != 'queue':
+            raise click.ClickException('Review ingestion queue is not enabled (set REVIEW_INGEST=queue).')
+        queue = ingest.get_queue(app)
+        total = 0
+        while True:
+            items = queue.claim(app.config['REVIEW_INGEST_BATCH_SIZE'])
+            if not items:
+                break
+            ingest.process_batch(queue, items)
+            total += len(items)
+        click.echo(f'Processed {total} queued submission(s); {queue.depth()} still pending.')
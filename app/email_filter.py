@@ -0,0 +1,141 @@
+"""Per-event Bloom filters of reviewer emails.
+
+/api/check-email is anonymous and called as attendees type, and almost every
+call is for an email that has not reviewed the event yet. Each worker keeps a
+Bloom filter of the event's reviewer emails, built lazily with one query, so
+those calls are answered from memory; only a possible hit (a real duplicate or
+a ~1% false positive) goes to the reviews table.
+
+Filters only ever over-report, so they are updated after commit: emails from
+committed inserts are added, and committed deletes drop the event's filter to
+be rebuilt on the next lookup. Writes made by other workers reach this
+worker's filters when they expire after FILTER_TTL seconds; submissions are
+still guarded by the unique constraint, so that only delays the hint.
+"""
+import hashlib
+import math
+import threading
+from sqlalchemy import event, select
+from app import db
+from app.cache import LRUCache
+from app.models import Review
+
+FILTER_TTL = 60
+FALSE_POSITIVE_RATE = 0.01
+MIN_CAPACITY = 256
+
+_filters = LRUCache(maxsize=1024, ttl=FILTER_TTL, name='email_filters')
+# Filter builds in progress per event. A committed change to the event's
+# reviews marks them stale, so a filter built from a query that raced with the
+# commit is never cached. Only events with a build running have an entry.
+_builds = {}
+_builds_lock = threading.Lock()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for ``capacity`` items"""
+
+    def __init__(self, capacity, error_rate=FALSE_POSITIVE_RATE):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def full(self):
+        return self.count > self.capacity
+
+
+def _changed(event_id):
+    with _builds_lock:
+        for build in _builds.get(event_id, ()):
+            build['stale'] = True
+
+
+def _build(event_id):
+    build = {'stale': False}
+    with _builds_lock:
+        _builds.setdefault(event_id, []).append(build)
+    bloom = None
+    try:
+        emails = db.session.scalars(select(Review.reviewer_email).where(Review.event_id == event_id)).all()
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * len(emails)))
+        for email in emails:
+            bloom.add(email)
+    finally:
+        with _builds_lock:
+            builds = _builds[event_id]
+            builds.remove(build)
+            if not builds:
+                del _builds[event_id]
+            # Cached under the lock: a commit either marks this build stale first or
+            # finds the cached filter afterwards and adds its emails to it
+            if bloom is not None and not build['stale']:
+                _filters.set(event_id, bloom)
+    return bloom
+
+
+def might_contain(event_id, email):
+    """False only if no review of the event uses ``email``"""
+    bloom = _filters.get(event_id)
+    if bloom is None:
+        bloom = _build(event_id)
+    return email in bloom
+
+
+def has_reviewed(event_id, email):
+    if not might_contain(event_id, email):
+        return False
+    return db.session.scalar(
+        select(Review.id).where(Review.event_id == event_id, Review.reviewer_email == email).limit(1)
+    ) is not None
+
+
+def invalidate(event_id):
+    _changed(event_id)
+    _filters.delete(event_id)
+
+
+# Called from app.review_hooks; applied once the transaction commits
+def reviews_added(reviews):
+    added = db.session.info.setdefault('email_filter_added', [])
+    added.extend((review.event_id, review.reviewer_email) for review in reviews)
+
+
+def reviews_removed(event_ids):
+    db.session.info.setdefault('email_filter_removed', set()).update(event_ids)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_committed(session):
+    for event_id, email in session.info.pop('email_filter_added', ()):
+        _changed(event_id)
+        bloom = _filters.get(event_id)
+        if bloom is not None:
+            bloom.add(email)
+            if bloom.full:
+                # Past capacity the false-positive rate climbs; resize on the next lookup
+                _filters.delete(event_id)
+    for event_id in session.info.pop('email_filter_removed', ()):
+        invalidate(event_id)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_uncommitted(session):
+    session.info.pop('email_filter_added', None)
+    session.info.pop('email_filter_removed', None)
@@ -0,0 +1,202 @@
+"""Helpful votes on reviews, counted in memory and written in batches.
+
+A featured review that goes viral can draw hundreds of votes a second, and an
+UPDATE per vote would queue every one of them on that review's row lock.
+Votes are instead added to a sharded in-process counter (threads rarely share
+a shard lock), and a background thread per process writes the totals every
+HELPFUL_VOTES_FLUSH_INTERVAL seconds: one transaction of
+``UPDATE reviews SET helpful_votes = helpful_votes + n`` statements, one per
+voted review. The increments are relative, so flushes from several workers
+never overwrite each other. A flush that fails puts its votes back for the
+next one, and pending votes are flushed when the process exits.
+
+Vote totals are not part of the cached public pages' validators, so a flush
+does not bump EventStats.updated_at. An event that keeps getting votes has its
+cached pages (and their ?sort=helpful order) refreshed at most once every
+HELPFUL_VOTES_REFRESH_INTERVAL seconds.
+
+Each visitor counts once per review. A vote is only counted if neither the
+random visitor id in the session cookie nor the client (address and user
+agent) has voted on the review, so dropping the cookie does not earn another
+vote. The keys seen are remembered for DEDUPE_TTL in process and, with
+CACHE_REDIS_URL set, in Redis, so another worker cannot count them twice.
+"""
+import atexit
+import hashlib
+import itertools
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from flask import current_app, request, session
+from sqlalchemy import bindparam, update
+from app import db
+from app.cache import LRUCache, RedisCache
+from app.models import Review
+from app.review_hooks import reviews_changed
+
+logger = logging.getLogger(__name__)
+
+SHARDS = 16
+DEDUPE_TTL = 30 * 86400
+
+_seen = LRUCache(maxsize=200000, ttl=DEDUPE_TTL, name='helpful_votes')
+_shared = {}
+
+
+class ShardedCounter:
+    """Thread-safe counter split into shards with their own locks.
+
+    Each thread adds to one shard, so concurrent voters do not wait on a
+    single lock; drain() empties every shard and returns the merged counts.
+    """
+
+    def __init__(self, shards=SHARDS):
+        self._shards = [(threading.Lock(), Counter()) for _ in range(shards)]
+        self._next_shard = itertools.count()
+        self._local = threading.local()
+
+    def _shard(self):
+        index = getattr(self._local, 'index', None)
+        if index is None:
+            index = self._local.index = next(self._next_shard) % len(self._shards)
+        return self._shards[index]
+
+    def add(self, key, n=1):
+        lock, counts = self._shard()
+        with lock:
+            counts[key] += n
+
+    def get(self, key):
+        total = 0
+        for lock, counts in self._shards:
+            with lock:
+                total += counts.get(key, 0)
+        return total
+
+    def drain(self):
+        drained = Counter()
+        for lock, counts in self._shards:
+            with lock:
+                drained.update(counts)
+                counts.clear()
+        return drained
+
+
+class VoteFlusher(threading.Thread):
+    """Daemon thread that writes an app's pending votes every ``interval`` seconds"""
+
+    def __init__(self, app, interval):
+        super().__init__(name='helpful-votes', daemon=True)
+        self.app = app
+        self.interval = interval
+        self.pid = os.getpid()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                flush(self.app)
+            except Exception:
+                logger.exception('Helpful vote flush failed; votes are kept for the next one')
+
+
+def _state(app):
+    return app.extensions['helpful_votes']
+
+
+def _shared_seen():
+    url = current_app.config.get('CACHE_REDIS_URL')
+    if not url:
+        return None
+    if url not in _shared:
+        _shared[url] = RedisCache(url, prefix='helpful-vote:', ttl=DEDUPE_TTL, name='helpful_votes_shared')
+    return _shared[url]
+
+
+def _first_vote(review_id):
+    visitor = session.setdefault('visitor_id', uuid.uuid4().hex)
+    client = hashlib.blake2b(f'{request.remote_addr}|{request.user_agent.string}'.encode(),
+                             digest_size=12).hexdigest()
+    shared = _shared_seen()
+    first = True
+    for key in (f'{review_id}:visitor:{visitor}', f'{review_id}:client:{client}'):
+        # Both keys are recorded even after a repeat, so neither can count later
+        seen = not _seen.add(key, True)
+        if shared is not None and not shared.add(key, 1):
+            seen = True
+        first = first and not seen
+    return first
+
+
+def ensure_flusher(app):
+    state = _state(app)
+    flusher = state['flusher']
+    # Workers forked from a parent that had started a thread need their own
+    if flusher is None or flusher.pid != os.getpid() or not flusher.is_alive():
+        with state['lock']:
+            flusher = state['flusher']
+            if flusher is None or flusher.pid != os.getpid() or not flusher.is_alive():
+                flusher = VoteFlusher(app, app.config['HELPFUL_VOTES_FLUSH_INTERVAL'])
+                flusher.start()
+                state['flusher'] = flusher
+                atexit.register(flush, app)
+
+
+def vote(review):
+    """Count the current visitor's helpful vote for an approved review; False if they already voted"""
+    app = current_app._get_current_object()
+    if not _first_vote(review.id):
+        return False
+    ensure_flusher(app)
+    _state(app)['counter'].add((review.event_id, review.id))
+    return True
+
+
+def count(review):
+    """Stored votes plus the votes this process has not written yet"""
+    return (review.helpful_votes or 0) + _state(current_app)['counter'].get((review.event_id, review.id))
+
+
+def flush(app=None):
+    """Write pending votes in one transaction; returns how many were written"""
+    app = app or current_app._get_current_object()
+    state = _state(app)
+    with state['flush_lock']:
+        votes = state['counter'].drain()
+        if not votes:
+            return 0
+        table = Review.__table__
+        increment = update(table).where(table.c.id == bindparam('review_id'))\
+            .values(helpful_votes=table.c.helpful_votes + bindparam('votes'))
+        # Rows in id order, so concurrent flushes from other workers lock them in the same order
+        rows = sorted(({'review_id': review_id, 'votes': n} for (_, review_id), n in votes.items()),
+                      key=lambda row: row['review_id'])
+        # Cached pages show the counts and ?sort=helpful order; refresh them on a coarse interval only
+        stale = [event_id for event_id in {event_id for event_id, _ in votes}
+                 if state['refreshed'].get(event_id) is None]
+        try:
+            with app.app_context():
+                db.session.execute(increment, rows)
+                reviews_changed(stale)
+                db.session.commit()
+        except Exception:
+            for key, n in votes.items():
+                state['counter'].add(key, n)
+            raise
+        for event_id in stale:
+            state['refreshed'].set(event_id, True)
+        return sum(votes.values())
+
+
+def init_app(app):
+    app.extensions['helpful_votes'] = {
+        'counter': ShardedCounter(),
+        'flusher': None,
+        'lock': threading.Lock(),
+        'flush_lock': threading.Lock(),
+        # Events whose pages were refreshed within HELPFUL_VOTES_REFRESH_INTERVAL
+        'refreshed': LRUCache(maxsize=10000, ttl=app.config['HELPFUL_VOTES_REFRESH_INTERVAL']),
+    }
@@ -0,0 +1,89 @@
+"""Conditional GET and rendered-page caching for the public review pages.
+
+A page's validator is derived from its event's ``updated_at`` and the
+``event_stats`` row's ``updated_at``, which every review write bumps, so one
+indexed lookup decides whether a 304 or a cached render can be served.
+Rendered pages live in an in-process LRU keyed by event, endpoint and query
+string; review hooks and event edits evict an event's entries explicitly.
+
+Nothing is cached for signed-in users (the navbar differs) or while flash
+messages are pending. Pages carrying a CSRF form only get conditional GET,
+with the session's CSRF token folded into the ETag.
+"""
+import hashlib
+import time
+from functools import wraps
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import select
+from app import db
+from app.cache import LRUCache
+from app.models import Event, EventStats
+
+PAGE_CACHE_TTL = 300
+
+pages = LRUCache(maxsize=512, ttl=PAGE_CACHE_TTL, name='pages')
+
+
+def page_version(unique_code):
+    """(event id, last modified) for an event's public pages, or None if it does not exist"""
+    row = db.session.execute(
+        select(Event.id, Event.updated_at, EventStats.updated_at)
+        .outerjoin(EventStats, EventStats.event_id == Event.id)
+        .where(Event.unique_code == unique_code)
+    ).first()
+    if row is None:
+        return None
+    event_id, event_updated, stats_updated = row
+    stamps = [stamp for stamp in (event_updated, stats_updated) if stamp]
+    return event_id, max(stamps) if stamps else None
+
+
+def invalidate_event(event_id):
+    pages.delete_matching(lambda key: key[0] == event_id)
+
+
+def _csrf_epoch():
+    # Rotate the validator before signed CSRF tokens in a revalidated page expire
+    limit = current_app.config.get('WTF_CSRF_TIME_LIMIT') or 3600
+    return int(time.time() // (limit / 2))
+
+
+def cached_page(has_form=False):
+    """Serve a public ``/review/<unique_code>`` view with validators and, unless
+    it renders a form, from the rendered-page cache"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(unique_code, **kwargs):
+            if current_user.is_authenticated or session.get('_flashes'):
+                return view(unique_code, **kwargs)
+
+            version = page_version(unique_code)
+            if version is None or version[1] is None:
+                return view(unique_code, **kwargs)
+            event_id, last_modified = version
+
+            parts = [request.endpoint, request.query_string.decode(), last_modified.isoformat()]
+            if has_form:
+                parts += [session.get('csrf_token', ''), str(_csrf_epoch())]
+            etag = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+            key = (event_id, request.endpoint, request.query_string)
+            cached = None if has_form else pages.get(key)
+            if cached is not None and cached[0] == etag:
+                response = make_response(cached[1])
+            else:
+                response = make_response(view(unique_code, **kwargs))
+                if not has_form and response.status_code == 200 and not session.get('_flashes'):
+                    pages.set(key, (etag, response.get_data()))
+
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            if has_form:
+                response.cache_control.private = True
+            else:
+                response.cache_control.public = True
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
@@ -0,0 +1,306 @@
+"""Write-behind ingestion for review submissions.
+
+With REVIEW_INGEST=queue, submit_review validates the form, puts the review on
+a local queue and answers at once. A background thread in each process drains
+the queue in batches: one multi-row INSERT ... ON CONFLICT DO NOTHING plus one
+stats/keyword upsert per event, committed together, so commit cost is paid
+per batch instead of per review. A full queue pushes back on submitters
+(QueueFull), and every submission gets a ticket whose status can be looked up.
+
+Backends share a small interface (put/claim/complete/release/status/depth):
+SQLiteQueue, a durable file shared by all workers on the host, and
+MemoryQueue, an in-process stand-in for development and tests.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models import Review, categories_to_mask
+from app.review_hooks import reviews_added
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+PROCESSING = 'processing'
+CREATED = 'created'
+DUPLICATE = 'duplicate'
+FAILED = 'failed'
+
+MAX_ATTEMPTS = 5
+# Claims older than this are assumed to belong to a crashed worker and are retried
+STALE_CLAIM_SECONDS = 60
+# How long finished tickets stay available to the status lookup
+FINISHED_RETENTION_SECONDS = 24 * 3600
+IDLE_WAIT_SECONDS = 0.2
+
+
+class QueueFull(Exception):
+    pass
+
+
+class SQLiteQueue:
+    """Durable queue in a local SQLite file (WAL mode, one connection per thread)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS review_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket TEXT NOT NULL UNIQUE,
+            payload TEXT NOT NULL,
+            state TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            enqueued_at REAL NOT NULL,
+            claimed_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS ix_review_queue_state ON review_queue (state, id);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def put(self, ticket, payload):
+        self._conn().execute(
+            'INSERT INTO review_queue (ticket, payload, state, enqueued_at) VALUES (?, ?, ?, ?)',
+            (ticket, payload, PENDING, time.time())
+        )
+
+    def claim(self, limit):
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('UPDATE review_queue SET state = ? WHERE state = ? AND claimed_at < ?',
+                         (PENDING, PROCESSING, now - STALE_CLAIM_SECONDS))
+            rows = conn.execute('SELECT id, ticket, payload FROM review_queue WHERE state = ? ORDER BY id LIMIT ?',
+                                (PENDING, limit)).fetchall()
+            conn.executemany('UPDATE review_queue SET state = ?, claimed_at = ?, attempts = attempts + 1 '
+                             'WHERE id = ?', [(PROCESSING, now, row[0]) for row in rows])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return [(ticket, payload) for _, ticket, payload in rows]
+
+    def complete(self, states):
+        self._conn().executemany('UPDATE review_queue SET state = ? WHERE ticket = ?',
+                                 [(state, ticket) for ticket, state in states.items()])
+
+    def release(self, tickets):
+        """Return claimed tickets to the queue, failing those out of attempts"""
+        self._conn().executemany(
+            'UPDATE review_queue SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END WHERE ticket = ?',
+            [(MAX_ATTEMPTS, FAILED, PENDING, ticket) for ticket in tickets]
+        )
+
+    def status(self, ticket):
+        row = self._conn().execute('SELECT state FROM review_queue WHERE ticket = ?', (ticket,)).fetchone()
+        return row[0] if row else None
+
+    def depth(self):
+        return self._conn().execute('SELECT count(*) FROM review_queue WHERE state IN (?, ?)',
+                                    (PENDING, PROCESSING)).fetchone()[0]
+
+    def purge(self, older_than):
+        self._conn().execute('DELETE FROM review_queue WHERE state IN (?, ?, ?) AND enqueued_at < ?',
+                             (CREATED, DUPLICATE, FAILED, older_than))
+
+
+class MemoryQueue:
+    """In-process stand-in for SQLiteQueue; not durable and not shared between workers"""
+
+    def __init__(self):
+        self._pending = deque()
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, ticket, payload):
+        with self._lock:
+            self._items[ticket] = {'payload': payload, 'state': PENDING, 'attempts': 0, 'at': time.time()}
+            self._pending.append(ticket)
+
+    def claim(self, limit):
+        with self._lock:
+            claimed = []
+            while self._pending and len(claimed) < limit:
+                ticket = self._pending.popleft()
+                item = self._items[ticket]
+                item['state'] = PROCESSING
+                item['attempts'] += 1
+                claimed.append((ticket, item['payload']))
+            return claimed
+
+    def complete(self, states):
+        with self._lock:
+            for ticket, state in states.items():
+                self._items[ticket]['state'] = state
+
+    def release(self, tickets):
+        with self._lock:
+            for ticket in tickets:
+                item = self._items[ticket]
+                if item['attempts'] >= MAX_ATTEMPTS:
+                    item['state'] = FAILED
+                else:
+                    item['state'] = PENDING
+                    self._pending.append(ticket)
+
+    def status(self, ticket):
+        with self._lock:
+            item = self._items.get(ticket)
+            return item['state'] if item else None
+
+    def depth(self):
+        with self._lock:
+            return sum(1 for item in self._items.values() if item['state'] in (PENDING, PROCESSING))
+
+    def purge(self, older_than):
+        with self._lock:
+            for ticket in [ticket for ticket, item in self._items.items()
+                           if item['state'] not in (PENDING, PROCESSING) and item['at'] < older_than]:
+                del self._items[ticket]
+
+
+def encode_review(review):
+    values = review.column_values()
+    values['submitted_at'] = values['submitted_at'].isoformat()
+    return json.dumps(values)
+
+
+def decode_review(payload):
+    values = json.loads(payload)
+    values['submitted_at'] = datetime.fromisoformat(values['submitted_at'])
+    if 'review_categories' in values:
+        # Queued before categories became a bitmask
+        values['category_mask'] = categories_to_mask(json.loads(values.pop('review_categories') or '[]'))
+    return Review(**values)
+
+
+def write_batch(items):
+    """Insert a batch of queued reviews in one transaction; returns {ticket: state}"""
+    reviews = {ticket: decode_review(payload) for ticket, payload in items}
+    created = Review.insert_many_if_absent(list(reviews.values()))
+    if created:
+        reviews_added(created)
+    db.session.commit()
+    created_ids = {id(review) for review in created}
+    return {ticket: CREATED if id(review) in created_ids else DUPLICATE for ticket, review in reviews.items()}
+
+
+def process_batch(queue, items):
+    try:
+        states = write_batch(items)
+    except Exception:
+        db.session.rollback()
+        if len(items) == 1:
+            logger.exception('Review ingestion failed for ticket %s', items[0][0])
+            queue.release([items[0][0]])
+            return
+        # One bad row should not hold back the rest: retry the batch item by item
+        for item in items:
+            process_batch(queue, [item])
+        return
+    queue.complete(states)
+
+
+class IngestWorker(threading.Thread):
+    """Daemon thread that drains the queue for one app in this process"""
+
+    def __init__(self, app, queue, batch_size):
+        super().__init__(name='review-ingest', daemon=True)
+        self.app = app
+        self.queue = queue
+        self.batch_size = batch_size
+        self.pid = os.getpid()
+        self._last_purge = 0
+
+    def run(self):
+        while True:
+            try:
+                drained = self.drain_once()
+            except Exception:
+                logger.exception('Review ingestion worker error')
+                drained = 0
+            if not drained:
+                time.sleep(IDLE_WAIT_SECONDS)
+
+    def drain_once(self):
+        items = self.queue.claim(self.batch_size)
+        if items:
+            with self.app.app_context():
+                process_batch(self.queue, items)
+        elif time.time() - self._last_purge > 60:
+            self.queue.purge(time.time() - FINISHED_RETENTION_SECONDS)
+            self._last_purge = time.time()
+        return len(items)
+
+
+def enabled():
+    return current_app.config.get('REVIEW_INGEST') == 'queue'
+
+
+def get_queue(app=None):
+    app = app or current_app
+    return app.extensions['review_ingest']['queue']
+
+
+def ensure_worker(app):
+    state = app.extensions['review_ingest']
+    worker = state.get('worker')
+    # Workers forked from a parent that had started a thread need their own
+    if worker is None or worker.pid != os.getpid() or not worker.is_alive():
+        with state['lock']:
+            worker = state.get('worker')
+            if worker is None or worker.pid != os.getpid() or not worker.is_alive():
+                worker = IngestWorker(app, state['queue'], app.config['REVIEW_INGEST_BATCH_SIZE'])
+                worker.start()
+                state['worker'] = worker
+
+
+def enqueue(review):
+    """Queue a validated review for the background writer; returns its ticket"""
+    queue = get_queue()
+    if queue.depth() >= current_app.config['REVIEW_INGEST_MAX_PENDING']:
+        raise QueueFull()
+    review.fill_defaults()
+    ticket = uuid.uuid4().hex
+    queue.put(ticket, encode_review(review))
+    return ticket
+
+
+def submission_status(ticket):
+    return get_queue().status(ticket)
+
+
+def init_app(app):
+    if app.config.get('REVIEW_INGEST') != 'queue':
+        return
+    if app.config.get('REVIEW_INGEST_BACKEND') == 'memory':
+        queue = MemoryQueue()
+    else:
+        path = app.config.get('REVIEW_INGEST_PATH') or os.path.join(
+            os.environ.get('FILE_STORAGE_PATH') or app.instance_path, 'review_queue.sqlite3')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        queue = SQLiteQueue(path)
+    app.extensions['review_ingest'] = {'queue': queue, 'worker': None, 'lock': threading.Lock()}
+
+    # Start (or restart after a fork) the drainer on the first request each process serves
+    @app.before_request
+    def _start_ingest_worker():
+        ensure_worker(app)
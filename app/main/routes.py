@@ -1,12 +1,22 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify, send_file
+from flask import (render_template, redirect, url_for, flash, request, jsonify, send_file, Response,
+                   stream_with_context, make_response, abort)
 from flask_login import login_required, current_user
 from app.main import bp
-from app.models import User, Event, Review, db
+from app.models import User, Event, Review, REVIEW_SORTS, db
 from app.forms import EventForm, ReviewForm, EditEventForm
-from app.utils import generate_qr_code, export_reviews_csv
+from app.utils import qr_codes, set_attachment, stream_csv, QR_FORMATS
+from app import email_filter, ingest
+from app.review_hooks import review_added
+from app.query_budget import query_budget
+from app.search import search_reviews
+from app.http_cache import cached_page, invalidate_event
+from app.public_events import resolve_event_or_404, invalidate as invalidate_public_event
 from datetime import datetime, date
-from sqlalchemy import func
+from io import BytesIO
+from sqlalchemy import func, select
+from werkzeug.utils import secure_filename
 import os
+import zipfile
 
 @bp.route('/')
 def index():
@@ -20,30 +30,16 @@ def health():
 
 @bp.route('/dashboard')
 @login_required
+@query_budget(max_queries=8, max_repeats=2)
 def dashboard():
-    events = current_user.events
-
-    # Calculate dashboard statistics
+    # Per-event counts/averages come from the joined aggregates, totals from one SUM query
+    events = current_user.get_events_with_stats()
     total_events = len(events)
-    total_reviews = sum(len(event.reviews) for event in events)
-    avg_rating = 0
-
-    if total_reviews > 0:
-        all_ratings = []
-        for event in events:
-            for review in event.reviews:
-                if review.is_approved:
-                    all_ratings.append(review.star_rating)
-        avg_rating = sum(all_ratings) / len(all_ratings) if all_ratings else 0
+    total_reviews, approved_count, rating_sum = current_user.get_review_summary()
+    avg_rating = rating_sum / approved_count if approved_count else 0
 
     # Recent reviews
-    recent_reviews = []
-    for event in events:
-        for review in event.reviews:
-            if review.is_approved:
-                recent_reviews.append(review)
-    recent_reviews.sort(key=lambda x: x.submitted_at, reverse=True)
-    recent_reviews = recent_reviews[:5]
+    recent_reviews = current_user.get_recent_reviews(limit=5)
 
     return render_template('dashboard/dashboard.html', title='Dashboard',
                          events=events, total_events=total_events,
@@ -75,6 +71,7 @@ def create_event():
 
 @bp.route('/event/<int:event_id>')
 @login_required
+@query_budget(max_queries=10, max_repeats=2)
 def event_details(event_id):
     event = Event.query.get_or_404(event_id)
 
@@ -83,16 +80,38 @@ def event_details(event_id):
         flash('You can only view your own events.', 'error')
         return redirect(url_for('main.dashboard'))
 
+    # One page of approved reviews; further pages come from api.event_reviews
+    reviews, next_cursor, search_query, sort = _review_list_page(event)
+
     # Calculate statistics
-    reviews = event.reviews
-    approved_reviews = [r for r in reviews if r.is_approved]
     avg_rating = event.get_average_rating()
     rating_distribution = event.get_rating_distribution()
     response_rate = event.get_response_rate()
 
     return render_template('dashboard/event_details.html', title=f'Event: {event.title}',
-                         event=event, reviews=approved_reviews, avg_rating=avg_rating,
-                         rating_distribution=rating_distribution, response_rate=response_rate)
+                         event=event, reviews=reviews, next_cursor=next_cursor, search_query=search_query, sort=sort,
+                         total_reviews=event.get_approved_count(), avg_rating=avg_rating,
+                         rating_distribution=rating_distribution, response_rate=response_rate,
+                         recommend_rate=event.get_recommend_rate(),
+                         category_breakdown=event.get_category_breakdown())
+
+def _review_list_page(event):
+    """Approved reviews for a list page: ranked search results for ?q=, otherwise in ?sort= order"""
+    search_query = request.args.get('q', '').strip()
+    cursor = request.args.get('cursor')
+    sort = request.args.get('sort')
+    sort = sort if sort in REVIEW_SORTS else 'newest'
+    try:
+        if search_query:
+            reviews, _, next_cursor = search_reviews(event.id, search_query, cursor)
+        else:
+            reviews, next_cursor = Review.keyset_page(
+                Review.query.filter_by(event_id=event.id, is_approved=True), cursor, sort=sort
+            )
+    except ValueError:
+        # A cursor that is malformed or was issued for another sort or a search
+        abort(400)
+    return reviews, next_cursor, search_query, sort
 
 @bp.route('/event/<int:event_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -109,6 +128,8 @@ def edit_event(event_id):
         form.populate_obj(event)
         event.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_event(event.id)
+        invalidate_public_event(event.unique_code)
         flash('Event updated successfully!', 'success')
         return redirect(url_for('main.event_details', event_id=event.id))
 
@@ -124,11 +145,44 @@ def event_qr_code(event_id):
         flash('You can only access your own events.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    # Generate QR code
+    box_size, fmt = _qr_options()
     review_url = request.url_root.rstrip('/') + event.get_review_url()
-    qr_path = generate_qr_code(review_url, event.unique_code)
+    etag, data = qr_codes.get(review_url, box_size, fmt)
 
-    return send_file(qr_path, as_attachment=True, download_name=f'{event.title}_QR.png')
+    # conditional=True answers a matching If-None-Match with 304 Not Modified
+    return send_file(BytesIO(data), mimetype=QR_FORMATS[fmt], as_attachment=True,
+                     download_name=f'{event.title}_QR.{fmt}', etag=etag, conditional=True,
+                     max_age=86400)
+
+@bp.route('/events/qr-codes.zip')
+@login_required
+def event_qr_codes_zip():
+    box_size, fmt = _qr_options()
+    url_root = request.url_root.rstrip('/')
+    events = db.session.execute(
+        select(Event.title, Event.unique_code).where(Event.user_id == current_user.id).order_by(Event.id)
+    ).all()
+
+    buffer = BytesIO()
+    # Images are already compressed, so store them as-is. Each one comes from the QR cache;
+    # misses are rendered by the pure-Python qrcode package, which holds the GIL, so threads
+    # would not render them any faster
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for ev in events:
+            _, data = qr_codes.get(f'{url_root}/review/{ev.unique_code}', box_size, fmt)
+            name = secure_filename(ev.title) or 'event'
+            archive.writestr(f'{name}_{ev.unique_code}_QR.{fmt}', data)
+    buffer.seek(0)
+
+    return send_file(buffer, mimetype='application/zip', as_attachment=True,
+                     download_name='event_qr_codes.zip')
+
+def _qr_options():
+    box_size = min(max(request.args.get('size', 10, type=int), 1), 40)
+    fmt = request.args.get('format', 'png')
+    if fmt not in QR_FORMATS:
+        fmt = 'png'
+    return box_size, fmt
 
 @bp.route('/event/<int:event_id>/export')
 @login_required
@@ -140,13 +194,21 @@ def export_event_reviews(event_id):
         flash('You can only export your own event data.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    # Export reviews to CSV
-    csv_path = export_reviews_csv(event)
-    return send_file(csv_path, as_attachment=True, download_name=f'{event.title}_reviews.csv')
+    # Stream the CSV as rows are fetched; ?gzip=1 sends a compressed .csv.gz instead
+    compress = request.args.get('gzip') == '1'
+    rows = Review.iter_export_rows(event.id)
+    response = Response(
+        stream_with_context(stream_csv(Review.EXPORT_FIELDNAMES, rows, compress=compress)),
+        mimetype='application/gzip' if compress else 'text/csv'
+    )
+    filename = f'{event.title}_reviews.csv' + ('.gz' if compress else '')
+    set_attachment(response.headers, filename)
+    return response
 
 @bp.route('/review/<string:unique_code>')
+@cached_page(has_form=True)
 def review_form(unique_code):
-    event = Event.query.filter_by(unique_code=unique_code).first_or_404()
+    event = resolve_event_or_404(unique_code)
 
     if not event.allow_reviews:
         return render_template('review/reviews_disabled.html', event=event)
@@ -157,7 +219,7 @@ def review_form(unique_code):
 
 @bp.route('/review/<string:unique_code>/submit', methods=['POST'])
 def submit_review(unique_code):
-    event = Event.query.filter_by(unique_code=unique_code).first_or_404()
+    event = resolve_event_or_404(unique_code)
 
     if not event.allow_reviews:
         flash('Reviews are not allowed for this event.', 'error')
@@ -165,16 +227,6 @@ def submit_review(unique_code):
 
     form = ReviewForm()
     if form.validate_on_submit():
-        # Check if user already reviewed this event
-        existing_review = Review.query.filter_by(
-            event_id=event.id,
-            reviewer_email=form.reviewer_email.data
-        ).first()
-
-        if existing_review:
-            flash('You have already submitted a review for this event.', 'warning')
-            return redirect(url_for('main.review_success', unique_code=unique_code))
-
         # Create review categories list
         categories = []
         if form.great_sound.data:
@@ -200,7 +252,28 @@ def submit_review(unique_code):
         )
         review.set_categories(categories)
 
-        db.session.add(review)
+        if ingest.enabled():
+            # The queue cannot detect duplicates, so catch them here; the filter spares new emails a query
+            if email_filter.has_reviewed(event.id, review.reviewer_email):
+                flash('You have already submitted a review for this event.', 'warning')
+                return redirect(url_for('main.review_success', unique_code=unique_code))
+            try:
+                ticket = ingest.enqueue(review)
+            except ingest.QueueFull:
+                flash('We are receiving a lot of reviews right now. Please submit again in a moment.', 'warning')
+                response = make_response(render_template('review/review_form.html', title=f'Review: {event.title}',
+                                                         event=event, form=form), 503)
+                response.headers['Retry-After'] = '5'
+                return response
+            flash('Thank you for your review! It will appear shortly.', 'success')
+            return redirect(url_for('main.review_success', unique_code=unique_code, ticket=ticket))
+
+        # A single conditional INSERT also covers the user already having reviewed this event
+        if not review.insert_if_absent():
+            flash('You have already submitted a review for this event.', 'warning')
+            return redirect(url_for('main.review_success', unique_code=unique_code))
+
+        review_added(review)
         db.session.commit()
 
         flash('Thank you for your review!', 'success')
@@ -210,8 +283,9 @@ def submit_review(unique_code):
                          event=event, form=form)
 
 @bp.route('/review/<string:unique_code>/success')
+@cached_page()
 def review_success(unique_code):
-    event = Event.query.filter_by(unique_code=unique_code).first_or_404()
+    event = resolve_event_or_404(unique_code)
 
     # Get some sample reviews to show
     recent_reviews = Review.query.filter_by(event_id=event.id, is_approved=True)\
@@ -221,16 +295,17 @@ def review_success(unique_code):
                          event=event, recent_reviews=recent_reviews)
 
 @bp.route('/review/<string:unique_code>/browse')
+@cached_page()
 def browse_reviews(unique_code):
-    event = Event.query.filter_by(unique_code=unique_code).first_or_404()
+    event = resolve_event_or_404(unique_code)
 
-    # Get all approved reviews
-    reviews = Review.query.filter_by(event_id=event.id, is_approved=True)\
-                    .order_by(Review.submitted_at.desc()).all()
+    # One page of approved reviews; further pages come from api.public_reviews
+    reviews, next_cursor, search_query, sort = _review_list_page(event)
 
     avg_rating = event.get_average_rating()
     rating_distribution = event.get_rating_distribution()
 
     return render_template('review/browse_reviews.html', title=f'Reviews: {event.title}',
-                         event=event, reviews=reviews, avg_rating=avg_rating,
+                         event=event, reviews=reviews, next_cursor=next_cursor, search_query=search_query, sort=sort,
+                         total_reviews=event.get_approved_count(), avg_rating=avg_rating,
                          rating_distribution=rating_distribution)
@@ -0,0 +1,180 @@
+"""Prometheus metrics: per-route latency, SQL work, connection pool and caches.
+
+Enabled with METRICS_ENABLED=True (requires prometheus_client) and served at
+/metrics in the Prometheus text format. Under gunicorn, every worker writes
+its samples to PROMETHEUS_MULTIPROC_DIR (set up by gunicorn.conf.py) and a
+scrape of any worker aggregates all of them. Set METRICS_TOKEN to require
+``Authorization: Bearer <token>`` on scrapes.
+
+Per request it records latency by endpoint, method and status, plus how many
+SQL statements the request ran and how long they took, so a route that
+saturates the database pool stands out by its share of SQL time. Pool
+checkouts are timed (waits for a free connection included), and the
+hit/miss counters of the named caches in app.cache are exported as
+cache_requests_total, from which hit ratios follow.
+"""
+import hmac
+import os
+import threading
+import time
+from flask import current_app, g, has_request_context, request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+from app import db, limiter, talisman
+from app.cache import caches
+
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233)
+SQL_TIME_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5)
+POOL_WAIT_BUCKETS = (.0005, .001, .005, .01, .05, .1, .5, 1, 5, 10, 30)
+
+_metrics = {}
+_synced = {}
+_sync_lock = threading.Lock()
+
+
+def _create_metrics():
+    from prometheus_client import Counter, Gauge, Histogram
+
+    _metrics.update(
+        request_seconds=Histogram('http_request_duration_seconds', 'Request latency, response streaming included',
+                                  ['endpoint', 'method', 'status']),
+        request_statements=Histogram('http_request_db_statements', 'SQL statements executed per request',
+                                     ['endpoint'], buckets=SQL_COUNT_BUCKETS),
+        request_sql_seconds=Histogram('http_request_db_seconds', 'Time spent in SQL statements per request',
+                                      ['endpoint'], buckets=SQL_TIME_BUCKETS),
+        statements=Counter('db_statements', 'SQL statements executed, by endpoint ("background" outside requests)',
+                           ['endpoint']),
+        pool_checkout_seconds=Histogram('db_pool_checkout_seconds',
+                                        'Time to get a pooled connection, waiting and connecting included',
+                                        buckets=POOL_WAIT_BUCKETS),
+        pool_timeouts=Counter('db_pool_timeouts', 'Pool checkouts that gave up waiting for a connection'),
+        pool_checked_out=Gauge('db_pool_checked_out', 'Connections currently checked out of the pool',
+                               multiprocess_mode='livesum'),
+        pool_overflow=Gauge('db_pool_overflow', 'Connections open beyond the pool size',
+                            multiprocess_mode='livesum'),
+        cache_requests=Counter('cache_requests', 'Cache lookups by cache and result', ['cache', 'result']),
+    )
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that observes how long each checkout takes"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeout:
+            _metrics['pool_timeouts'].inc()
+            raise
+        finally:
+            _metrics['pool_checkout_seconds'].observe(time.perf_counter() - start)
+        update_pool_gauges(self)
+        return connection
+
+
+def update_pool_gauges(pool):
+    if isinstance(pool, QueuePool):
+        _metrics['pool_checked_out'].set(pool.checkedout())
+        _metrics['pool_overflow'].set(max(pool.overflow(), 0))
+
+
+def _endpoint():
+    return request.endpoint or 'unmatched'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - getattr(context, 'metrics_start', time.perf_counter())
+    if has_request_context() and 'metrics_sql' in g:
+        g.metrics_sql[0] += 1
+        g.metrics_sql[1] += elapsed
+        _metrics['statements'].labels(_endpoint()).inc()
+    else:
+        _metrics['statements'].labels('background').inc()
+
+
+def sync_cache_counters():
+    """Add the caches' hit/miss counts since the last sync to cache_requests_total"""
+    with _sync_lock:
+        for name, cache in list(caches.items()):
+            for result, count in (('hit', cache.hits), ('miss', cache.misses)):
+                delta = count - _synced.get((name, result), 0)
+                if delta > 0:
+                    _metrics['cache_requests'].labels(name, result).inc(delta)
+                    _synced[name, result] = count
+
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_sql = [0, 0.0]
+
+
+def _record_request(response):
+    if 'metrics_start' not in g:
+        return response
+    endpoint, method, status = _endpoint(), request.method, str(response.status_code)
+    start, sql, pool = g.metrics_start, g.metrics_sql, db.engine.pool
+
+    # Recorded on close, so streamed responses (CSV export) count their whole duration and queries
+    def record():
+        _metrics['request_seconds'].labels(endpoint, method, status).observe(time.perf_counter() - start)
+        _metrics['request_statements'].labels(endpoint).observe(sql[0])
+        _metrics['request_sql_seconds'].labels(endpoint).observe(sql[1])
+        # The request's connection is back in the pool by now
+        update_pool_gauges(pool)
+        sync_cache_counters()
+
+    response.call_on_close(record)
+    return response
+
+
+# Scrapers come in over plain HTTP from inside the network, and often
+@limiter.exempt
+@talisman(force_https=False)
+def metrics_view():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Unauthorized\n', 401, mimetype='text/plain')
+
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+
+    sync_cache_counters()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    """Instrument the app when METRICS_ENABLED; call before db.init_app so the pool class applies"""
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    try:
+        import prometheus_client  # noqa: F401
+    except ImportError:
+        app.logger.warning('METRICS_ENABLED is set but prometheus_client is not installed; metrics are off')
+        return
+
+    # Metrics and engine/pool listeners are process-wide, so set them up once
+    if not _metrics:
+        _create_metrics()
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        options.setdefault('poolclass', TimedQueuePool)
+
+    app.before_request(_start_request)
+    app.after_request(_record_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -2,10 +2,105 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, date, time
-import json
-import string
-import random
+from collections import Counter
+from sqlalchemy import case, delete, func, insert, literal, select, tuple_, update
+from sqlalchemy import event as sa_event
+from sqlalchemy.exc import IntegrityError
 from app import db
+from app.utils import encode_cursor, decode_cursor, count_terms
+
+REVIEWS_PER_PAGE = 20
+
+# Review categories in bit order: a review stores the set it picked as Review.category_mask,
+# and EventStats counts each one as category_<bit + 1>. Only ever append to this list.
+REVIEW_CATEGORIES = ('Great Sound', 'Good Venue', 'Worth the Price', 'Well Organized')
+_CATEGORY_LISTS = tuple(
+    tuple(name for bit, name in enumerate(REVIEW_CATEGORIES) if mask & (1 << bit))
+    for mask in range(1 << len(REVIEW_CATEGORIES))
+)
+
+
+def categories_to_mask(categories):
+    return sum(1 << REVIEW_CATEGORIES.index(name) for name in set(categories))
+
+
+def mask_to_categories(mask):
+    return list(_CATEGORY_LISTS[mask or 0])
+
+
+# Review list orders (?sort=), each paged by (column, id) over its own index
+REVIEW_SORTS = {'newest': 'submitted_at', 'quality': 'quality_score', 'helpful': 'helpful_votes'}
+
+
+def quality_score(star_rating, review_text, categories, would_recommend):
+    score = 0
+    # Base score from rating
+    score += star_rating * 10
+    # Text length bonus
+    if review_text:
+        score += min(len(review_text) // 10, 50)
+    # Categories bonus
+    score += len(categories) * 5
+    # Recommendation bonus
+    if would_recommend:
+        score += 20
+    return min(score, 100)
+
+
+def upsert_counters(model, keys, deltas, insert_values=None, update_values=None):
+    """Atomically add ``deltas`` to the counter row of ``model`` identified by ``keys``.
+
+    The row is created on first use. ``insert_values`` are extra columns for a
+    fresh row and ``update_values`` extra assignments for an existing one.
+    """
+    insert_values = dict(insert_values or {})
+    update_values = dict(update_values or {})
+    dialect = db.engine.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(model).values(**keys, **deltas, **insert_values)
+        set_ = {name: getattr(model, name) + stmt.excluded[name] for name in deltas}
+        set_.update(update_values)
+        db.session.execute(stmt.on_conflict_do_update(index_elements=list(keys), set_=set_))
+        return
+
+    # Portable fallback: update in place, insert when the row does not exist yet
+    values = {name: getattr(model, name) + delta for name, delta in deltas.items()}
+    values.update(update_values)
+    result = db.session.execute(update(model).filter_by(**keys).values(**values))
+    if result.rowcount == 0:
+        db.session.execute(insert(model).values(**keys, **deltas, **insert_values))
+
+
+def bulk_upsert_counters(model, key_names, rows):
+    """Like upsert_counters for many rows at once (one executemany on SQLite/Postgres).
+
+    Each row is a dict of the ``key_names`` columns plus the counter deltas.
+    """
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(model)
+        counters = [name for name in rows[0] if name not in key_names]
+        set_ = {name: getattr(model, name) + stmt.excluded[name] for name in counters}
+        db.session.execute(stmt.on_conflict_do_update(index_elements=list(key_names), set_=set_), rows)
+        return
+
+    for row in rows:
+        keys = {name: row[name] for name in key_names}
+        deltas = {name: value for name, value in row.items() if name not in key_names}
+        upsert_counters(model, keys, deltas)
+
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -34,23 +129,40 @@ class User(UserMixin, db.Model):
         db.session.commit()
 
     def get_event_count(self):
-        return len(self.events)
+        return db.session.scalar(select(func.count(Event.id)).where(Event.user_id == self.id))
+
+    def get_review_summary(self):
+        """Return (total reviews, approved reviews, approved rating sum) over all events in one query"""
+        row = db.session.execute(
+            select(
+                func.coalesce(func.sum(EventStats.review_count), 0),
+                func.coalesce(func.sum(EventStats.approved_count), 0),
+                func.coalesce(func.sum(EventStats.rating_sum), 0),
+            ).join(Event, Event.id == EventStats.event_id).where(Event.user_id == self.id)
+        ).one()
+        return tuple(row)
 
     def get_total_reviews(self):
-        return sum(len(event.reviews) for event in self.events)
+        return self.get_review_summary()[0]
 
     def get_average_rating(self):
-        all_ratings = []
-        for event in self.events:
-            for review in event.reviews:
-                all_ratings.append(review.star_rating)
-        return sum(all_ratings) / len(all_ratings) if all_ratings else 0
+        _, approved_count, rating_sum = self.get_review_summary()
+        return rating_sum / approved_count if approved_count else 0
+
+    def get_events_with_stats(self):
+        return Event.query.filter_by(user_id=self.id)\
+                    .options(db.joinedload(Event.stats)).order_by(Event.id).all()
+
+    def get_recent_reviews(self, limit=5):
+        return Review.query.join(Event).filter(Event.user_id == self.id, Review.is_approved == True)\
+                     .options(db.contains_eager(Review.event))\
+                     .order_by(Review.submitted_at.desc()).limit(limit).all()
 
 class Event(db.Model):
     __tablename__ = 'events'
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
     category = db.Column(db.String(50), nullable=False)
     description = db.Column(db.Text)
@@ -66,6 +178,8 @@ class Event(db.Model):
 
     # Relationships
     reviews = db.relationship('Review', backref='event', lazy=True, cascade='all, delete-orphan')
+    stats = db.relationship('EventStats', uselist=False, lazy=True, cascade='all, delete-orphan')
+    terms = db.relationship('EventTerm', lazy=True, cascade='all, delete-orphan')
 
     def __init__(self, **kwargs):
         super(Event, self).__init__(**kwargs)
@@ -74,28 +188,35 @@ class Event(db.Model):
 
     @staticmethod
     def generate_unique_code():
-        while True:
-            code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-            if not Event.query.filter_by(unique_code=code).first():
-                return code
+        from app.codes import event_codes
+        return event_codes.allocate()[0]
 
     def get_review_count(self):
-        return len(self.reviews)
+        return self.stats.review_count if self.stats else 0
 
     def get_average_rating(self):
-        ratings = [review.star_rating for review in self.reviews if review.is_approved]
-        return sum(ratings) / len(ratings) if ratings else 0
+        return self.stats.get_average_rating() if self.stats else 0
 
     def get_rating_distribution(self):
-        distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        for review in self.reviews:
-            if review.is_approved:
-                distribution[review.star_rating] += 1
-        return distribution
+        if self.stats:
+            return self.stats.get_rating_distribution()
+        return {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+
+    def get_category_breakdown(self):
+        """Approved reviews per review category, in REVIEW_CATEGORIES order"""
+        if self.stats:
+            return self.stats.get_category_breakdown()
+        return {name: 0 for name in REVIEW_CATEGORIES}
+
+    def get_approved_count(self):
+        return self.stats.approved_count if self.stats else 0
+
+    def get_recommend_rate(self):
+        return self.stats.get_recommend_rate() if self.stats else 0
 
     def get_response_rate(self):
         if self.capacity and self.capacity > 0:
-            return (len(self.reviews) / self.capacity) * 100
+            return (self.get_review_count() / self.capacity) * 100
         return 0
 
     def get_review_url(self):
@@ -110,7 +231,7 @@ class Review(db.Model):
     reviewer_email = db.Column(db.String(100), nullable=False)
     star_rating = db.Column(db.Integer, nullable=False)
     review_text = db.Column(db.Text)
-    review_categories = db.Column(db.Text)  # JSON string
+    category_mask = db.Column(db.SmallInteger, nullable=False, default=0)  # Bits of REVIEW_CATEGORIES
     attendee_type = db.Column(db.String(50))
     would_recommend = db.Column(db.Boolean)
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -118,28 +239,406 @@ class Review(db.Model):
     user_agent = db.Column(db.Text)
     is_approved = db.Column(db.Boolean, default=True)
     is_featured = db.Column(db.Boolean, default=False)
-    helpful_votes = db.Column(db.Integer, default=0)
+    helpful_votes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # get_quality_score() as of the last write, so reviews can be ranked by it in SQL
+    quality_score = db.Column(db.SmallInteger, nullable=False, default=0)
 
-    __table_args__ = (db.UniqueConstraint('event_id', 'reviewer_email', name='_event_reviewer_email_uc'),)
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'reviewer_email', name='_event_reviewer_email_uc'),
+        # Public review lists, keyset pages and analytics: approved reviews of one event by time.
+        # On Postgres the index is partial and skips rejected reviews entirely.
+        db.Index('ix_reviews_event_approved_submitted', 'event_id', 'is_approved', 'submitted_at', 'id',
+                 postgresql_where=db.text('is_approved')),
+        # The same lists ordered best first (?sort=quality) and most helpful first (?sort=helpful)
+        db.Index('ix_reviews_event_approved_quality', 'event_id', 'is_approved', 'quality_score', 'id',
+                 postgresql_where=db.text('is_approved')),
+        db.Index('ix_reviews_event_approved_helpful', 'event_id', 'is_approved', 'helpful_votes', 'id',
+                 postgresql_where=db.text('is_approved')),
+    )
 
     def set_categories(self, categories_list):
-        self.review_categories = json.dumps(categories_list)
+        self.category_mask = categories_to_mask(categories_list)
 
     def get_categories(self):
-        if self.review_categories:
-            return json.loads(self.review_categories)
-        return []
+        return mask_to_categories(self.category_mask)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'reviewer_name': self.reviewer_name,
+            'star_rating': self.star_rating,
+            'review_text': self.review_text,
+            'categories': self.get_categories(),
+            'attendee_type': self.attendee_type,
+            'would_recommend': bool(self.would_recommend),
+            'is_featured': bool(self.is_featured),
+            'quality_score': self.quality_score,
+            'helpful_votes': self.helpful_votes or 0,
+            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None
+        }
+
+    def fill_defaults(self):
+        """Apply column defaults and the quality score now instead of at flush, for rows written with Core inserts"""
+        for column in self.__table__.columns:
+            if getattr(self, column.key) is None and column.default is not None:
+                default = column.default
+                setattr(self, column.key, default.arg(None) if default.is_callable else default.arg)
+        self.quality_score = self.get_quality_score()
+
+    def column_values(self):
+        return {column.key: getattr(self, column.key) for column in self.__table__.columns if column.key != 'id'}
+
+    def insert_if_absent(self):
+        """Insert this review unless the reviewer already reviewed the event; True if a row was created.
+
+        One INSERT ... ON CONFLICT DO NOTHING on SQLite/Postgres, so concurrent
+        duplicates cannot raise IntegrityError. The review is not added to the
+        session; column defaults are filled in so callers see the stored values.
+        """
+        return bool(Review.insert_many_if_absent([self]))
+
+    @staticmethod
+    def insert_many_if_absent(reviews):
+        """Multi-row form of insert_if_absent; returns the reviews that were created, ids set.
+
+        When several reviews share (event_id, reviewer_email) the first one wins.
+        """
+        for review in reviews:
+            review.fill_defaults()
+
+        dialect = db.engine.dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            if not reviews:
+                return []
+            stmt = dialect_insert(Review).values([review.column_values() for review in reviews])\
+                .on_conflict_do_nothing(index_elements=['event_id', 'reviewer_email'])\
+                .returning(Review.id, Review.event_id, Review.reviewer_email)
+            inserted = {(event_id, email): review_id for review_id, event_id, email in db.session.execute(stmt)}
+            created = []
+            for review in reviews:
+                review_id = inserted.pop((review.event_id, review.reviewer_email), None)
+                if review_id is not None:
+                    review.id = review_id
+                    created.append(review)
+            return created
+
+        # Portable fallback: a savepoint per review absorbs unique constraint violations
+        created = []
+        for review in reviews:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(review)
+            except IntegrityError:
+                continue
+            created.append(review)
+        return created
+
+    @staticmethod
+    def keyset_page(query, cursor=None, per_page=REVIEWS_PER_PAGE, sort='newest'):
+        """Return (reviews, next_cursor) for ``query`` in ``sort`` order (see REVIEW_SORTS), descending.
+
+        Pages are delimited by the (sort column, id) of the last row, so every
+        page is an index range scan no matter how deep the reader scrolls.
+        Cursors carry their sort, and ValueError is raised for a malformed one
+        or one issued for another sort.
+        """
+        if sort not in REVIEW_SORTS:
+            raise ValueError(f"sort must be one of: {', '.join(REVIEW_SORTS)}")
+        column = getattr(Review, REVIEW_SORTS[sort])
+        position = decode_cursor(cursor, sort, datetime if column is Review.submitted_at else int)
+        if position:
+            query = query.filter(tuple_(column, Review.id) < position)
+
+        reviews = query.order_by(column.desc(), Review.id.desc()).limit(per_page + 1).all()
+        next_cursor = None
+        if len(reviews) > per_page:
+            reviews = reviews[:per_page]
+            next_cursor = encode_cursor(sort, getattr(reviews[-1], column.key), reviews[-1].id)
+        return reviews, next_cursor
 
     def get_quality_score(self):
-        score = 0
-        # Base score from rating
-        score += self.star_rating * 10
-        # Text length bonus
-        if self.review_text:
-            score += min(len(self.review_text) // 10, 50)
-        # Categories bonus
-        score += len(self.get_categories()) * 5
-        # Recommendation bonus
-        if self.would_recommend:
-            score += 20
-        return min(score, 100)
+        return quality_score(self.star_rating, self.review_text, self.get_categories(), self.would_recommend)
+
+    EXPORT_FIELDNAMES = [
+        'Review ID', 'Reviewer Name', 'Reviewer Email', 'Star Rating',
+        'Review Text', 'Categories', 'Attendee Type', 'Would Recommend',
+        'Submitted At', 'Is Approved', 'Is Featured', 'Quality Score'
+    ]
+
+    @staticmethod
+    def iter_export_rows(event_id, chunk_size=1000):
+        """Yield CSV rows (in EXPORT_FIELDNAMES order) for an event's reviews.
+
+        Only the exported columns are selected and rows are streamed from the
+        server ``chunk_size`` at a time, so memory stays flat for any event size.
+        """
+        stmt = select(
+            Review.id, Review.reviewer_name, Review.reviewer_email, Review.star_rating,
+            Review.review_text, Review.category_mask, Review.attendee_type,
+            Review.would_recommend, Review.submitted_at, Review.is_approved, Review.is_featured,
+            Review.quality_score
+        ).where(Review.event_id == event_id).order_by(Review.id)\
+         .execution_options(yield_per=chunk_size)
+
+        for row in db.session.execute(stmt):
+            yield [
+                row.id,
+                row.reviewer_name,
+                row.reviewer_email,
+                row.star_rating,
+                row.review_text or '',
+                ', '.join(mask_to_categories(row.category_mask)),
+                row.attendee_type or '',
+                'Yes' if row.would_recommend else 'No',
+                row.submitted_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'Yes' if row.is_approved else 'No',
+                'Yes' if row.is_featured else 'No',
+                row.quality_score
+            ]
+
+
+@sa_event.listens_for(Review, 'before_insert')
+@sa_event.listens_for(Review, 'before_update')
+def _store_quality_score(mapper, connection, review):
+    review.quality_score = review.get_quality_score()
+
+
+class EventStats(db.Model):
+    """Per-event review aggregates, maintained alongside every review write"""
+    __tablename__ = 'event_stats'
+
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    approved_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_1 = db.Column(db.Integer, nullable=False, default=0)
+    rating_2 = db.Column(db.Integer, nullable=False, default=0)
+    rating_3 = db.Column(db.Integer, nullable=False, default=0)
+    rating_4 = db.Column(db.Integer, nullable=False, default=0)
+    rating_5 = db.Column(db.Integer, nullable=False, default=0)
+    recommend_count = db.Column(db.Integer, nullable=False, default=0)
+    # Approved reviews per category, category_<n> counting REVIEW_CATEGORIES[n - 1]
+    category_1 = db.Column(db.Integer, nullable=False, default=0)
+    category_2 = db.Column(db.Integer, nullable=False, default=0)
+    category_3 = db.Column(db.Integer, nullable=False, default=0)
+    category_4 = db.Column(db.Integer, nullable=False, default=0)
+    last_review_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def get_average_rating(self):
+        return self.rating_sum / self.approved_count if self.approved_count else 0
+
+    def get_rating_distribution(self):
+        return {rating: getattr(self, f'rating_{rating}') or 0 for rating in range(1, 6)}
+
+    def get_recommend_rate(self):
+        return (self.recommend_count / self.approved_count) * 100 if self.approved_count else 0
+
+    def get_category_breakdown(self):
+        return {name: getattr(self, f'category_{bit + 1}') or 0 for bit, name in enumerate(REVIEW_CATEGORIES)}
+
+    @classmethod
+    def apply_review(cls, review, sign=1, total=True, approved=None):
+        """Add (sign=1) or remove (sign=-1) a review's contribution to its event's aggregates.
+
+        ``total`` covers the overall review count; the approved-only counters are
+        touched when ``approved`` (defaulting to ``review.is_approved``) is true.
+        """
+        if approved is None:
+            approved = review.is_approved
+        deltas = cls._review_deltas(review, sign, total, approved)
+        if deltas:
+            cls._upsert(review.event_id, deltas, total, review.submitted_at if sign > 0 else None)
+
+    @classmethod
+    def apply_reviews(cls, reviews, sign=1, total=True, approved=None):
+        """Batched apply_review: one upsert per event instead of one per review.
+
+        ``reviews`` may be rows with the counted columns rather than Review instances.
+        """
+        by_event = {}
+        for review in reviews:
+            deltas, latest = by_event.get(review.event_id, (Counter(), review.submitted_at))
+            deltas.update(cls._review_deltas(review, sign, total,
+                                             review.is_approved if approved is None else approved))
+            by_event[review.event_id] = (deltas, max(latest, review.submitted_at))
+        for event_id, (deltas, latest) in by_event.items():
+            cls._upsert(event_id, dict(deltas), total, latest if sign > 0 else None)
+
+    @staticmethod
+    def _review_deltas(review, sign, total, approved):
+        deltas = {}
+        if total:
+            deltas['review_count'] = sign
+        if approved:
+            deltas['approved_count'] = sign
+            deltas['rating_sum'] = sign * review.star_rating
+            deltas[f'rating_{review.star_rating}'] = sign
+            deltas['recommend_count'] = sign if review.would_recommend else 0
+            for bit in range(len(REVIEW_CATEGORIES)):
+                if (review.category_mask or 0) & (1 << bit):
+                    deltas[f'category_{bit + 1}'] = sign
+        return deltas
+
+    @classmethod
+    def _upsert(cls, event_id, deltas, total, added_at):
+        """``added_at`` is the newest submitted_at being added, or None when removing"""
+        now = datetime.utcnow()
+        insert_values = {'updated_at': now}
+        update_values = {'updated_at': now}
+        if total and added_at is not None:
+            insert_values['last_review_at'] = added_at
+            update_values['last_review_at'] = case(
+                (cls.last_review_at > added_at, cls.last_review_at),
+                else_=added_at
+            )
+        elif total:
+            update_values['last_review_at'] = select(func.max(Review.submitted_at))\
+                .where(Review.event_id == event_id).scalar_subquery()
+
+        upsert_counters(cls, {'event_id': event_id}, deltas,
+                        insert_values=insert_values, update_values=update_values)
+
+    @classmethod
+    def touch(cls, event_ids):
+        """Bump ``updated_at`` for changes that alter public pages but no counters"""
+        db.session.execute(update(cls).where(cls.event_id.in_(list(event_ids)))
+                           .values(updated_at=datetime.utcnow()))
+
+    @classmethod
+    def rebuild(cls, event_ids=None):
+        """Recompute aggregates from the reviews table, for all events or just ``event_ids``"""
+        approved = Review.is_approved == True  # noqa: E712
+
+        def approved_sum(value):
+            return func.coalesce(func.sum(case((approved, value), else_=0)), 0)
+
+        query = select(
+            Event.id,
+            func.count(Review.id),
+            approved_sum(1),
+            approved_sum(Review.star_rating),
+            *[approved_sum(case((Review.star_rating == rating, 1), else_=0)) for rating in range(1, 6)],
+            approved_sum(case((Review.would_recommend == True, 1), else_=0)),  # noqa: E712
+            *[approved_sum(case((Review.category_mask.op('&')(1 << bit) != 0, 1), else_=0))
+              for bit in range(len(REVIEW_CATEGORIES))],
+            func.max(Review.submitted_at),
+            # A bound value keeps microseconds, which caches keyed on updated_at rely on
+            literal(datetime.utcnow(), db.DateTime),
+        ).select_from(Event).outerjoin(Review, Review.event_id == Event.id).group_by(Event.id)
+
+        clear = delete(cls)
+        if event_ids is not None:
+            event_ids = list(event_ids)
+            query = query.where(Event.id.in_(event_ids))
+            clear = clear.where(cls.event_id.in_(event_ids))
+
+        columns = ['event_id', 'review_count', 'approved_count', 'rating_sum',
+                   'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+                   'recommend_count', *[f'category_{bit + 1}' for bit in range(len(REVIEW_CATEGORIES))],
+                   'last_review_at', 'updated_at']
+        db.session.execute(clear)
+        result = db.session.execute(insert(cls).from_select(columns, query))
+        return result.rowcount
+
+
+class EventTerm(db.Model):
+    """Per-event keyword counts over approved review text"""
+    __tablename__ = 'event_terms'
+
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), primary_key=True)
+    term = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.Index('ix_event_terms_event_count', 'event_id', 'count'),)
+
+    @classmethod
+    def apply_review(cls, review, sign=1):
+        """Add (sign=1) or remove (sign=-1) a review's terms from its event's counts"""
+        terms = count_terms(review.review_text)
+        if not terms:
+            return
+
+        bulk_upsert_counters(cls, ('event_id', 'term'), [
+            {'event_id': review.event_id, 'term': term, 'count': sign * count}
+            for term, count in terms.items()
+        ])
+        if sign < 0:
+            db.session.execute(delete(cls).where(
+                cls.event_id == review.event_id, cls.term.in_(list(terms)), cls.count <= 0
+            ))
+
+    @classmethod
+    def apply_reviews(cls, reviews, sign=1):
+        """Add (or remove) the terms of a batch of approved reviews in one bulk upsert"""
+        totals = Counter()
+        for review in reviews:
+            for term, count in count_terms(review.review_text).items():
+                totals[(review.event_id, term)] += count
+        bulk_upsert_counters(cls, ('event_id', 'term'), [
+            {'event_id': event_id, 'term': term, 'count': sign * count}
+            for (event_id, term), count in totals.items()
+        ])
+        if sign < 0 and totals:
+            db.session.execute(delete(cls).where(
+                cls.event_id.in_({event_id for event_id, _ in totals}),
+                cls.term.in_({term for _, term in totals}), cls.count <= 0
+            ))
+
+    @classmethod
+    def top_terms(cls, limit=20, event_id=None, user_id=None):
+        """Return [(term, count)] for one event, or summed over all of an organizer's events"""
+        if event_id is not None:
+            query = select(cls.term, cls.count).where(cls.event_id == event_id)\
+                        .order_by(cls.count.desc(), cls.term).limit(limit)
+        else:
+            total = func.sum(cls.count).label('total')
+            query = select(cls.term, total).join(Event, Event.id == cls.event_id)\
+                        .where(Event.user_id == user_id).group_by(cls.term)\
+                        .order_by(total.desc(), cls.term).limit(limit)
+        return [(term, count) for term, count in db.session.execute(query)]
+
+    @classmethod
+    def rebuild(cls, event_ids=None, chunk_size=1000):
+        """Recount terms from approved review text, for all events or just ``event_ids``"""
+        clear = delete(cls)
+        query = select(Review.event_id, Review.review_text)\
+                    .where(Review.is_approved == True, Review.review_text.isnot(None))\
+                    .order_by(Review.event_id).execution_options(yield_per=chunk_size)
+        if event_ids is not None:
+            event_ids = list(event_ids)
+            clear = clear.where(cls.event_id.in_(event_ids))
+            query = query.where(Review.event_id.in_(event_ids))
+        db.session.execute(clear)
+
+        # Rows arrive grouped by event, so only one event's counts are held at a time
+        rebuilt = 0
+        current_event, terms = None, Counter()
+        for event_id, text in db.session.execute(query):
+            if event_id != current_event:
+                rebuilt += cls._insert_counts(current_event, terms)
+                current_event, terms = event_id, Counter()
+            terms.update(count_terms(text))
+        rebuilt += cls._insert_counts(current_event, terms)
+        return rebuilt
+
+    @classmethod
+    def _insert_counts(cls, event_id, terms):
+        if event_id is None or not terms:
+            return 0
+        db.session.execute(insert(cls), [
+            {'event_id': event_id, 'term': term, 'count': count} for term, count in terms.items()
+        ])
+        return 1
+
+
+class CodeCounter(db.Model):
+    """Named counters that code allocators reserve blocks from (see app.codes)"""
+    __tablename__ = 'code_counters'
+
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False, default=0)
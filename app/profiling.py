@@ -0,0 +1,263 @@
+"""On-demand profiling of live requests.
+
+A fraction of requests (PROFILING_SAMPLE_RATE, e.g. 0.001) is profiled, plus
+any request sending ``X-Profile-Token: <PROFILING_TOKEN>``. With both unset
+no hooks are installed, so a disabled profiler costs nothing; when enabled,
+an unprofiled request pays for one random() call.
+
+PROFILING_MODE=sample (the default) runs a thread that records the request
+thread's stack every PROFILING_INTERVAL seconds and writes collapsed stacks
+(``.folded``, one ``frame;frame;frame count`` line per stack, ready for
+flamegraph.pl or speedscope). The profiled request itself runs untouched, which
+is what makes it safe to leave on in production. PROFILING_MODE=cprofile writes
+``.pstats`` files instead: exact call counts, at the cost of slowing the
+profiled request down two- to three-fold.
+
+Files go to PROFILING_DIR, named after the time, endpoint and duration of the
+request, and only the newest PROFILING_MAX_FILES are kept. At most one request
+per process is profiled at a time. /admin/profiles summarizes them per route
+for the user ids in PROFILING_ADMIN_IDS (or callers sending the token).
+"""
+import cProfile
+import hmac
+import os
+import pstats
+import random
+import re
+import statistics
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from flask import abort, current_app, g, render_template, request, send_from_directory
+from flask_login import current_user
+
+TOKEN_HEADER = 'X-Profile-Token'
+PROFILE_FILE = re.compile(r'^(\d+)_([\w.]+)_(\d+)ms\.(folded|pstats)$')
+TOP_FUNCTIONS = 40
+# Profiling the profile pages would only rotate real profiles out
+UNPROFILED_ENDPOINTS = frozenset({'profiles', 'profile_file', 'static'})
+
+# Prefixes stripped from file names in stack labels: the project, then installed packages and the stdlib
+_SHORTEN = [os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep]
+_SHORTEN += sorted((p + os.sep for p in sys.path if p and 'packages' in p), key=len, reverse=True)
+_SHORTEN.append(sysconfig.get_paths()['stdlib'] + os.sep)
+
+# Held while a request is being profiled; requests that find it taken are not profiled
+_busy = threading.Lock()
+
+
+def _frame_label(code):
+    filename = code.co_filename
+    for prefix in _SHORTEN:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    # Labels use the function's first line, so samples anywhere in it add up
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+
+class StackSampler(threading.Thread):
+    """Daemon thread that counts the collapsed stacks of one thread until stopped"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._labels = {}
+
+    def run(self):
+        labels = self._labels
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            # Skip the sample that catches the request thread waiting in stop()
+            if stack and not self._stopped.is_set():
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+def profile_dir(app=None):
+    app = app or current_app
+    return app.config.get('PROFILING_DIR') or os.path.join(
+        os.environ.get('FILE_STORAGE_PATH') or app.instance_path, 'profiles')
+
+
+def _should_profile():
+    if request.endpoint in UNPROFILED_ENDPOINTS:
+        return False
+    token = current_app.config.get('PROFILING_TOKEN')
+    if token and hmac.compare_digest(request.headers.get(TOKEN_HEADER, ''), token):
+        return True
+    return random.random() < current_app.config['PROFILING_SAMPLE_RATE']
+
+
+def _start_profile():
+    if not _should_profile() or not _busy.acquire(blocking=False):
+        return
+    if current_app.config['PROFILING_MODE'] == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = StackSampler(threading.get_ident(), current_app.config['PROFILING_INTERVAL'])
+        profiler.start()
+    g.profiler = (profiler, time.perf_counter())
+
+
+# A teardown hook, so streamed responses are profiled to their end and failed requests too
+def _finish_profile(exc):
+    if 'profiler' not in g:
+        return
+    profiler, start = g.pop('profiler')
+    try:
+        elapsed_ms = round((time.perf_counter() - start) * 1000)
+        if isinstance(profiler, StackSampler):
+            profiler.stop()
+        else:
+            profiler.disable()
+        _save(profiler, elapsed_ms)
+    except Exception:
+        current_app.logger.exception('Could not save request profile')
+    finally:
+        _busy.release()
+
+
+def _save(profiler, elapsed_ms):
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    extension = 'folded' if isinstance(profiler, StackSampler) else 'pstats'
+    name = f'{round(time.time() * 1000)}_{request.endpoint or "unmatched"}_{elapsed_ms}ms.{extension}'
+    path = os.path.join(directory, name)
+    if isinstance(profiler, StackSampler):
+        profiler.write(path)
+    else:
+        profiler.dump_stats(path)
+    rotate(directory, current_app.config['PROFILING_MAX_FILES'])
+
+
+def rotate(directory, max_files):
+    """Delete all but the newest ``max_files`` profiles"""
+    names = sorted(name for name in os.listdir(directory) if PROFILE_FILE.match(name))
+    for name in names[:max(len(names) - max_files, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass  # Another worker rotated it first
+
+
+def list_profiles(directory):
+    """Profiles on disk, newest first"""
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        match = PROFILE_FILE.match(name)
+        if match:
+            profiles.append({
+                'name': name,
+                'time': datetime.fromtimestamp(int(match.group(1)) / 1000),
+                'endpoint': match.group(2),
+                'duration_ms': int(match.group(3)),
+                'kind': match.group(4),
+            })
+    return sorted(profiles, key=lambda profile: profile['name'], reverse=True)
+
+
+def summarize_routes(profiles):
+    routes = defaultdict(list)
+    for profile in profiles:
+        routes[profile['endpoint']].append(profile)
+    summary = [{
+        'endpoint': endpoint,
+        'count': len(items),
+        'median_ms': round(statistics.median(p['duration_ms'] for p in items)),
+        'max_ms': max(p['duration_ms'] for p in items),
+        'latest': items[0]['time'],
+    } for endpoint, items in routes.items()]
+    return sorted(summary, key=lambda route: route['count'] * route['median_ms'], reverse=True)
+
+
+def top_sampled_functions(paths, limit=TOP_FUNCTIONS):
+    """(function, self samples, total samples) across .folded files, by self samples"""
+    own, total = Counter(), Counter()
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                frames = stack.split(';')
+                own[frames[-1]] += int(count)
+                for frame in set(frames):
+                    total[frame] += int(count)
+    return [(frame, count, total[frame]) for frame, count in own.most_common(limit)]
+
+
+def top_profiled_functions(paths, limit=TOP_FUNCTIONS):
+    """(function, calls, own seconds, cumulative seconds) across .pstats files, by own time"""
+    if not paths:
+        return []
+    stats = pstats.Stats(*paths).stats
+    rows = [(pstats.func_std_string(func), calls, own, cumulative)
+            for func, (_, calls, own, cumulative, _) in stats.items()]
+    return sorted(rows, key=lambda row: row[2], reverse=True)[:limit]
+
+
+def _require_admin():
+    token = current_app.config.get('PROFILING_TOKEN')
+    if token and hmac.compare_digest(request.headers.get(TOKEN_HEADER, ''), token):
+        return
+    if current_user.is_authenticated and current_user.id in current_app.config['PROFILING_ADMIN_IDS']:
+        return
+    # Not advertised to anyone else
+    abort(404)
+
+
+def profiles_view():
+    _require_admin()
+    directory = profile_dir()
+    profiles = list_profiles(directory)
+    route = request.args.get('route')
+    if not route:
+        return render_template('admin/profiles.html', title='Request Profiles',
+                               routes=summarize_routes(profiles), route=None)
+    selected = [p for p in profiles if p['endpoint'] == route]
+    paths = {kind: [os.path.join(directory, p['name']) for p in selected if p['kind'] == kind]
+             for kind in ('folded', 'pstats')}
+    return render_template('admin/profiles.html', title=f'Profiles of {route}', route=route,
+                           profiles=selected,
+                           sampled=top_sampled_functions(paths['folded']),
+                           profiled=top_profiled_functions(paths['pstats']))
+
+
+def profile_file_view(filename):
+    _require_admin()
+    if not PROFILE_FILE.match(filename):
+        abort(404)
+    return send_from_directory(profile_dir(), filename, as_attachment=True)
+
+
+def init_app(app):
+    if not app.config.get('PROFILING_SAMPLE_RATE') and not app.config.get('PROFILING_TOKEN'):
+        return
+    app.before_request(_start_profile)
+    app.teardown_request(_finish_profile)
+    app.add_url_rule('/admin/profiles', 'profiles', profiles_view)
+    app.add_url_rule('/admin/profiles/<filename>', 'profile_file', profile_file_view)
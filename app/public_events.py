@@ -0,0 +1,116 @@
+"""Cached unique_code -> event resolver for the public review routes.
+
+Every attendee request starts by resolving the event behind a QR code. The
+handful of columns those pages need is cached in an in-process LRU and, when
+CACHE_REDIS_URL is set, in Redis shared by all workers. edit_event and event
+deletion invalidate both; other workers' in-process copies expire after
+LOCAL_TTL seconds.
+"""
+from datetime import date, datetime, time
+from flask import abort, current_app
+from sqlalchemy import event as sa_event
+from app import db
+from app.cache import LRUCache, RedisCache
+from app.models import Event, EventStats
+
+LOCAL_TTL = 60
+SHARED_TTL = 3600
+
+PUBLIC_FIELDS = {
+    'id': None,
+    'user_id': None,
+    'title': None,
+    'category': None,
+    'description': None,
+    'venue': None,
+    'event_date': date,
+    'event_time': time,
+    'capacity': None,
+    'status': None,
+    'unique_code': None,
+    'allow_reviews': None,
+    'updated_at': datetime,
+}
+
+_local = LRUCache(maxsize=4096, ttl=LOCAL_TTL, name='event_codes')
+_shared = {}
+
+
+class PublicEvent:
+    """Read-only stand-in for Event built from the cached columns"""
+
+    def __init__(self, data):
+        for name, kind in PUBLIC_FIELDS.items():
+            value = data.get(name)
+            if kind is not None and isinstance(value, str):
+                value = kind.fromisoformat(value)
+            setattr(self, name, value)
+        self._stats = None
+
+    @property
+    def stats(self):
+        # Aggregates change with every review, so they are never cached here
+        if self._stats is None:
+            self._stats = db.session.get(EventStats, self.id) or False
+        return self._stats or None
+
+    get_review_count = Event.get_review_count
+    get_average_rating = Event.get_average_rating
+    get_rating_distribution = Event.get_rating_distribution
+    get_approved_count = Event.get_approved_count
+    get_recommend_rate = Event.get_recommend_rate
+    get_response_rate = Event.get_response_rate
+    get_review_url = Event.get_review_url
+
+
+def _snapshot(event):
+    data = {}
+    for name in PUBLIC_FIELDS:
+        value = getattr(event, name)
+        data[name] = value.isoformat() if isinstance(value, (date, time)) else value
+    return data
+
+
+def _shared_cache():
+    url = current_app.config.get('CACHE_REDIS_URL')
+    if not url:
+        return None
+    if url not in _shared:
+        _shared[url] = RedisCache(url, prefix='event-code:', ttl=SHARED_TTL, name='event_codes_shared')
+    return _shared[url]
+
+
+def resolve_event(unique_code):
+    """The event for ``unique_code`` as a PublicEvent, or None"""
+    data = _local.get(unique_code)
+    if data is None:
+        shared = _shared_cache()
+        data = shared.get(unique_code) if shared else None
+        if data is None:
+            event = Event.query.filter_by(unique_code=unique_code).first()
+            if event is None:
+                return None
+            data = _snapshot(event)
+            if shared:
+                shared.set(unique_code, data)
+        _local.set(unique_code, data)
+    return PublicEvent(data)
+
+
+def resolve_event_or_404(unique_code):
+    event = resolve_event(unique_code)
+    if event is None:
+        abort(404)
+    return event
+
+
+def invalidate(unique_code):
+    _local.delete(unique_code)
+    shared = _shared_cache()
+    if shared:
+        shared.delete(unique_code)
+
+
+@sa_event.listens_for(Event, 'after_delete')
+def _event_deleted(mapper, connection, target):
+    invalidate(target.unique_code)
@@ -0,0 +1,131 @@
+"""Per-request SQL query budgets that catch N+1 patterns.
+
+Every request counts its SQL statements. A request breaks its budget when it
+runs more than ``max_queries`` statements, or the same statement more than
+``max_repeats`` times, which is what a lazy load or per-row helper called
+inside a template loop looks like. Routes set their own limits with
+@query_budget; the rest use QUERY_BUDGET_MAX_QUERIES and
+QUERY_BUDGET_MAX_REPEATS.
+
+QUERY_BUDGET picks the reaction: ``warn`` (the default) logs a report,
+``raise`` raises QueryBudgetExceeded (always the case when app.testing), and
+``off`` disables counting. Reports name the repeated statement and where it
+was issued from, down to the template line for statements run while
+rendering.
+"""
+import os
+import re
+import sys
+from collections import Counter
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)|\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+_SELECT_LIST = re.compile(r'^SELECT (.{60,}?) FROM ')
+
+_listening = False
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries=None, max_repeats=None):
+    """Set the query budget of a view"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if 'query_budget' in g:
+                budget = g.query_budget
+                budget['max_queries'] = max_queries if max_queries is not None else budget['max_queries']
+                budget['max_repeats'] = max_repeats if max_repeats is not None else budget['max_repeats']
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def statement_shape(statement):
+    """Statement text for reports: whitespace normalized, IN lists and long column lists collapsed"""
+    shape = _WHITESPACE.sub(' ', _IN_LIST.sub('(?)', statement)).strip()
+    return _SELECT_LIST.sub('SELECT … FROM ', shape)
+
+
+def issued_from():
+    """Template line and app code that issued the current statement"""
+    template, code = None, None
+    frame = sys._getframe(1)
+    while frame is not None and (template is None or code is None):
+        if template is None and '__jinja_template__' in frame.f_globals:
+            source = frame.f_globals['__jinja_template__']
+            template = f'{source.name or "<string>"}:{source.get_corresponding_lineno(frame.f_lineno)}'
+        filename = frame.f_code.co_filename
+        if code is None and filename.startswith(APP_ROOT) and filename != __file__:
+            code = f'{os.path.relpath(filename, os.path.dirname(APP_ROOT))}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return template, code
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or 'query_budget' not in g:
+        return
+    budget = g.query_budget
+    budget['count'] += 1
+    repeats = budget['statements']
+    repeats[statement] += 1
+    # Only the first repetition over the limit pays for a stack walk
+    if repeats[statement] == budget['max_repeats'] + 1 and statement not in budget['locations']:
+        budget['locations'][statement] = issued_from()
+
+
+def _start_request():
+    g.query_budget = {
+        'max_queries': current_app.config['QUERY_BUDGET_MAX_QUERIES'],
+        'max_repeats': current_app.config['QUERY_BUDGET_MAX_REPEATS'],
+        'count': 0,
+        'statements': Counter(),
+        'locations': {},
+    }
+
+
+def report(budget):
+    """Human-readable description of a broken budget, or None"""
+    problems = []
+    if budget['count'] > budget['max_queries']:
+        problems.append(f"{budget['count']} queries (budget {budget['max_queries']})")
+    for statement, count in budget['statements'].most_common():
+        if count <= budget['max_repeats']:
+            break
+        template, code = budget['locations'].get(statement, (None, None))
+        where = ', '.join(part for part in (template and f'template {template}', code) if part)
+        problems.append(f'statement repeated {count} times (limit {budget["max_repeats"]})'
+                        f'{f" from {where}" if where else ""}: {statement_shape(statement)[:500]}')
+    if not problems:
+        return None
+    return f'Query budget exceeded in {request.endpoint} ({request.method} {request.path}): ' + '; '.join(problems)
+
+
+def _check_budget(response):
+    budget = g.pop('query_budget', None)
+    if budget is None:
+        return response
+    message = report(budget)
+    if message:
+        if current_app.config['QUERY_BUDGET'] == 'raise' or current_app.testing:
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+    return response
+
+
+def init_app(app):
+    global _listening
+    if app.config.get('QUERY_BUDGET') == 'off':
+        return
+    if not _listening:
+        event.listen(Engine, 'before_cursor_execute', _count_statement)
+        _listening = True
+    app.before_request(_start_request)
+    app.after_request(_check_budget)
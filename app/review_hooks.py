@@ -0,0 +1,95 @@
+"""Bookkeeping that runs in the same transaction as every review write.
+
+Routes call these after changing a review and before committing, so derived
+per-event data never drifts from the reviews table. The batched forms take rows
+carrying the counted columns (see ``REVIEW_DELTA_COLUMNS``) and apply deltas, so
+set-based writes never recount a whole event; the rebuild methods on the models
+are for repair commands only.
+"""
+from app import db, email_filter
+from app.models import EventStats, EventTerm, Review
+from app.http_cache import invalidate_event
+
+# What the batched hooks read from each affected row
+REVIEW_DELTA_COLUMNS = (Review.event_id, Review.is_approved, Review.star_rating, Review.would_recommend,
+                        Review.category_mask, Review.review_text, Review.submitted_at)
+
+
+def review_added(review):
+    # Flush first so column defaults (is_approved, submitted_at) are populated
+    db.session.flush()
+    EventStats.apply_review(review)
+    if review.is_approved:
+        EventTerm.apply_review(review)
+    email_filter.reviews_added([review])
+    invalidate_event(review.event_id)
+
+
+def reviews_added(reviews):
+    # Batched form of review_added for multi-row inserts (see app.ingest)
+    EventStats.apply_reviews(reviews)
+    EventTerm.apply_reviews([review for review in reviews if review.is_approved])
+    email_filter.reviews_added(reviews)
+    for event_id in {review.event_id for review in reviews}:
+        invalidate_event(event_id)
+
+
+def review_removed(review):
+    EventStats.apply_review(review, sign=-1)
+    if review.is_approved:
+        EventTerm.apply_review(review, sign=-1)
+    email_filter.reviews_removed([review.event_id])
+    invalidate_event(review.event_id)
+
+
+def review_approved(review):
+    EventStats.apply_review(review, total=False, approved=True)
+    EventTerm.apply_review(review)
+    invalidate_event(review.event_id)
+
+
+def review_unapproved(review):
+    EventStats.apply_review(review, sign=-1, total=False, approved=True)
+    EventTerm.apply_review(review, sign=-1)
+    invalidate_event(review.event_id)
+
+
+def review_featured(review):
+    # No counters change, but public pages show featured reviews differently
+    EventStats.touch([review.event_id])
+    invalidate_event(review.event_id)
+
+
+def reviews_removed(reviews):
+    # Batched form of review_removed for set-based deletes; run it after the DELETE so
+    # last_review_at is recomputed from the reviews that remain
+    EventStats.apply_reviews(reviews, sign=-1)
+    EventTerm.apply_reviews([review for review in reviews if review.is_approved], sign=-1)
+    event_ids = sorted({review.event_id for review in reviews})
+    email_filter.reviews_removed(event_ids)
+    for event_id in event_ids:
+        invalidate_event(event_id)
+
+
+def reviews_approved(reviews):
+    EventStats.apply_reviews(reviews, total=False, approved=True)
+    EventTerm.apply_reviews(reviews)
+    for event_id in {review.event_id for review in reviews}:
+        invalidate_event(event_id)
+
+
+def reviews_unapproved(reviews):
+    EventStats.apply_reviews(reviews, sign=-1, total=False, approved=True)
+    EventTerm.apply_reviews(reviews, sign=-1)
+    for event_id in {review.event_id for review in reviews}:
+        invalidate_event(event_id)
+
+
+def reviews_changed(event_ids):
+    # Set-based writes that change no counters (featuring, helpful votes) still alter pages
+    event_ids = sorted(set(event_ids))
+    if not event_ids:
+        return
+    EventStats.touch(event_ids)
+    for event_id in event_ids:
+        invalidate_event(event_id)
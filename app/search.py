@@ -0,0 +1,170 @@
+"""Full-text search over review text.
+
+SQLite uses an FTS5 external-content table kept in sync with ``reviews`` by
+triggers; Postgres uses a stored, generated tsvector column with a GIN index.
+The backend follows the dialect of the configured DATABASE_URL. Both are set
+up by the migrations and, for databases built with ``db.create_all()``, by the
+``after_create`` hooks below.
+"""
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, event, text
+from app import db
+from app.models import Review, REVIEWS_PER_PAGE
+from app.utils import decode_cursor, encode_cursor
+
+# Highlight markers for snippets; swapped for <mark> after the text is escaped
+MARK_START = '⦃'
+MARK_END = '⦄'
+
+# event_id is indexed too, so a search ANDs the event's own token into the MATCH and
+# only that event's rows are ranked; the trigger sources match the reviews columns
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5("
+    "review_text, reviewer_name, event_id, content='reviews', content_rowid='id', "
+    "tokenize='porter unicode61', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS reviews_fts_ai AFTER INSERT ON reviews BEGIN "
+    "INSERT INTO reviews_fts(rowid, review_text, reviewer_name, event_id) "
+    "VALUES (new.id, new.review_text, new.reviewer_name, new.event_id); END",
+    "CREATE TRIGGER IF NOT EXISTS reviews_fts_ad AFTER DELETE ON reviews BEGIN "
+    "INSERT INTO reviews_fts(reviews_fts, rowid, review_text, reviewer_name, event_id) "
+    "VALUES ('delete', old.id, old.review_text, old.reviewer_name, old.event_id); END",
+    "CREATE TRIGGER IF NOT EXISTS reviews_fts_au AFTER UPDATE OF review_text, reviewer_name, event_id ON reviews "
+    "BEGIN "
+    "INSERT INTO reviews_fts(reviews_fts, rowid, review_text, reviewer_name, event_id) "
+    "VALUES ('delete', old.id, old.review_text, old.reviewer_name, old.event_id); "
+    "INSERT INTO reviews_fts(rowid, review_text, reviewer_name, event_id) "
+    "VALUES (new.id, new.review_text, new.reviewer_name, new.event_id); END",
+]
+
+POSTGRES_DDL = [
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(review_text, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(reviewer_name, '')), 'B')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_reviews_search_vector ON reviews USING GIN (search_vector)",
+]
+
+# Objects the DDL above creates outside the models; autogenerate must not drop them
+SEARCH_TABLE_PREFIX = 'reviews_fts'
+SEARCH_SCHEMA_NAMES = {('column', 'search_vector'), ('index', 'ix_reviews_search_vector')}
+
+
+def is_search_schema(name, type_):
+    """Whether a reflected table, column or index belongs to the full-text index"""
+    if type_ == 'table':
+        return name.startswith(SEARCH_TABLE_PREFIX)
+    return (type_, name) in SEARCH_SCHEMA_NAMES
+
+
+# The event_id column only scopes the match, so it carries no weight in the ranking
+SQLITE_RANK = 'bm25(reviews_fts, 1.0, 1.0, 0.0)'
+
+SQLITE_SEARCH = f"""
+    SELECT r.id, {SQLITE_RANK} AS rank, snippet(reviews_fts, 0, :mark_start, :mark_end, '…', 24) AS snippet
+    FROM reviews_fts JOIN reviews r ON r.id = reviews_fts.rowid
+    WHERE reviews_fts MATCH :match AND r.is_approved {{after}}
+    ORDER BY rank, r.id DESC
+    LIMIT :limit
+"""
+
+# bm25 is lower for better matches, so the next page starts above the last rank
+SQLITE_AFTER = f"AND ({SQLITE_RANK} > :after_rank OR ({SQLITE_RANK} = :after_rank AND r.id < :after_id))"
+
+# Rank and page in the inner query so ts_headline only runs on the returned rows
+POSTGRES_SEARCH = """
+    SELECT ranked.id, ranked.rank,
+           ts_headline('english', coalesce(r.review_text, ''), ranked.query, :headline_options) AS snippet
+    FROM (
+        SELECT r.id, ts_rank(r.search_vector, q) AS rank, q AS query
+        FROM reviews r, to_tsquery('english', :match) q
+        WHERE r.search_vector @@ q AND r.event_id = :event_id AND r.is_approved {after}
+        ORDER BY rank DESC, r.id DESC
+        LIMIT :limit
+    ) ranked
+    JOIN reviews r ON r.id = ranked.id
+    ORDER BY ranked.rank DESC, ranked.id DESC
+"""
+
+# ts_rank is a real; the cursor's rank is cast back so the last row compares equal to itself
+POSTGRES_AFTER = ("AND (ts_rank(r.search_vector, q) < CAST(:after_rank AS real) "
+                  "OR (ts_rank(r.search_vector, q) = CAST(:after_rank AS real) AND r.id < :after_id))")
+
+for statement in SQLITE_DDL:
+    event.listen(Review.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_DDL:
+    event.listen(Review.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+
+def reindex():
+    """Create the search structures if missing and rebuild the SQLite index from the reviews table"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            db.session.execute(text(statement))
+        db.session.execute(text("INSERT INTO reviews_fts(reviews_fts) VALUES ('rebuild')"))
+    elif dialect == 'postgresql':
+        # The generated column is maintained by Postgres itself
+        for statement in POSTGRES_DDL:
+            db.session.execute(text(statement))
+    return dialect
+
+
+def search_terms(query):
+    return re.findall(r'\w+', (query or '').lower())[:10]
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_reviews(event_id, query, cursor=None, per_page=REVIEWS_PER_PAGE):
+    """Search an event's approved reviews, best match first.
+
+    Returns (reviews, snippets by review id, next_cursor). Pages are keyset
+    pages by (rank, id) like the other review lists, and ValueError is
+    raised for a cursor that a search did not issue.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], {}, None
+
+    dialect = db.engine.dialect.name
+    if dialect not in ('sqlite', 'postgresql'):
+        # No native full-text index on this backend; fall back to a substring scan, newest first
+        matches = Review.query.filter_by(event_id=event_id, is_approved=True)
+        for term in terms:
+            matches = matches.filter(Review.review_text.ilike(f'%{_escape_like(term)}%', escape='\\'))
+        reviews, next_cursor = Review.keyset_page(matches, cursor, per_page=per_page)
+        return reviews, {}, next_cursor
+
+    position = decode_cursor(cursor, 'relevance', float)
+    params = {'event_id': event_id, 'limit': per_page + 1}
+    if position:
+        params['after_rank'], params['after_id'] = position
+    if dialect == 'sqlite':
+        # Only this event's token, then every term quoted (AND semantics) with the last one
+        # prefix-matched for search-as-you-type
+        phrases = ' '.join(f'"{term}"' for term in terms) + '*'
+        params['match'] = f'event_id:"{event_id}" AND {{review_text reviewer_name}}: ({phrases})'
+        params.update(mark_start=MARK_START, mark_end=MARK_END)
+        statement = SQLITE_SEARCH.format(after=SQLITE_AFTER if position else '')
+    else:
+        params['match'] = ' & '.join(terms) + ':*'
+        params['headline_options'] = f'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=35, MinWords=15'
+        statement = POSTGRES_SEARCH.format(after=POSTGRES_AFTER if position else '')
+    rows = db.session.execute(text(statement), params).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor('relevance', rows[-1].rank, rows[-1].id)
+    ids = [row.id for row in rows]
+    by_id = {review.id: review for review in Review.query.filter(Review.id.in_(ids))} if ids else {}
+    snippets = {row.id: highlight(row.snippet) for row in rows if row.snippet}
+    return [by_id[review_id] for review_id in ids if review_id in by_id], snippets, next_cursor
+
+
+def highlight(snippet):
+    """Escape a snippet and turn the match markers into <mark> tags"""
+    html = str(escape(snippet))
+    return Markup(html.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
@@ -5,6 +5,9 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeAlerts();
     initializeFormValidation();
     initializeAnimations();
+    initializeLoadMore();
+    initializeAutoSubmit();
+    initializeHelpfulVotes();
 });
 
 // Navigation functionality
@@ -558,6 +561,81 @@ class FormAutoSave {
     }
 }
 
+// Cursor-paginated review lists: "Load more" links double as infinite scroll
+function initializeLoadMore() {
+    document.querySelectorAll('[data-load-more]').forEach(link => {
+        const container = document.getElementById(link.dataset.target);
+        let loading = false;
+        let observer = null;
+
+        const loadNext = () => {
+            if (loading || !link.dataset.cursor) return;
+            loading = true;
+            link.classList.add('loading');
+
+            const url = new URL(link.dataset.url, window.location.origin);
+            url.searchParams.set('cursor', link.dataset.cursor);
+
+            fetch(url)
+                .then(response => response.json())
+                .then(data => {
+                    container.insertAdjacentHTML('beforeend', data.html);
+                    if (data.next_cursor) {
+                        link.dataset.cursor = data.next_cursor;
+                    } else {
+                        if (observer) observer.disconnect();
+                        link.closest('.load-more').remove();
+                    }
+                })
+                .catch(() => showAlert('error', 'Could not load more reviews.'))
+                .finally(() => {
+                    loading = false;
+                    link.classList.remove('loading');
+                });
+        };
+
+        link.addEventListener('click', (e) => {
+            e.preventDefault();
+            loadNext();
+        });
+
+        if ('IntersectionObserver' in window) {
+            observer = new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) loadNext();
+            });
+            observer.observe(link);
+        }
+    });
+}
+
+// Selects marked data-autosubmit (e.g. review sort order) submit their form on change
+function initializeAutoSubmit() {
+    document.querySelectorAll('select[data-autosubmit]').forEach(select => {
+        select.addEventListener('change', () => select.form.submit());
+    });
+}
+
+// "Helpful" buttons on review cards, including cards added by "Load more"
+function initializeHelpfulVotes() {
+    document.addEventListener('click', (e) => {
+        const button = e.target.closest('[data-helpful-url]');
+        if (!button || button.disabled) return;
+        button.disabled = true;
+
+        fetch(button.dataset.helpfulUrl, { method: 'POST' })
+            .then(response => response.json())
+            .then(data => {
+                if (data.error) throw new Error(data.error);
+                button.querySelector('[data-helpful-count]').textContent = data.helpful_votes;
+                if (!data.counted) showAlert('info', data.message);
+            })
+            .catch(() => {
+                button.disabled = false;
+                showAlert('error', 'Could not record your vote.');
+            });
+    });
+}
+
 // Export functions for use in other scripts
 window.EventReviewPlatform = {
     showAlert,
@@ -0,0 +1,85 @@
+"""TTL-cached user snapshots for Flask-Login's user_loader.
+
+Flask-Login calls the loader once per request (it keeps the result on ``g``),
+which for signed-in users used to be a primary-key query before any real
+work. The loader now returns an immutable CachedUser built from a short-lived
+in-process cache. Code that changes a user (profile, password, is_active) goes
+through the real User model; any committed update or delete of a User evicts
+its snapshot, and other workers' copies expire after USER_CACHE_TTL seconds.
+"""
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from app import db
+from app.cache import LRUCache
+from app.models import User
+
+USER_CACHE_TTL = 30
+
+SNAPSHOT_FIELDS = ('id', 'username', 'email', 'full_name', 'organization', 'created_at', 'last_login', 'is_active')
+
+_users = LRUCache(maxsize=4096, ttl=USER_CACHE_TTL, name='users')
+
+
+class CachedUser(UserMixin):
+    """Read-only stand-in for User; use load() to get the model for writes"""
+
+    def __init__(self, user):
+        self.__dict__.update({name: getattr(user, name) for name in SNAPSHOT_FIELDS})
+
+    @property
+    def is_active(self):
+        # UserMixin defines is_active as a property, which would shadow the copied column
+        return self.__dict__['is_active']
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'CachedUser is read-only; change {name} on User (see CachedUser.load)')
+
+    def load(self):
+        return db.session.get(User, self.id)
+
+    def check_password(self, password):
+        # The hash is deliberately not kept in the snapshot
+        user = self.load()
+        return user is not None and user.check_password(password)
+
+    get_event_count = User.get_event_count
+    get_review_summary = User.get_review_summary
+    get_total_reviews = User.get_total_reviews
+    get_average_rating = User.get_average_rating
+    get_events_with_stats = User.get_events_with_stats
+    get_recent_reviews = User.get_recent_reviews
+
+
+def load_user(user_id):
+    user_id = int(user_id)
+    snapshot = _users.get(user_id)
+    if snapshot is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snapshot = CachedUser(user)
+        _users.set(user_id, snapshot)
+    return snapshot
+
+
+def invalidate_user(user_id):
+    _users.delete(user_id)
+
+
+# Evict after commit, so a concurrent request cannot re-cache the old row in between
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    object_session(target).info.setdefault('stale_users', set()).add(target.id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _evict_stale_users(session):
+    for user_id in session.info.pop('stale_users', ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_stale_users(session):
+    session.info.pop('stale_users', None)
@@ -1,95 +1,231 @@
 import qrcode
+import qrcode.image.svg
 from PIL import Image
 import os
+import re
 import csv
-from io import StringIO
+import zlib
+import base64
+import hashlib
+import threading
+import unicodedata
+from collections import Counter
+from io import BytesIO, StringIO
 from datetime import datetime
+from urllib.parse import quote
+from app.cache import LRUCache
 
-def generate_qr_code(url, filename):
-    """Generate QR code for event review URL"""
+QR_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+def render_qr_code(url, box_size=10, fmt='png'):
+    """Render a QR code for ``url`` and return the encoded image bytes"""
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
+        box_size=box_size,
         border=4,
     )
     qr.add_data(url)
     qr.make(fit=True)
 
-    # Create QR code image
-    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    if fmt == 'svg':
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+        img.save(buffer)
+    else:
+        # Create QR code image
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(buffer, format='PNG')
+    return buffer.getvalue()
 
-    # Storage path can be overridden in production via FILE_STORAGE_PATH
+def get_storage_dir(name):
+    """Directory for generated files; overridable in production via FILE_STORAGE_PATH"""
     storage_base = os.environ.get('FILE_STORAGE_PATH')
     if storage_base:
-        qr_dir = os.path.join(storage_base, 'qr_codes')
+        path = os.path.join(storage_base, name)
     else:
         base_dir = os.path.dirname(os.path.abspath(__file__))
-        qr_dir = os.path.join(base_dir, 'static', 'qr_codes')
-    os.makedirs(qr_dir, exist_ok=True)
+        path = os.path.join(base_dir, 'static', name)
+    os.makedirs(path, exist_ok=True)
+    return path
 
-    qr_path = os.path.join(qr_dir, f'{filename}.png')
-    img.save(qr_path)
+class QRCodeStore:
+    """Content-addressed QR code cache: an in-process LRU over files on disk.
 
-    return qr_path
+    Images are keyed by a hash of (url, box_size, format). The same key always
+    yields the same bytes, so the key doubles as the HTTP ETag. The directory
+    keeps the ``max_files`` most recently used images; a sweep after every
+    ``max_files // 10`` renders (and on the first render of a process) removes
+    older ones, files left by the old per-event generator and stale temp files.
+    """
 
-def export_reviews_csv(event):
-    """Export event reviews to CSV file"""
-    # Storage path can be overridden in production via FILE_STORAGE_PATH
-    storage_base = os.environ.get('FILE_STORAGE_PATH')
-    if storage_base:
-        csv_dir = os.path.join(storage_base, 'exports')
+    FILE_NAME = re.compile(r'^[0-9a-f]{64}\.(png|svg)$')
+    TMP_MAX_AGE = 3600
+
+    def __init__(self, max_entries=256, max_files=None):
+        self.memory = LRUCache(maxsize=max_entries, name='qr_codes')
+        self.max_files = max_files or int(os.environ.get('QR_CACHE_MAX_FILES', 5000))
+        self._renders = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, box_size=10, fmt='png'):
+        return hashlib.sha256(f'{url}|{box_size}|{fmt}'.encode('utf-8')).hexdigest()
+
+    def get(self, url, box_size=10, fmt='png'):
+        """Return (etag, image bytes), rendering only when neither cache has the image"""
+        key = self.key(url, box_size, fmt)
+        data = self.memory.get(key)
+        if data is not None:
+            return key, data
+
+        directory = get_storage_dir('qr_codes')
+        path = os.path.join(directory, f'{key}.{fmt}')
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # The sweep evicts by mtime, so a read counts as a use
+            os.utime(path)
+        except FileNotFoundError:
+            data = render_qr_code(url, box_size, fmt)
+            # Write under a temporary name first so readers never see a partial file
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            with self._lock:
+                sweep = self._renders % max(self.max_files // 10, 1) == 0
+                self._renders += 1
+            if sweep:
+                self.sweep(directory)
+
+        self.memory.set(key, data)
+        return key, data
+
+    def sweep(self, directory):
+        """Keep the newest ``max_files`` images and delete everything else the cache does not own"""
+        now = datetime.now().timestamp()
+        images = []
+        for entry in os.scandir(directory):
+            try:
+                mtime = entry.stat().st_mtime
+                if self.FILE_NAME.match(entry.name):
+                    images.append((mtime, entry.path))
+                elif not entry.name.endswith('.tmp') or now - mtime > self.TMP_MAX_AGE:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass  # Another worker removed it first
+        images.sort(reverse=True)
+        for _, path in images[self.max_files:]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+qr_codes = QRCodeStore()
+
+def set_attachment(headers, download_name):
+    """Content-Disposition for a download, as send_file(download_name=...) builds it.
+
+    Names that are not ASCII get an ASCII ``filename`` fallback plus an RFC 5987
+    ``filename*``, since WSGI servers can only send latin-1 header values.
+    """
+    try:
+        download_name.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        quoted = quote(download_name, safe="!#$&+-.^_`|~")
+        names = {'filename': simple, 'filename*': f"UTF-8''{quoted}"}
     else:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        csv_dir = os.path.join(base_dir, 'static', 'exports')
-    os.makedirs(csv_dir, exist_ok=True)
-
-    filename = f'reviews_{event.unique_code}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    csv_path = os.path.join(csv_dir, filename)
-
-    with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'Review ID', 'Reviewer Name', 'Reviewer Email', 'Star Rating',
-            'Review Text', 'Categories', 'Attendee Type', 'Would Recommend',
-            'Submitted At', 'Is Approved', 'Is Featured', 'Quality Score'
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        writer.writeheader()
-        for review in event.reviews:
-            writer.writerow({
-                'Review ID': review.id,
-                'Reviewer Name': review.reviewer_name,
-                'Reviewer Email': review.reviewer_email,
-                'Star Rating': review.star_rating,
-                'Review Text': review.review_text or '',
-                'Categories': ', '.join(review.get_categories()),
-                'Attendee Type': review.attendee_type or '',
-                'Would Recommend': 'Yes' if review.would_recommend else 'No',
-                'Submitted At': review.submitted_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'Is Approved': 'Yes' if review.is_approved else 'No',
-                'Is Featured': 'Yes' if review.is_featured else 'No',
-                'Quality Score': review.get_quality_score()
-            })
-
-    return csv_path
+        names = {'filename': download_name}
+    headers.set('Content-Disposition', 'attachment', **names)
+
+def stream_csv(header, rows, compress=False, flush_every=500):
+    """Yield CSV bytes for ``rows`` incrementally, optionally gzip-compressed"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+
+    def drain():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate(0)
+        if compressor:
+            # Sync-flush so each chunk is sent now rather than held in the compressor
+            return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data
+
+    writer.writerow(header)
+    yield drain()
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % flush_every == 0:
+            yield drain()
+
+    chunk = drain()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them'}
+
+MAX_TERM_LENGTH = 50
+
+_NON_ALNUM = re.compile(r'[\W_]+')
+
+def count_terms(text):
+    """Count keyword terms in a review text (lowercased, punctuation and stop words removed)"""
+    terms = Counter()
+    if not text:
+        return terms
+    for word in text.lower().split():
+        # Clean word
+        word = _NON_ALNUM.sub('', word)
+        if 2 < len(word) <= MAX_TERM_LENGTH and word not in STOP_WORDS:
+            terms[word] += 1
+    return terms
 
 def calculate_word_frequency(reviews):
     """Calculate word frequency from review texts"""
-    word_freq = {}
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them'}
-
+    word_freq = Counter()
     for review in reviews:
-        if review.review_text:
-            words = review.review_text.lower().split()
-            for word in words:
-                # Clean word
-                word = ''.join(c for c in word if c.isalnum())
-                if len(word) > 2 and word not in stop_words:
-                    word_freq[word] = word_freq.get(word, 0) + 1
+        word_freq.update(count_terms(review.review_text))
 
     # Return top 20 words
-    return dict(sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:20])
+    return dict(word_freq.most_common(20))
+
+def encode_cursor(sort, key, review_id):
+    """Encode a (sort key, id) keyset position in ``sort`` order as an opaque URL-safe token.
+
+    The sort key is a datetime (submitted_at), an integer (quality_score, helpful_votes)
+    or a float (search rank, kept exact with repr).
+    """
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    elif isinstance(key, float):
+        key = repr(key)
+    else:
+        key = int(key)
+    raw = f'{sort}|{key}|{review_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, sort, key_type=datetime):
+    """Decode a token from encode_cursor, or None without one; ValueError if malformed or made for another sort"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        cursor_sort, key, review_id = raw.split('|')
+    except ValueError:
+        raise ValueError('Invalid cursor') from None
+    if cursor_sort != sort:
+        raise ValueError(f'Cursor was issued for sort={cursor_sort}, not sort={sort}')
+    try:
+        return (datetime.fromisoformat(key) if key_type is datetime else key_type(key)), int(review_id)
+    except ValueError:
+        raise ValueError('Invalid cursor') from None
 
 def format_datetime(dt):
     """Format datetime for display"""
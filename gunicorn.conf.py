@@ -0,0 +1,27 @@
+"""Gunicorn settings picked up by the Procfile and Dockerfile commands.
+
+With METRICS_ENABLED=True every worker writes Prometheus samples to
+PROMETHEUS_MULTIPROC_DIR so /metrics can aggregate them. prometheus_client
+reads the variable at import, so it is set here, in the master, before any
+worker loads the app.
+"""
+import os
+import shutil
+import tempfile
+
+if os.environ.get('METRICS_ENABLED') == 'True':
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'prometheus_multiproc'))
+
+
+def on_starting(server):
+    # Samples left by a previous run would be added to this one's
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
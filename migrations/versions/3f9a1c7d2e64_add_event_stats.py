@@ -0,0 +1,61 @@
+"""add event_stats aggregate table
+
+Revision ID: 3f9a1c7d2e64
+Revises: 5c1b50706773
+Create Date: 2026-10-16 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c7d2e64'
+down_revision = '5c1b50706773'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('event_stats',
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('review_count', sa.Integer(), nullable=False),
+    sa.Column('approved_count', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('rating_1', sa.Integer(), nullable=False),
+    sa.Column('rating_2', sa.Integer(), nullable=False),
+    sa.Column('rating_3', sa.Integer(), nullable=False),
+    sa.Column('rating_4', sa.Integer(), nullable=False),
+    sa.Column('rating_5', sa.Integer(), nullable=False),
+    sa.Column('recommend_count', sa.Integer(), nullable=False),
+    sa.Column('last_review_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+
+    # Backfill from existing reviews (same query as `flask reconcile-stats`)
+    op.execute("""
+        INSERT INTO event_stats (event_id, review_count, approved_count, rating_sum,
+                                 rating_1, rating_2, rating_3, rating_4, rating_5,
+                                 recommend_count, last_review_at, updated_at)
+        SELECT e.id,
+               COUNT(r.id),
+               COALESCE(SUM(CASE WHEN r.is_approved THEN 1 ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN r.is_approved THEN r.star_rating ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN r.is_approved AND r.star_rating = 1 THEN 1 ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN r.is_approved AND r.star_rating = 2 THEN 1 ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN r.is_approved AND r.star_rating = 3 THEN 1 ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN r.is_approved AND r.star_rating = 4 THEN 1 ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN r.is_approved AND r.star_rating = 5 THEN 1 ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN r.is_approved AND r.would_recommend THEN 1 ELSE 0 END), 0),
+               MAX(r.submitted_at),
+               CURRENT_TIMESTAMP
+        FROM events e
+        LEFT JOIN reviews r ON r.event_id = e.id
+        GROUP BY e.id
+    """)
+
+
+def downgrade():
+    op.drop_table('event_stats')
@@ -0,0 +1,31 @@
+"""add indexes for review list and dashboard queries
+
+Revision ID: 8b2d4e6f1a93
+Revises: 3f9a1c7d2e64
+Create Date: 2026-10-16 11:04:27.552190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2d4e6f1a93'
+down_revision = '3f9a1c7d2e64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # dashboard: events of one organizer
+    op.create_index('ix_events_user_id', 'events', ['user_id'], unique=False)
+    # browse_reviews, review_success, event_details pages and event_analytics:
+    # approved reviews of one event ordered by (submitted_at, id). Partial on Postgres.
+    op.create_index('ix_reviews_event_approved_submitted', 'reviews',
+                    ['event_id', 'is_approved', 'submitted_at', 'id'], unique=False,
+                    postgresql_where=sa.text('is_approved'))
+
+
+def downgrade():
+    op.drop_index('ix_reviews_event_approved_submitted', table_name='reviews')
+    op.drop_index('ix_events_user_id', table_name='events')
@@ -0,0 +1,46 @@
+"""store review quality scores, indexed for best/most helpful ordering
+
+Revision ID: a9d4e2f7c1b5
+Revises: f2a6c8e1b3d9
+Create Date: 2026-10-17 11:47:19.205387
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e2f7c1b5'
+down_revision = 'f2a6c8e1b3d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('reviews', sa.Column('quality_score', sa.SmallInteger(), nullable=False, server_default='0'))
+
+    # Backfill with app.models.quality_score: rating, text length, categories and recommendation, capped at 100
+    least = 'MIN' if op.get_bind().dialect.name == 'sqlite' else 'LEAST'
+    categories = ' + '.join(f'CASE WHEN (category_mask & {1 << bit}) != 0 THEN 5 ELSE 0 END' for bit in range(4))
+    op.execute(f"""
+        UPDATE reviews SET quality_score = {least}(100,
+            star_rating * 10
+            + {least}(COALESCE(LENGTH(review_text), 0) / 10, 50)
+            + {categories}
+            + CASE WHEN would_recommend THEN 20 ELSE 0 END)
+    """)
+    # Keyset pages compare (helpful_votes, id) tuples, which NULLs would break
+    op.execute('UPDATE reviews SET helpful_votes = 0 WHERE helpful_votes IS NULL')
+
+    op.create_index('ix_reviews_event_approved_quality', 'reviews',
+                    ['event_id', 'is_approved', 'quality_score', 'id'], unique=False,
+                    postgresql_where=sa.text('is_approved'))
+    op.create_index('ix_reviews_event_approved_helpful', 'reviews',
+                    ['event_id', 'is_approved', 'helpful_votes', 'id'], unique=False,
+                    postgresql_where=sa.text('is_approved'))
+
+
+def downgrade():
+    op.drop_index('ix_reviews_event_approved_helpful', table_name='reviews')
+    op.drop_index('ix_reviews_event_approved_quality', table_name='reviews')
+    op.drop_column('reviews', 'quality_score')
@@ -0,0 +1,51 @@
+"""make reviews.helpful_votes not null
+
+Revision ID: b7e1c4a9d2f6
+Revises: a9d4e2f7c1b5
+Create Date: 2026-10-17 16:12:40.571934
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e1c4a9d2f6'
+down_revision = 'a9d4e2f7c1b5'
+branch_labels = None
+depends_on = None
+
+# SQLite rebuilds the table to change a column, which drops the full-text triggers
+# of d5a8f3c19e07 with it; they are put back unchanged
+SQLITE_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS reviews_fts_ai AFTER INSERT ON reviews BEGIN "
+    "INSERT INTO reviews_fts(rowid, review_text, reviewer_name) "
+    "VALUES (new.id, new.review_text, new.reviewer_name); END",
+    "CREATE TRIGGER IF NOT EXISTS reviews_fts_ad AFTER DELETE ON reviews BEGIN "
+    "INSERT INTO reviews_fts(reviews_fts, rowid, review_text, reviewer_name) "
+    "VALUES ('delete', old.id, old.review_text, old.reviewer_name); END",
+    "CREATE TRIGGER IF NOT EXISTS reviews_fts_au AFTER UPDATE OF review_text, reviewer_name ON reviews BEGIN "
+    "INSERT INTO reviews_fts(reviews_fts, rowid, review_text, reviewer_name) "
+    "VALUES ('delete', old.id, old.review_text, old.reviewer_name); "
+    "INSERT INTO reviews_fts(rowid, review_text, reviewer_name) "
+    "VALUES (new.id, new.review_text, new.reviewer_name); END",
+]
+
+
+def _alter_helpful_votes(nullable):
+    with op.batch_alter_table('reviews') as batch_op:
+        batch_op.alter_column('helpful_votes', existing_type=sa.Integer(), nullable=nullable,
+                              server_default=None if nullable else '0')
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SQLITE_TRIGGERS:
+            op.execute(statement)
+
+
+def upgrade():
+    # Keyset pages by (helpful_votes, id) would skip rows with NULL votes
+    op.execute('UPDATE reviews SET helpful_votes = 0 WHERE helpful_votes IS NULL')
+    _alter_helpful_votes(nullable=False)
+
+
+def downgrade():
+    _alter_helpful_votes(nullable=True)
@@ -0,0 +1,59 @@
+"""index event_id in the review full-text table
+
+Revision ID: c3d7f1a8e5b2
+Revises: b7e1c4a9d2f6
+Create Date: 2026-10-17 17:03:22.904615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d7f1a8e5b2'
+down_revision = 'b7e1c4a9d2f6'
+branch_labels = None
+depends_on = None
+
+
+def _fts_statements(columns):
+    """DDL for reviews_fts over ``columns`` of reviews, with its sync triggers and a rebuild"""
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE reviews_fts USING fts5({names}, content='reviews', content_rowid='id', "
+        "tokenize='porter unicode61', prefix='2 3')",
+        f"CREATE TRIGGER reviews_fts_ai AFTER INSERT ON reviews BEGIN "
+        f"INSERT INTO reviews_fts(rowid, {names}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER reviews_fts_ad AFTER DELETE ON reviews BEGIN "
+        f"INSERT INTO reviews_fts(reviews_fts, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER reviews_fts_au AFTER UPDATE OF {names} ON reviews BEGIN "
+        f"INSERT INTO reviews_fts(reviews_fts, rowid, {names}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO reviews_fts(rowid, {names}) VALUES (new.id, {new}); END",
+        "INSERT INTO reviews_fts(reviews_fts) VALUES ('rebuild')",
+    ]
+
+
+DROP_FTS = [
+    "DROP TRIGGER IF EXISTS reviews_fts_au",
+    "DROP TRIGGER IF EXISTS reviews_fts_ad",
+    "DROP TRIGGER IF EXISTS reviews_fts_ai",
+    "DROP TABLE IF EXISTS reviews_fts",
+]
+
+
+def _rebuild(columns):
+    # Postgres already filters on reviews.event_id next to the tsvector match
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in DROP_FTS + _fts_statements(columns):
+        op.execute(statement)
+
+
+def upgrade():
+    _rebuild(['review_text', 'reviewer_name', 'event_id'])
+
+
+def downgrade():
+    _rebuild(['review_text', 'reviewer_name'])
@@ -0,0 +1,51 @@
+"""add event_terms keyword counts
+
+Revision ID: c41e7a90b2d5
+Revises: 8b2d4e6f1a93
+Create Date: 2026-10-16 13:26:09.104877
+
+"""
+from collections import Counter, defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils import count_terms
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e7a90b2d5'
+down_revision = '8b2d4e6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    event_terms = op.create_table('event_terms',
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('term', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.PrimaryKeyConstraint('event_id', 'term')
+    )
+    op.create_index('ix_event_terms_event_count', 'event_terms', ['event_id', 'count'], unique=False)
+
+    # Backfill from approved review text (same tokenizer as `flask rebuild-keywords`)
+    counts = defaultdict(Counter)
+    rows = op.get_bind().execute(sa.text(
+        "SELECT event_id, review_text FROM reviews WHERE is_approved AND review_text IS NOT NULL"
+    ))
+    for event_id, text in rows:
+        counts[event_id].update(count_terms(text))
+
+    values = [
+        {'event_id': event_id, 'term': term, 'count': count}
+        for event_id, terms in counts.items() for term, count in terms.items()
+    ]
+    if values:
+        op.bulk_insert(event_terms, values)
+
+
+def downgrade():
+    op.drop_index('ix_event_terms_event_count', table_name='event_terms')
+    op.drop_table('event_terms')
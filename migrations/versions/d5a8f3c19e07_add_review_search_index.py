@@ -0,0 +1,75 @@
+"""add review full-text search index
+
+Revision ID: d5a8f3c19e07
+Revises: c41e7a90b2d5
+Create Date: 2026-10-16 14:48:52.730615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8f3c19e07'
+down_revision = 'c41e7a90b2d5'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE reviews_fts USING fts5("
+    "review_text, reviewer_name, content='reviews', content_rowid='id', tokenize='porter unicode61', prefix='2 3')",
+    "CREATE TRIGGER reviews_fts_ai AFTER INSERT ON reviews BEGIN "
+    "INSERT INTO reviews_fts(rowid, review_text, reviewer_name) "
+    "VALUES (new.id, new.review_text, new.reviewer_name); END",
+    "CREATE TRIGGER reviews_fts_ad AFTER DELETE ON reviews BEGIN "
+    "INSERT INTO reviews_fts(reviews_fts, rowid, review_text, reviewer_name) "
+    "VALUES ('delete', old.id, old.review_text, old.reviewer_name); END",
+    "CREATE TRIGGER reviews_fts_au AFTER UPDATE OF review_text, reviewer_name ON reviews BEGIN "
+    "INSERT INTO reviews_fts(reviews_fts, rowid, review_text, reviewer_name) "
+    "VALUES ('delete', old.id, old.review_text, old.reviewer_name); "
+    "INSERT INTO reviews_fts(rowid, review_text, reviewer_name) "
+    "VALUES (new.id, new.review_text, new.reviewer_name); END",
+    # Index the rows that already exist
+    "INSERT INTO reviews_fts(reviews_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS reviews_fts_au",
+    "DROP TRIGGER IF EXISTS reviews_fts_ad",
+    "DROP TRIGGER IF EXISTS reviews_fts_ai",
+    "DROP TABLE IF EXISTS reviews_fts",
+]
+
+POSTGRES_UPGRADE = [
+    "ALTER TABLE reviews ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(review_text, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(reviewer_name, '')), 'B')) STORED",
+    "CREATE INDEX ix_reviews_search_vector ON reviews USING GIN (search_vector)",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_reviews_search_vector",
+    "ALTER TABLE reviews DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements):
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _run(SQLITE_UPGRADE)
+    elif dialect == 'postgresql':
+        _run(POSTGRES_UPGRADE)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _run(SQLITE_DOWNGRADE)
+    elif dialect == 'postgresql':
+        _run(POSTGRES_DOWNGRADE)
@@ -0,0 +1,29 @@
+"""add code_counters for event code allocation
+
+Revision ID: e7c2b9d4a610
+Revises: d5a8f3c19e07
+Create Date: 2026-10-16 16:05:31.418207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c2b9d4a610'
+down_revision = 'd5a8f3c19e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    code_counters = op.create_table('code_counters',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('next_value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(code_counters, [{'name': 'event_code', 'next_value': 0}])
+
+
+def downgrade():
+    op.drop_table('code_counters')
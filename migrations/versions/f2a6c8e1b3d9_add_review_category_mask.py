@@ -0,0 +1,52 @@
+"""store review categories as a bitmask, with per-event category counts
+
+Revision ID: f2a6c8e1b3d9
+Revises: e7c2b9d4a610
+Create Date: 2026-10-17 10:21:06.482913
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6c8e1b3d9'
+down_revision = 'e7c2b9d4a610'
+branch_labels = None
+depends_on = None
+
+# Bit order of app.models.REVIEW_CATEGORIES at the time of this migration
+CATEGORIES = ('Great Sound', 'Good Venue', 'Worth the Price', 'Well Organized')
+
+
+def upgrade():
+    op.add_column('reviews', sa.Column('category_mask', sa.SmallInteger(), nullable=False, server_default='0'))
+    # The JSON lists only ever hold these quoted names, so matching the text is exact
+    op.execute('UPDATE reviews SET category_mask = ' + ' + '.join(
+        f"""CASE WHEN review_categories LIKE '%"{name}"%' THEN {1 << bit} ELSE 0 END"""
+        for bit, name in enumerate(CATEGORIES)
+    ))
+    op.drop_column('reviews', 'review_categories')
+
+    for bit in range(len(CATEGORIES)):
+        op.add_column('event_stats', sa.Column(f'category_{bit + 1}', sa.Integer(), nullable=False,
+                                               server_default='0'))
+    op.execute('UPDATE event_stats SET ' + ', '.join(
+        f'category_{bit + 1} = (SELECT COUNT(*) FROM reviews r WHERE r.event_id = event_stats.event_id '
+        f'AND r.is_approved AND (r.category_mask & {1 << bit}) != 0)'
+        for bit in range(len(CATEGORIES))
+    ))
+
+
+def downgrade():
+    for bit in reversed(range(len(CATEGORIES))):
+        op.drop_column('event_stats', f'category_{bit + 1}')
+
+    op.add_column('reviews', sa.Column('review_categories', sa.Text(), nullable=True))
+    cases = ' '.join(
+        "WHEN {} THEN '{}'".format(mask, json.dumps([name for bit, name in enumerate(CATEGORIES) if mask & (1 << bit)]))
+        for mask in range(1 << len(CATEGORIES))
+    )
+    op.execute(f'UPDATE reviews SET review_categories = CASE category_mask {cases} END')
+    op.drop_column('reviews', 'category_mask')
@@ -0,0 +1,183 @@
+"""Load test: many concurrent submissions of the same review.
+
+Fires --concurrency simultaneous POSTs to /review/<code>/submit for each of
+--reviewers email addresses. Every request gets its own session cookie and
+CSRF token. Exactly one submission per email should be accepted, the rest
+should be told they already reviewed, and none should fail with a 500.
+
+Usage:
+    python scripts/load_duplicate_reviews.py
+    python scripts/load_duplicate_reviews.py --concurrency 50 --reviewers 20
+    python scripts/load_duplicate_reviews.py --queue sqlite
+    python scripts/load_duplicate_reviews.py --url http://127.0.0.1:5000 --code ABCD1234
+
+Without --url the script starts the app on a local port against a temporary
+SQLite database (or --database-url), with rate limiting disabled, and creates
+an event to review; --queue runs it with write-behind ingestion, and queued
+submissions are followed through their ticket. Against --url, pass the code of
+an existing event; the server's rate limits apply, so 429s are reported
+separately.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from datetime import date
+from http.cookiejar import CookieJar
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+CSRF_PATTERN = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+
+def start_local_server(database_url, queue=None):
+    """Run the app in a background thread; returns (base url, event code)"""
+    os.environ['DATABASE_URL'] = database_url
+    if queue:
+        os.environ['REVIEW_INGEST'] = 'queue'
+        os.environ['REVIEW_INGEST_BACKEND'] = queue
+        os.environ['REVIEW_INGEST_PATH'] = os.path.join(tempfile.mkdtemp(prefix='load_queue_'), 'queue.sqlite3')
+    os.environ.setdefault('FLASK_DEBUG', 'True')
+
+    from werkzeug.serving import make_server
+    from app import create_app, db, limiter
+    from app.models import User, Event
+
+    app = create_app()
+    limiter.enabled = False
+    with app.app_context():
+        db.create_all()
+        user = User(username='loadtest', email='loadtest@example.com', full_name='Load Test')
+        user.set_password('LoadTest123')
+        db.session.add(user)
+        db.session.flush()
+        event = Event(user_id=user.id, title='Load Test Event', category='Music',
+                      venue='Load Hall', event_date=date.today())
+        db.session.add(event)
+        db.session.commit()
+        code = event.unique_code
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}', code
+
+
+def submit(base_url, code, email, barrier):
+    """One attendee session: load the form, wait for the others, then submit"""
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+    try:
+        form_page = opener.open(f'{base_url}/review/{code}', timeout=60).read().decode()
+    except OSError as e:
+        barrier.abort()
+        return f'form error: {e}', 0.0
+    match = CSRF_PATTERN.search(form_page)
+    data = urllib.parse.urlencode({
+        'csrf_token': match.group(1) if match else '',
+        'reviewer_name': 'Load Tester',
+        'reviewer_email': email,
+        'star_rating': '5',
+        'review_text': f'Concurrent submission from {email}',
+        'attendee_type': 'Regular attendee',
+        'would_recommend': 'y',
+    }).encode()
+
+    try:
+        barrier.wait(timeout=120)
+    except threading.BrokenBarrierError:
+        return 'aborted', 0.0
+    start = time.perf_counter()
+    try:
+        # The redirect is followed, so the flash on the success page tells the outcomes apart
+        response = opener.open(f'{base_url}/review/{code}/submit', data=data, timeout=60)
+        page = response.read().decode()
+        elapsed = (time.perf_counter() - start) * 1000
+        ticket = urllib.parse.parse_qs(urllib.parse.urlparse(response.geturl()).query).get('ticket')
+        if ticket:
+            # Queued ingestion: the outcome is only known once the background writer is done
+            outcome = wait_for_ticket(opener, base_url, ticket[0])
+        elif 'Thank you for your review' in page:
+            outcome = 'created'
+        elif 'already submitted a review' in page:
+            outcome = 'duplicate'
+        else:
+            outcome = 'other'
+    except urllib.error.HTTPError as e:
+        outcome, elapsed = f'HTTP {e.code}', (time.perf_counter() - start) * 1000
+    except OSError as e:
+        outcome, elapsed = f'error: {e}', (time.perf_counter() - start) * 1000
+    return outcome, elapsed
+
+
+def wait_for_ticket(opener, base_url, ticket, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = json.loads(opener.open(f'{base_url}/api/submissions/{ticket}', timeout=30).read())['status']
+        if status not in ('pending', 'processing'):
+            return status
+        time.sleep(0.2)
+    return 'still queued'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Base URL of a running server (default: start one locally)')
+    parser.add_argument('--code', help='Event unique_code to review (required with --url)')
+    parser.add_argument('--database-url', help='Scratch database for the local server (default: temporary SQLite file)')
+    parser.add_argument('--queue', choices=['sqlite', 'memory'],
+                        help='Run the local server with queued ingestion (REVIEW_INGEST=queue) on this backend')
+    parser.add_argument('--concurrency', type=int, default=20, help='Simultaneous submissions per email')
+    parser.add_argument('--reviewers', type=int, default=5, help='Distinct emails to submit')
+    args = parser.parse_args()
+
+    if args.url:
+        if not args.code:
+            parser.error('--code is required with --url')
+        base_url, code = args.url.rstrip('/'), args.code
+    else:
+        database_url = args.database_url or 'sqlite:///' + os.path.join(
+            tempfile.mkdtemp(prefix='load_reviews_'), 'load.db')
+        base_url, code = start_local_server(database_url, args.queue)
+
+    run_id = int(time.time())
+    emails = [f'load{run_id}-{n}@example.com' for n in range(args.reviewers)]
+    jobs = [email for email in emails for _ in range(args.concurrency)]
+    barrier = threading.Barrier(len(jobs))
+    results = [None] * len(jobs)
+
+    def worker(index, email):
+        results[index] = (email,) + submit(base_url, code, email, barrier)
+
+    threads = [threading.Thread(target=worker, args=(i, email)) for i, email in enumerate(jobs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    outcomes = Counter(outcome for _, outcome, _ in results)
+    created = Counter(email for email, outcome, _ in results if outcome == 'created')
+    latencies = sorted(ms for _, _, ms in results)
+    print(f'{len(jobs)} submissions ({args.reviewers} emails x {args.concurrency} concurrent) against {base_url}')
+    for outcome, count in outcomes.most_common():
+        print(f'  {outcome:12} {count}')
+    print(f'  latency p50 {latencies[len(latencies) // 2]:.1f} ms, max {latencies[-1]:.1f} ms')
+
+    problems = [email for email in emails if created[email] != 1]
+    failures = sum(count for outcome, count in outcomes.items() if outcome not in ('created', 'duplicate'))
+    if problems or failures:
+        print(f'FAIL: {len(problems)} emails without exactly one accepted review, {failures} failed requests')
+        sys.exit(1)
+    print('OK: one review accepted per email, every duplicate rejected cleanly')
+
+
+if __name__ == '__main__':
+    main()
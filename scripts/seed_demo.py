@@ -2,17 +2,107 @@
 
 Usage:
     python scripts/seed_demo.py
+    python scripts/seed_demo.py --organizers 200 --events-per-organizer 25 --reviews 1000000
+    python scripts/seed_demo.py --organizers 2000 --events-per-organizer 25 --reviews 10000000 --seed 7
 
 It reads optional env vars:
-  DEMO_USERNAME, DEMO_EMAIL, DEMO_PASSWORD
+  DATABASE_URL, DEMO_USERNAME, DEMO_EMAIL, DEMO_PASSWORD
+
+With --organizers the script also generates synthetic data at scale: that many
+organizers with --events-per-organizer events each, and --reviews reviews
+spread over the past events with a long-tailed (Pareto) distribution, so a few
+events get most of the reviews. Ratings, text length, attendee types, review
+categories and submission times follow skewed distributions too. Everything
+is drawn from one --seed, so the same arguments produce the same data
+(relative to the day it is run; event codes come from the allocator).
+
+Rows are written with executemany (COPY on Postgres) in --batch-size chunks,
+bypassing the ORM. The review search index is suspended while loading and
+rebuilt afterwards together with per-event stats and keyword counts, so the
+result is what the app itself would have produced. Generated organizers can
+sign in with DEMO_PASSWORD.
 
 Be careful when running against production databases.
 """
-from app import create_app, db
-from app.models import User, Event
+import argparse
+import csv
+import io
 import os
+import random
 import sys
-from datetime import date
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models import (REVIEW_CATEGORIES, User, Event, EventStats, categories_to_mask, mask_to_categories,
+                        quality_score)
+
+CATEGORIES = {'Music': 30, 'Comedy': 12, 'Workshop': 20, 'Conference': 18, 'Sports': 12, 'Other': 8}
+ATTENDEE_TYPES = {'First-time attendee': 35, 'Regular attendee': 30, 'VIP/Premium': 6,
+                  'Student': 12, 'Professional': 12, 'Other': 5}
+RATINGS = [1, 2, 3, 4, 5]
+RATING_WEIGHTS = [4, 5, 11, 30, 50]
+RECOMMEND_RATE = {1: 0.03, 2: 0.1, 3: 0.45, 4: 0.88, 5: 0.97}
+
+SENTENCES = {
+    'negative': [
+        'The sound was muddy and too loud at the back.', 'Doors opened an hour late.',
+        'Way overpriced for what we got.', 'The queue for drinks took forever.',
+        'Seating was cramped and the view was blocked.', 'Nobody told us the schedule had changed.',
+        'The headliner cut the set short.', 'Parking was a nightmare.',
+        'Staff seemed overwhelmed all night.', 'I would not come back.',
+    ],
+    'neutral': [
+        'It was a decent night overall.', 'The venue was fine but nothing special.',
+        'Some parts dragged a little.', 'Good music, average organisation.',
+        'Tickets were a bit expensive.', 'The opening act was better than expected.',
+        'Finding the entrance was confusing.', 'Food options were limited.',
+    ],
+    'positive': [
+        'Amazing atmosphere from start to finish!', 'The sound was crystal clear.',
+        'Staff were friendly and helpful.', 'Everything ran perfectly on time.',
+        'Great venue with a fantastic view of the stage.', 'Worth every penny.',
+        'The speakers were inspiring and well prepared.', 'Best event I have been to this year.',
+        'Loved the energy of the crowd.', 'Already looking forward to the next one.',
+        'Well organised, with plenty of space.', 'The workshop material was really practical.',
+    ],
+}
+SENTIMENT = {1: 'negative', 2: 'negative', 3: 'neutral', 4: 'positive', 5: 'positive'}
+
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Jamie', 'Riley', 'Avery', 'Quinn',
+               'Priya', 'Wei', 'Amara', 'Mateo', 'Sofia', 'Liam', 'Noah', 'Emma', 'Olivia', 'Yuki']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Okafor', 'Nguyen', 'Kowalski', 'Silva', 'Patel', 'Brown', 'Müller',
+              'Rossi', 'Kim', 'Johnson', 'Haddad', 'Larsen', 'Dubois']
+EMAIL_DOMAINS = ['example.com', 'example.org', 'example.net']
+USER_AGENTS = [
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 Chrome/124.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 Version/17.4 Safari/605.1.15',
+]
+VENUES = ['Riverside Hall', 'The Warehouse', 'City Arena', 'Grand Theatre', 'Innovation Hub',
+          'Harbour Pavilion', 'Main Street Club', 'Conference Centre', 'Park Stage', 'Community Centre']
+EVENT_TIMES = ['10:00:00.000000', '14:00:00.000000', '18:00:00.000000', '19:00:00.000000', '20:00:00.000000']
+TITLE_WORDS = ['Summer', 'Night', 'Live', 'Festival', 'Summit', 'Sessions', 'Open', 'Classic', 'Future', 'Unplugged']
+
+# Distinct review texts per sentiment; rows pick from these so text is cheap to generate
+TEXT_VARIANTS = 2000
+# Submission delays are drawn from a fixed pool for the same reason
+OFFSET_POOL_SIZE = 65536
+# Past events get reviews; the rest are upcoming
+PAST_EVENT_SHARE = 0.8
+HISTORY_DAYS = 730
+# Shape of the reviews-per-event tail (~1.16 is the 80/20 rule)
+PARETO_ALPHA = 1.16
+
+EVENT_COLUMNS = ['id', 'user_id', 'title', 'category', 'description', 'venue', 'event_date', 'event_time',
+                 'capacity', 'status', 'unique_code', 'allow_reviews', 'created_at', 'updated_at']
+REVIEW_COLUMNS = ['event_id', 'reviewer_name', 'reviewer_email', 'star_rating', 'review_text',
+                  'category_mask', 'attendee_type', 'would_recommend', 'submitted_at', 'ip_address',
+                  'user_agent', 'is_approved', 'is_featured', 'helpful_votes', 'quality_score']
 
 
 def create_demo_user(username, email, password):
@@ -45,7 +135,252 @@ def create_demo_event(user):
     return ev
 
 
+class BulkWriter:
+    """Writes row tuples through a raw DB-API connection: COPY on Postgres, executemany elsewhere.
+
+    Dates and times are passed as strings in the format SQLAlchemy itself uses
+    for SQLite, which Postgres parses as well.
+    """
+
+    def __init__(self):
+        self.dialect = db.engine.dialect.name
+        self.placeholder = '?' if db.engine.dialect.paramstyle == 'qmark' else '%s'
+        self.conn = db.engine.raw_connection()
+        if self.dialect == 'sqlite':
+            cursor = self.conn.cursor()
+            cursor.execute('PRAGMA synchronous=OFF')
+            cursor.execute('PRAGMA cache_size=-262144')
+            cursor.close()
+
+    def write(self, table, columns, rows):
+        if not rows:
+            return
+        cursor = self.conn.cursor()
+        if self.dialect == 'postgresql':
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        else:
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([self.placeholder] * len(columns))})",
+                rows
+            )
+        cursor.close()
+
+    def scalar(self, sql):
+        cursor = self.conn.cursor()
+        cursor.execute(sql)
+        value = cursor.fetchone()[0]
+        cursor.close()
+        return value
+
+    def execute(self, sql):
+        cursor = self.conn.cursor()
+        cursor.execute(sql)
+        cursor.close()
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def weighted(rng, choices, k):
+    return rng.choices(list(choices), weights=list(choices.values()), k=k)
+
+
+def review_texts(rng):
+    """TEXT_VARIANTS texts per sentiment with log-normal sentence counts; None is no text"""
+    from app.utils import count_terms
+
+    texts, terms = {}, {}
+    for sentiment, sentences in SENTENCES.items():
+        texts[sentiment] = []
+        for _ in range(TEXT_VARIANTS):
+            length = min(int(rng.lognormvariate(0.6, 0.9)), 25)
+            texts[sentiment].append(' '.join(rng.choices(sentences, k=length)) if length else None)
+        terms[sentiment] = [count_terms(text) for text in texts[sentiment]]
+    return texts, terms
+
+
+def reviews_per_event(rng, event_count, total):
+    """Split ``total`` reviews over the events with a Pareto-distributed weight each"""
+    weights = [rng.paretovariate(PARETO_ALPHA) for _ in range(event_count)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    # Hand the rounding remainder to the busiest events
+    for index in sorted(range(event_count), key=weights.__getitem__, reverse=True)[:total - sum(counts)]:
+        counts[index] += 1
+    return counts
+
+
+def allocate_codes(count, chunk_size=1000):
+    from app.codes import event_codes
+
+    codes = []
+    # Chunked so the allocator's collision check stays within bind-parameter limits
+    while len(codes) < count:
+        codes += event_codes.allocate(min(chunk_size, count - len(codes)))
+    db.session.commit()
+    return codes
+
+
+def suspend_search_index():
+    # Maintained again by search.reindex() once the load is done
+    if db.engine.dialect.name == 'sqlite':
+        for trigger in ('reviews_fts_ai', 'reviews_fts_ad', 'reviews_fts_au'):
+            db.session.execute(db.text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    elif db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('DROP INDEX IF EXISTS ix_reviews_search_vector'))
+    db.session.commit()
+
+
+def rebuild_derived(event_ids, chunk_size=500):
+    from app import search
+
+    for start in range(0, len(event_ids), chunk_size):
+        EventStats.rebuild(event_ids[start:start + chunk_size])
+        db.session.commit()
+    search.reindex()
+    db.session.commit()
+
+
+def generate(organizers, events_per_organizer, total_reviews, seed, password, batch_size):
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    today = now.date()
+    started = time.perf_counter()
+
+    password_user = User()
+    password_user.set_password(password)
+    event_count = organizers * events_per_organizer
+    codes = allocate_codes(event_count)
+    suspend_search_index()
+
+    writer = BulkWriter()
+    if writer.dialect == 'postgresql':
+        # Explicit ids below; serialize with other writers for the duration of the load
+        writer.execute('LOCK TABLE users, events IN EXCLUSIVE MODE')
+    first_user = (writer.scalar('SELECT max(id) FROM users') or 0) + 1
+    first_event = (writer.scalar('SELECT max(id) FROM events') or 0) + 1
+
+    users = []
+    for n in range(organizers):
+        user_id = first_user + n
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        joined = now - timedelta(days=rng.randint(HISTORY_DAYS, HISTORY_DAYS + 365))
+        users.append((user_id, f'organizer{user_id}', f'organizer{user_id}@example.com', password_user.password_hash,
+                      f'{first} {last}', f'{last} Events', timestamp(joined), True))
+    writer.write('users', ['id', 'username', 'email', 'password_hash', 'full_name', 'organization',
+                           'created_at', 'is_active'], users)
+
+    events, past_events = [], []
+    categories = weighted(rng, CATEGORIES, event_count)
+    for n in range(event_count):
+        event_id = first_event + n
+        past = rng.random() < PAST_EVENT_SHARE
+        event_date = today - timedelta(days=rng.randint(1, HISTORY_DAYS)) if past \
+            else today + timedelta(days=rng.randint(0, 180))
+        event_time = rng.choice(EVENT_TIMES)
+        starts_at = datetime.combine(event_date, datetime.strptime(event_time, '%H:%M:%S.%f').time())
+        created = timestamp(min(starts_at - timedelta(days=rng.randint(7, 120)), now))
+        events.append((event_id, first_user + n // events_per_organizer,
+                       f'{rng.choice(TITLE_WORDS)} {categories[n]} {rng.choice(TITLE_WORDS)} #{event_id}',
+                       categories[n], None, rng.choice(VENUES), event_date.isoformat(), event_time,
+                       int(rng.lognormvariate(5, 1)) + 10, 'completed' if past else 'upcoming',
+                       codes[n], True, created, created))
+        if past:
+            past_events.append((event_id, starts_at))
+    writer.write('events', EVENT_COLUMNS, events)
+    if writer.dialect == 'postgresql':
+        for table in ('users', 'events'):
+            writer.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))")
+    writer.commit()
+    print(f'Inserted {organizers} organizers and {event_count} events ({len(past_events)} past).')
+
+    texts, text_terms = review_texts(rng)
+    # Most reviews arrive within hours of the show, with a tail over the following weeks
+    offsets = [timedelta(seconds=min(rng.expovariate(1 / 14400), 60 * 86400), microseconds=rng.randint(1, 999999))
+               for _ in range(OFFSET_POOL_SIZE)]
+    category_sets = [categories_to_mask(rng.sample(REVIEW_CATEGORIES, k)) for k in range(5) for _ in range(8)]
+    ips = [f'203.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}' for _ in range(4096)]
+
+    counts = reviews_per_event(rng, len(past_events), total_reviews) if past_events else []
+    rows, term_rows, written = [], [], 0
+    for (event_id, starts_at), count in zip(past_events, counts):
+        if not count:
+            continue
+        ratings = rng.choices(RATINGS, weights=RATING_WEIGHTS, k=count)
+        text_indexes = rng.choices(range(TEXT_VARIANTS), k=count)
+        delays = rng.choices(offsets, k=count)
+        attendee_types = weighted(rng, ATTENDEE_TYPES, count)
+        review_categories = rng.choices(category_sets, k=count)
+        review_ips = rng.choices(ips, k=count)
+        user_agents = rng.choices(USER_AGENTS, k=count)
+        latest = now - starts_at
+        used_texts = Counter()
+        for i in range(count):
+            rating = ratings[i]
+            sentiment = SENTIMENT[rating]
+            approved = rng.random() < 0.97
+            first, last = FIRST_NAMES[i % len(FIRST_NAMES)], LAST_NAMES[(i * 7 + event_id) % len(LAST_NAMES)]
+            if approved:
+                used_texts[sentiment, text_indexes[i]] += 1
+            text, recommend = texts[sentiment][text_indexes[i]], rng.random() < RECOMMEND_RATE[rating]
+            rows.append((
+                event_id, f'{first} {last}', f'{first.lower()}.{last.lower()}.{i}@{EMAIL_DOMAINS[i % 3]}',
+                rating, text, review_categories[i], attendee_types[i], recommend,
+                timestamp(starts_at + min(delays[i], latest)),
+                review_ips[i], user_agents[i], approved, rng.random() < 0.005,
+                int(rng.paretovariate(2)) - 1,
+                quality_score(rating, text, mask_to_categories(review_categories[i]), recommend),
+            ))
+
+        # Keyword counts as EventTerm.rebuild would produce them, without re-tokenizing every row
+        terms = Counter()
+        for (sentiment, index), uses in used_texts.items():
+            for term, n in text_terms[sentiment][index].items():
+                terms[term] += n * uses
+        term_rows.extend((event_id, term, n) for term, n in terms.items())
+
+        if len(rows) >= batch_size:
+            written += flush_reviews(writer, rows, term_rows)
+            rows, term_rows = [], []
+            elapsed = time.perf_counter() - started
+            print(f'  {written:>12,} reviews  {written / elapsed:,.0f}/s', flush=True)
+    written += flush_reviews(writer, rows, term_rows)
+    writer.close()
+
+    print(f'Inserted {written:,} reviews; rebuilding stats and the search index...')
+    rebuild_derived([event_id for event_id, _ in past_events])
+    print(f'Done in {time.perf_counter() - started:.1f}s.')
+
+
+def timestamp(value):
+    return value.isoformat(' ', 'microseconds')
+
+
+def flush_reviews(writer, rows, term_rows):
+    writer.write('reviews', REVIEW_COLUMNS, rows)
+    writer.write('event_terms', ['event_id', 'term', 'count'], term_rows)
+    writer.commit()
+    return len(rows)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Create demo credentials and, optionally, synthetic data at scale.')
+    parser.add_argument('--organizers', type=int, default=0, help='Synthetic organizers to generate (default: none)')
+    parser.add_argument('--events-per-organizer', type=int, default=20)
+    parser.add_argument('--reviews', type=int, default=100000, help='Total reviews over all generated past events')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=100000, help='Rows per insert batch and commit')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
+    args = parse_args()
     app = create_app()
     with app.app_context():
         username = os.environ.get('DEMO_USERNAME', 'demo_user')
@@ -63,8 +398,10 @@ if __name__ == '__main__':
         if not user.events:
             create_demo_event(user)
 
+        if args.organizers:
+            generate(args.organizers, args.events_per_organizer, args.reviews, args.seed, password, args.batch_size)
+
         print('\nDone. Demo credentials:')
         print(f'  Username: {username}')
         print(f'  Email: {email}')
         print(f'  Password: {password}')
-*** End Patch
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""Shared fixtures: a fresh app and SQLite database per test.
+
+Each test gets its own database file, so the full-text index, counters and
+every in-process cache start empty; caches are module-level and are cleared
+between tests for the same reason.
+"""
+import pytest
+from flask import g, request_started
+from sqlalchemy import event as sa_event
+
+from app import create_app, db
+from app.cache import LRUCache, caches
+from tests.factories import make_event, make_user
+
+
+@pytest.fixture
+def bare_app(tmp_path, monkeypatch):
+    """The app with its tables created but no app context pushed, so every request
+    gets a context of its own as it would when served"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('FLASK_DEBUG', 'True')
+    monkeypatch.setenv('RATELIMIT_ENABLED', 'False')
+    monkeypatch.setenv('FILE_STORAGE_PATH', str(tmp_path / 'files'))
+    for cache in caches.values():
+        if isinstance(cache, LRUCache):
+            cache.clear()
+
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def _forget_request_globals(sender, **extra):
+    g.__dict__.clear()
+
+
+@pytest.fixture
+def app(bare_app):
+    """The app inside an app context the test body shares with its requests.
+
+    Requests reuse that context, so ``g`` is cleared as each one starts; otherwise
+    the user Flask-Login loaded for one client would carry over to the next request.
+    """
+    request_started.connect(_forget_request_globals, bare_app)
+    with bare_app.app_context():
+        yield bare_app
+        db.session.remove()
+    request_started.disconnect(_forget_request_globals, bare_app)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def queries(app):
+    """SQL statements run while the test is using this fixture; clear() it to start counting"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sa_event.listen(db.engine, 'before_cursor_execute', record)
+    yield statements
+    sa_event.remove(db.engine, 'before_cursor_execute', record)
+
+
+@pytest.fixture
+def organizer(app):
+    return make_user()
+
+
+@pytest.fixture
+def event(organizer):
+    return make_event(organizer)
@@ -0,0 +1,41 @@
+"""Helpers creating users, events and reviews the way the app does"""
+from datetime import date
+
+from app import db
+from app.models import Event, Review, User
+from app.review_hooks import review_added
+
+PASSWORD = 'Passw0rd!'
+
+
+def make_user(username='organizer'):
+    user = User(username=username, email=f'{username}@example.com')
+    user.set_password(PASSWORD)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_event(user, **values):
+    values = {'title': 'Spring Concert', 'category': 'Music', 'venue': 'Main Hall',
+              'event_date': date.today(), 'capacity': 100, **values}
+    event = Event(user_id=user.id, **values)
+    db.session.add(event)
+    db.session.commit()
+    return event
+
+
+def make_review(event, email, star_rating=5, **values):
+    """Add a review the way the submit route does, hooks included"""
+    review = Review(event_id=event.id, reviewer_name=email.split('@')[0], reviewer_email=email,
+                    star_rating=star_rating, **values)
+    db.session.add(review)
+    review_added(review)
+    db.session.commit()
+    return review
+
+
+def login(client, user):
+    response = client.post('/auth/login', data={'username': user.username, 'password': PASSWORD})
+    assert response.status_code == 302
+    return client
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from app import analytics, db
+from tests.factories import login, make_review, make_user
+
+
+def test_endpoint_keeps_the_all_time_keys(client, organizer, event):
+    old = datetime.utcnow() - timedelta(days=30)
+    make_review(event, 'a@example.com', star_rating=2, submitted_at=old)
+    make_review(event, 'b@example.com', star_rating=4, would_recommend=True)
+    login(client, organizer)
+
+    data = client.get(f'/api/event/{event.id}/analytics').get_json()
+    # All-time figures include the review outside the default one-week window
+    assert data['total_reviews'] == 2
+    assert data['average_rating'] == 3.0
+    assert [entry['rating'] for entry in data['recent_activity']] == [4]
+    assert set(data) >= {'rating_distribution', 'response_rate', 'category_breakdown'}
+
+    window = data['window']
+    assert (window['days'], window['bucket'], window['total_reviews']) == (7, 'day', 1)
+    assert window['recommend_rate'] == 100.0
+
+
+def test_window_is_zero_filled_and_bucketed(client, organizer, event):
+    now = datetime.utcnow()
+    for hours in (1, 2, 50):
+        make_review(event, f'guest{hours}@example.com', star_rating=5, submitted_at=now - timedelta(hours=hours))
+
+    result = analytics.event_analytics(event, window_days=3, bucket='day')
+    assert len(result['series']) == 4
+    assert sum(point['count'] for point in result['series']) == 3
+    empty = [point for point in result['series'] if point['count'] == 0]
+    assert all(point['average_rating'] is None for point in empty)
+
+    weeks = analytics.event_analytics(event, window_days=28, bucket='week')
+    assert all(datetime.fromisoformat(point['start']).weekday() == 0 for point in weeks['series'])
+
+
+def test_new_review_invalidates_the_cached_window(event):
+    assert analytics.event_analytics(event)['total_reviews'] == 0
+    assert analytics.recent_activity(event) == []
+    # Written within the same second as the cached result
+    make_review(event, 'guest@example.com')
+    assert analytics.event_analytics(event)['total_reviews'] == 1
+    assert len(analytics.recent_activity(event)) == 1
+
+
+def test_repeated_requests_only_read_the_event_and_its_stats(client, organizer, event, queries):
+    make_review(event, 'guest@example.com')
+    login(client, organizer)
+    client.get(f'/api/event/{event.id}/analytics')
+
+    # Requests share the test's session, so drop what the first one loaded
+    db.session.expire_all()
+    queries.clear()
+    assert client.get(f'/api/event/{event.id}/analytics').status_code == 200
+    assert len(queries) == 2
+
+
+def test_invalid_window_and_owner_check(client, organizer, event):
+    login(client, organizer)
+    assert client.get(f'/api/event/{event.id}/analytics', query_string={'bucket': 'month'}).status_code == 400
+    response = client.get(f'/api/event/{event.id}/analytics', query_string={'bucket': 'hour', 'window': 30})
+    assert response.status_code == 400
+
+    client.get('/auth/logout')
+    login(client, make_user('someone'))
+    assert client.get(f'/api/event/{event.id}/analytics').status_code == 403
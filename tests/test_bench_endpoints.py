@@ -0,0 +1,71 @@
+import json
+from argparse import Namespace
+
+import pytest
+
+from scripts import bench_endpoints, seed_demo
+
+THRESHOLDS = dict(query_threshold=0, latency_threshold=0.5, latency_slack_ms=5.0, memory_threshold=0.25,
+                  memory_slack_kib=256.0)
+
+
+def result(**values):
+    return {'p50_ms': 10.0, 'p95_ms': 20.0, 'queries': 3, 'max_queries': 3, 'cold_queries': 4, 'peak_kib': 100.0,
+            'statuses': {'200': 10}, **values}
+
+
+def report(mode='test-client', **values):
+    return {'environment': {'mode': mode, 'dialect': 'sqlite', 'reviews': 1000, 'seed': 42},
+            'results': {'dashboard': result(**values)}}
+
+
+@pytest.fixture
+def args():
+    return Namespace(warmup=1, requests=3, memory_requests=1, **THRESHOLDS)
+
+
+def test_percentile_uses_nearest_rank():
+    assert bench_endpoints.percentile([5, 1, 4, 2, 3], 50) == 3
+    assert bench_endpoints.percentile([5, 1, 4, 2, 3], 99) == 5
+    assert bench_endpoints.percentile([7], 95) == 7
+
+
+def test_compare_flags_regressions_beyond_the_thresholds(args):
+    baseline = report()
+    environment = baseline['environment']
+    assert bench_endpoints.compare(report(p50_ms=19.9)['results'], environment, baseline, args) == []
+
+    failures = bench_endpoints.compare(report(queries=4, p95_ms=36.0, peak_kib=400.0)['results'],
+                                       environment, baseline, args)
+    assert failures == ['dashboard: queries 3 -> 4', 'dashboard: p95_ms 20.0 -> 36.0 (limit 35.0)',
+                        'dashboard: peak_kib 100.0 -> 400.0 (limit 381)']
+    errors = report(statuses={'200': 8, '500': 2})['results']
+    assert bench_endpoints.compare(errors, environment, None, args) == ['dashboard: 2 server error(s)']
+
+
+def test_other_modes_only_compare_query_counts(args):
+    baseline = report(mode='gunicorn')
+    slower = report(p50_ms=100.0, cold_queries=5)
+    failures = bench_endpoints.compare(slower['results'], slower['environment'], baseline, args)
+    assert failures == ['dashboard: cold_queries 4 -> 5']
+
+
+def test_endpoints_stay_within_the_recorded_query_counts(bare_app, args):
+    """Steady-state queries per request on a small seeded database stay within the committed baseline"""
+    bare_app.config['QUERY_BUDGET'] = 'raise'
+    with bare_app.app_context():
+        seed_demo.generate(organizers=2, events_per_organizer=3, total_reviews=300, seed=42,
+                           password=bench_endpoints.PASSWORD, batch_size=1000)
+        target, username = bench_endpoints.busiest_event()
+
+    # Like the script, requests run without an outer app context, so none share a session
+    driver = bench_endpoints.TestClientDriver(bare_app)
+    driver.login(username, bench_endpoints.PASSWORD)
+    results = {endpoint[0]: bench_endpoints.measure(driver, endpoint, target, args, run_id=1)
+               for endpoint in bench_endpoints.ENDPOINTS}
+
+    with open(bench_endpoints.DEFAULT_BASELINE) as f:
+        baseline = json.load(f)
+    for name, current in results.items():
+        assert set(current['statuses']) <= {'200', '302'}, name
+        assert current['queries'] <= baseline['results'][name]['queries'], name
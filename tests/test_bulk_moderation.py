@@ -0,0 +1,87 @@
+from app import db
+from app.models import EventStats, EventTerm, Review
+from tests.factories import login, make_event, make_review, make_user
+
+
+def bulk(client, **data):
+    return client.post('/api/reviews/bulk', json=data)
+
+
+def test_filter_rejects_matching_reviews_and_keeps_stats_in_step(client, organizer, event):
+    for n in range(6):
+        make_review(event, f'guest{n}@example.com', star_rating=n % 3 + 1, review_text='noisy hall')
+    login(client, organizer)
+
+    response = bulk(client, action='reject', filter={'event_id': event.id, 'star_rating': [1, 2]})
+    assert response.get_json() == {'success': True, 'action': 'reject', 'affected': 4}
+    # Reviews already in the target state are not matched again
+    assert bulk(client, action='reject', filter={'star_rating': 1}).get_json()['affected'] == 0
+
+    db.session.expire_all()
+    assert Review.query.filter_by(is_approved=True).count() == 2
+    stats = db.session.get(EventStats, event.id)
+    assert (stats.approved_count, stats.rating_sum) == (2, 6)
+    assert dict(EventTerm.top_terms(event_id=event.id)) == {'noisy': 2, 'hall': 2}
+
+
+def test_ids_feature_and_delete(client, organizer, event):
+    reviews = [make_review(event, f'guest{n}@example.com') for n in range(3)]
+    login(client, organizer)
+
+    ids = [review.id for review in reviews[:2]]
+    assert bulk(client, action='feature', ids=ids).get_json()['affected'] == 2
+    assert bulk(client, action='delete', ids=[reviews[2].id]).get_json()['affected'] == 1
+
+    db.session.expire_all()
+    assert [review.is_featured for review in Review.query.order_by(Review.id)] == [True, True]
+    assert db.session.get(EventStats, event.id).review_count == 2
+
+
+def test_other_organizers_reviews_are_never_matched(client, event):
+    review = make_review(event, 'guest@example.com')
+    intruder = make_user('someone')
+    make_review(make_event(intruder), 'own@example.com')
+    login(client, intruder)
+
+    assert bulk(client, action='delete', ids=[review.id]).get_json()['affected'] == 0
+    assert bulk(client, action='reject', filter={'event_id': event.id}).get_json()['affected'] == 0
+    assert db.session.get(Review, review.id).is_approved
+
+
+def test_invalid_requests(client, organizer):
+    login(client, organizer)
+    assert bulk(client, action='archive', ids=[1]).status_code == 400
+    assert bulk(client, action='approve').status_code == 400
+    assert bulk(client, action='approve', ids=['1']).status_code == 400
+    assert bulk(client, action='approve', filter={'since': 'yesterday'}).get_json() == {'error': 'Invalid filter'}
+
+
+def snapshot(event_ids):
+    db.session.expire_all()
+    columns = [column.name for column in EventStats.__table__.columns if column.name != 'updated_at']
+    stats = {event_id: {name: getattr(db.session.get(EventStats, event_id), name) for name in columns}
+             for event_id in event_ids}
+    terms = {event_id: dict(EventTerm.top_terms(limit=100, event_id=event_id)) for event_id in event_ids}
+    return stats, terms
+
+
+def test_bulk_actions_apply_deltas_equal_to_a_rebuild(client, queries, organizer, event):
+    other = make_event(organizer, title='Autumn Gala')
+    for n in range(8):
+        make_review(event if n % 2 else other, f'guest{n}@example.com', star_rating=n % 5 + 1,
+                    would_recommend=n % 3 == 0, category_mask=n % 16,
+                    review_text=f'loud hall {n}' if n % 3 else 'great sound')
+    login(client, organizer)
+
+    queries.clear()
+    assert bulk(client, action='reject', filter={'star_rating': [1, 2, 3]}).get_json()['affected'] == 6
+    assert bulk(client, action='approve', filter={'event_id': other.id}).get_json()['affected'] == 3
+    assert bulk(client, action='delete', filter={'star_rating': [4, 5]}).get_json()['affected'] == 2
+    # Only the affected rows are read; no statement aggregates an event's reviews
+    assert not [sql for sql in queries if 'GROUP BY' in sql and 'reviews' in sql]
+
+    incremental = snapshot([event.id, other.id])
+    EventStats.rebuild()
+    EventTerm.rebuild()
+    db.session.commit()
+    assert snapshot([event.id, other.id]) == incremental
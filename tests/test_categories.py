@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+
+from app import db, ingest
+from app.models import REVIEW_CATEGORIES, EventStats, Review, categories_to_mask, mask_to_categories
+from tests.factories import login, make_review
+
+
+def test_mask_round_trips_in_category_order():
+    for mask in range(1 << len(REVIEW_CATEGORIES)):
+        assert categories_to_mask(mask_to_categories(mask)) == mask
+    assert categories_to_mask(['Well Organized', 'Great Sound', 'Great Sound']) == 0b1001
+    assert mask_to_categories(0b1001) == ['Great Sound', 'Well Organized']
+    assert mask_to_categories(None) == []
+
+
+def test_submitted_categories_are_counted_per_event(client, organizer, event):
+    response = client.post(f'/review/{event.unique_code}/submit', data={
+        'reviewer_name': 'Guest', 'reviewer_email': 'guest@example.com', 'star_rating': '5',
+        'great_sound': 'y', 'worth_price': 'y',
+    })
+    assert response.status_code == 302
+    review = Review.query.one()
+    assert review.get_categories() == ['Great Sound', 'Worth the Price']
+    assert review.to_dict()['categories'] == ['Great Sound', 'Worth the Price']
+
+    rejected = make_review(event, 'other@example.com', category_mask=categories_to_mask(['Great Sound']))
+    login(client, organizer)
+    client.post(f'/api/review/{rejected.id}/reject')
+
+    expected = {'Great Sound': 1, 'Good Venue': 0, 'Worth the Price': 1, 'Well Organized': 0}
+    db.session.expire_all()
+    assert event.get_category_breakdown() == expected
+    EventStats.rebuild([event.id])
+    db.session.commit()
+    assert event.get_category_breakdown() == expected
+
+
+def test_export_writes_category_names(client, organizer, event):
+    make_review(event, 'guest@example.com', category_mask=categories_to_mask(['Good Venue', 'Well Organized']))
+    login(client, organizer)
+    rows = list(csv.DictReader(io.StringIO(client.get(f'/event/{event.id}/export').get_data(as_text=True))))
+    assert rows[0]['Categories'] == 'Good Venue, Well Organized'
+
+
+def test_queued_payloads_from_before_the_mask_are_decoded(event):
+    review = Review(event_id=event.id, reviewer_name='Guest', reviewer_email='guest@example.com', star_rating=4)
+    review.fill_defaults()
+    values = json.loads(ingest.encode_review(review))
+    values.pop('category_mask')
+    values['review_categories'] = json.dumps(['Good Venue', 'Great Sound'])
+
+    decoded = ingest.decode_review(json.dumps(values))
+    assert decoded.category_mask == 0b0011
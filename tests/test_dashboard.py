@@ -0,0 +1,45 @@
+from tests.factories import login, make_event, make_review, make_user
+
+
+def add_events(organizer, count, reviews_per_event=3):
+    events = [make_event(organizer, title=f'Event {n}') for n in range(count)]
+    for event in events:
+        for n in range(reviews_per_event):
+            make_review(event, f'guest{n}@example.com', star_rating=n + 3)
+    return events
+
+
+def test_user_stats_are_aggregated_over_all_events(organizer):
+    events = add_events(organizer, 2)
+    make_review(events[0], 'rejected@example.com', star_rating=1, is_approved=False)
+    make_event(make_user('other'))
+
+    assert organizer.get_event_count() == 2
+    assert organizer.get_total_reviews() == 7
+    # Only approved reviews count towards the average
+    assert organizer.get_average_rating() == 4
+    assert [review.reviewer_email for review in organizer.get_recent_reviews(limit=2)] == \
+        ['guest2@example.com', 'guest1@example.com']
+
+
+def test_user_without_events(organizer):
+    assert organizer.get_event_count() == 0
+    assert organizer.get_total_reviews() == 0
+    assert organizer.get_average_rating() == 0
+
+
+def test_dashboard_query_count_does_not_grow_with_events(client, organizer, queries):
+    login(client, organizer)
+    add_events(organizer, 1)
+    # The first request after signing in loads the user into the snapshot cache
+    client.get('/dashboard')
+    queries.clear()
+    assert client.get('/dashboard').status_code == 200
+    few = len(queries)
+
+    add_events(organizer, 10)
+    queries.clear()
+    response = client.get('/dashboard')
+    assert response.status_code == 200
+    assert len(queries) == few
+    assert b'Event 9' in response.data
@@ -0,0 +1,67 @@
+from sqlalchemy import event as sa_event
+
+from app import db, email_filter
+from app.email_filter import BloomFilter
+from app.models import Review
+from tests.factories import make_review
+
+
+def check(client, event, email):
+    response = client.post('/api/check-email', json={'email': email, 'unique_code': event.unique_code})
+    return response.get_json()['exists']
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    emails = [f'guest{n}@example.com' for n in range(1000)]
+    for email in emails:
+        bloom.add(email)
+    assert all(email in bloom for email in emails)
+    false_positives = sum(f'other{n}@example.com' in bloom for n in range(10000))
+    assert false_positives < 300
+    assert not bloom.full
+
+
+def test_unused_emails_are_answered_without_a_review_query(client, event, queries):
+    make_review(event, 'taken@example.com')
+    assert check(client, event, 'taken@example.com')
+
+    queries.clear()
+    assert not check(client, event, 'new@example.com')
+    assert not [statement for statement in queries if 'FROM reviews' in statement]
+
+
+def test_commits_update_the_filter(client, event):
+    assert not check(client, event, 'guest@example.com')
+    review = make_review(event, 'guest@example.com')
+    assert check(client, event, 'guest@example.com')
+
+    db.session.delete(review)
+    db.session.commit()
+    assert not check(client, event, 'guest@example.com')
+
+
+def test_rolled_back_reviews_are_not_added(event):
+    email_filter.might_contain(event.id, 'x@example.com')
+    review = Review(event_id=event.id, reviewer_name='x', reviewer_email='x@example.com', star_rating=3)
+    db.session.add(review)
+    email_filter.reviews_added([review])
+    db.session.rollback()
+    assert not email_filter.might_contain(event.id, 'x@example.com')
+
+
+def test_a_build_racing_a_commit_is_not_cached(event):
+    def commit_during_build(conn, cursor, statement, *args):
+        if 'reviewer_email' in statement:
+            email_filter._changed(event.id)
+
+    sa_event.listen(db.engine, 'before_cursor_execute', commit_during_build)
+    try:
+        assert not email_filter.might_contain(event.id, 'guest@example.com')
+    finally:
+        sa_event.remove(db.engine, 'before_cursor_execute', commit_during_build)
+    assert email_filter._filters.get(event.id) is None
+    assert email_filter._builds == {}
+
+    email_filter.might_contain(event.id, 'guest@example.com')
+    assert email_filter._filters.get(event.id) is not None
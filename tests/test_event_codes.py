@@ -0,0 +1,83 @@
+import io
+import re
+from datetime import date
+
+from app import db
+from app.codes import CODE_SPACE, CodeAllocator, encode, event_codes, permute
+from app.models import CodeCounter, Event
+from tests.factories import login, make_event
+
+CODE = re.compile(r'^[0-9A-Z]{8}$')
+
+
+def test_permutation_is_injective_and_in_range():
+    key = b'test-key'
+    values = [permute(value, key) for value in range(20000)]
+    assert len(set(values)) == len(values)
+    assert all(0 <= value < CODE_SPACE for value in values)
+    assert encode(0) == '00000000' and encode(CODE_SPACE - 1) == 'ZZZZZZZZ'
+
+
+def test_allocated_codes_are_unique_and_skip_existing_ones(organizer):
+    allocator = CodeAllocator('test_code', key='k')
+    # An event created before the allocator happens to hold the first code
+    make_event(organizer, unique_code=encode(permute(0, allocator.key)))
+
+    codes = allocator.allocate(50) + allocator.allocate(5)
+    assert len(set(codes)) == 55
+    assert all(CODE.match(code) for code in codes)
+    assert encode(permute(0, allocator.key)) not in codes
+    assert db.session.get(CodeCounter, 'test_code').next_value == 56
+
+
+def test_rolled_back_allocation_releases_the_counter(organizer):
+    allocator = CodeAllocator('test_code', key='k')
+    allocator.allocate(3)
+    db.session.commit()
+    allocator.allocate(3)
+    db.session.rollback()
+    assert db.session.get(CodeCounter, 'test_code').next_value == 3
+
+
+def test_key_is_derived_from_the_secret_key_unless_configured(app):
+    app.config['EVENT_CODE_KEY'] = None
+    derived = event_codes.key
+    assert app.config['SECRET_KEY'].encode() not in derived
+    app.config['SECRET_KEY'] = 'another-secret'
+    assert event_codes.key != derived
+
+    app.config['EVENT_CODE_KEY'] = 'configured-key'
+    assert event_codes.key == b'configured-key'
+
+
+def test_import_creates_events_with_unique_codes(client, organizer, event):
+    login(client, organizer)
+    rows = [{'title': f'Talk {n}', 'category': 'Conference', 'venue': 'Room 1',
+             'event_date': date.today().isoformat(), 'capacity': 50} for n in range(3)]
+    response = client.post('/api/events/import', json={'events': rows})
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data['created'] == 3
+
+    csv_file = io.BytesIO(b'title,category,venue,event_date\nWorkshop,Conference,Lab,2030-01-31\n')
+    response = client.post('/api/events/import', data={'file': (csv_file, 'events.csv')})
+    assert response.status_code == 201
+
+    codes = [code for (code,) in db.session.query(Event.unique_code)]
+    assert len(codes) == len(set(codes)) == 5
+    assert {item['unique_code'] for item in data['events']} <= set(codes)
+
+
+def test_invalid_rows_abort_the_whole_import(client, organizer):
+    login(client, organizer)
+    rows = [{'title': 'Good', 'category': 'Conference', 'venue': 'Room 1', 'event_date': '2030-01-31'},
+            {'title': '', 'category': 'Conference', 'venue': 'Room 1', 'event_date': 'someday'}]
+    response = client.post('/api/events/import', json={'events': rows})
+    assert response.status_code == 400
+    errors = response.get_json()['rows']
+    assert [error['row'] for error in errors] == [2]
+    assert set(errors[0]['errors']) >= {'title', 'event_date'}
+    assert Event.query.count() == 0
+
+    assert client.post('/api/events/import', json={'events': []}).status_code == 400
+    assert client.post('/api/events/import', json=['not', 'rows']).status_code == 400
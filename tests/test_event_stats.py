@@ -0,0 +1,61 @@
+from app import db
+from app.models import EventStats, Review
+from tests.factories import login, make_review
+
+COUNTERS = ['review_count', 'approved_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4',
+            'rating_5', 'recommend_count', 'last_review_at']
+
+
+def snapshot(event_id):
+    db.session.expire_all()
+    stats = db.session.get(EventStats, event_id)
+    return {column: getattr(stats, column) for column in COUNTERS}
+
+
+def assert_matches_rebuild(event_id):
+    incremental = snapshot(event_id)
+    EventStats.rebuild([event_id])
+    db.session.commit()
+    assert incremental == snapshot(event_id)
+
+
+def test_submissions_update_aggregates(client, event):
+    for n, rating in enumerate([5, 4, 4, 1]):
+        response = client.post(f'/review/{event.unique_code}/submit', data={
+            'reviewer_name': f'Guest {n}', 'reviewer_email': f'guest{n}@example.com',
+            'star_rating': str(rating), 'would_recommend': 'y' if rating > 3 else '',
+        })
+        assert response.status_code == 302
+
+    stats = snapshot(event.id)
+    assert stats['review_count'] == stats['approved_count'] == 4
+    assert stats['rating_sum'] == 14
+    assert (stats['rating_1'], stats['rating_4'], stats['rating_5']) == (1, 2, 1)
+    assert stats['recommend_count'] == 3
+    assert event.get_average_rating() == 3.5
+    assert_matches_rebuild(event.id)
+
+
+def test_moderation_keeps_aggregates_in_step(client, organizer, event):
+    reviews = [make_review(event, f'guest{n}@example.com', star_rating=n % 5 + 1, would_recommend=n % 2 == 0)
+               for n in range(6)]
+    login(client, organizer)
+
+    assert client.post(f'/api/review/{reviews[0].id}/reject').status_code == 200
+    assert client.post(f'/api/review/{reviews[1].id}/reject').status_code == 200
+    assert client.post(f'/api/review/{reviews[1].id}/approve').status_code == 200
+    assert client.delete(f'/api/review/{reviews[2].id}/delete').status_code == 200
+    # Repeating a state change must not count twice
+    assert client.post(f'/api/review/{reviews[0].id}/reject').status_code == 200
+
+    stats = snapshot(event.id)
+    assert stats['review_count'] == 5
+    assert stats['approved_count'] == 4
+    assert_matches_rebuild(event.id)
+
+
+def test_rebuild_covers_events_without_reviews(event):
+    EventStats.rebuild()
+    db.session.commit()
+    assert snapshot(event.id)['review_count'] == 0
+    assert Review.query.count() == 0
@@ -0,0 +1,52 @@
+from app import db
+from app.models import EventTerm
+from app.utils import count_terms
+from tests.factories import login, make_event, make_review, make_user
+
+
+def counts(event_id):
+    db.session.expire_all()
+    return dict(EventTerm.top_terms(limit=100, event_id=event_id))
+
+
+def test_count_terms_drops_stop_words_and_punctuation():
+    assert count_terms('The sound was GREAT, great sound!') == {'sound': 2, 'great': 2}
+    assert count_terms(None) == {}
+
+
+def test_moderation_keeps_counts_equal_to_a_rebuild(client, organizer, event):
+    reviews = [make_review(event, 'a@example.com', review_text='Great sound and great venue'),
+               make_review(event, 'b@example.com', review_text='Venue too loud'),
+               make_review(event, 'c@example.com', review_text='Loud crowd')]
+    assert counts(event.id) == {'great': 2, 'sound': 1, 'venue': 2, 'too': 1, 'loud': 2, 'crowd': 1}
+
+    login(client, organizer)
+    assert client.post(f'/api/review/{reviews[1].id}/reject').status_code == 200
+    assert client.delete(f'/api/review/{reviews[2].id}/delete').status_code == 200
+    incremental = counts(event.id)
+    # Terms whose count reaches zero are removed
+    assert incremental == {'great': 2, 'sound': 1, 'venue': 1}
+
+    EventTerm.rebuild([event.id])
+    db.session.commit()
+    assert counts(event.id) == incremental
+
+
+def test_keyword_endpoints(client, organizer, event):
+    other = make_event(organizer, title='Autumn Gala')
+    make_review(event, 'a@example.com', review_text='great great sound')
+    make_review(other, 'b@example.com', review_text='great food')
+    login(client, organizer)
+
+    response = client.get(f'/api/event/{event.id}/keywords', query_string={'limit': 1})
+    assert response.get_json() == {'keywords': [{'term': 'great', 'count': 2}]}
+
+    keywords = client.get('/api/keywords').get_json()['keywords']
+    assert keywords[0] == {'term': 'great', 'count': 3}
+    assert {keyword['term'] for keyword in keywords} == {'great', 'sound', 'food'}
+
+
+def test_keywords_are_limited_to_the_owner(client, event):
+    login(client, make_user('someone'))
+    assert client.get(f'/api/event/{event.id}/keywords').status_code == 403
+    assert client.get('/api/keywords').get_json() == {'keywords': []}
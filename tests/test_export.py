@@ -0,0 +1,70 @@
+import csv
+import gzip
+from io import StringIO
+
+from app.models import Review
+from app.utils import stream_csv
+from tests.factories import login, make_event, make_review, make_user
+
+
+def read_csv(data):
+    return list(csv.reader(StringIO(data.decode('utf-8'))))
+
+
+def test_export_streams_every_review(client, organizer, event):
+    for n in range(3):
+        make_review(event, f'guest{n}@example.com', star_rating=n + 1, review_text=f'Review "{n}", ok')
+    login(client, organizer)
+
+    response = client.get(f'/event/{event.id}/export')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert 'attachment' in response.headers['Content-Disposition']
+
+    rows = read_csv(response.data)
+    assert rows[0] == Review.EXPORT_FIELDNAMES
+    assert [row[2] for row in rows[1:]] == [f'guest{n}@example.com' for n in range(3)]
+    assert rows[1][4] == 'Review "0", ok'
+
+
+def test_gzip_export_decompresses_to_the_same_csv(client, organizer, event):
+    make_review(event, 'guest@example.com')
+    login(client, organizer)
+
+    plain = client.get(f'/event/{event.id}/export').data
+    response = client.get(f'/event/{event.id}/export', query_string={'gzip': '1'})
+    assert response.mimetype == 'application/gzip'
+    assert response.headers['Content-Disposition'].endswith('.csv.gz"')
+    assert gzip.decompress(response.data) == plain
+
+
+def test_export_is_limited_to_the_owner(client, event):
+    login(client, make_user('someone'))
+    response = client.get(f'/event/{event.id}/export')
+    assert response.status_code == 302
+
+
+def test_stream_csv_yields_in_chunks():
+    rows = ([n, f'row {n}'] for n in range(10))
+    chunks = list(stream_csv(['n', 'label'], rows, flush_every=4))
+    # header, two full chunks of four and the remaining two rows
+    assert len(chunks) == 4
+    assert read_csv(b''.join(chunks))[-1] == ['9', 'row 9']
+
+    compressed = b''.join(stream_csv(['n'], ([n] for n in range(5)), compress=True))
+    assert read_csv(gzip.decompress(compressed)) == [['n']] + [[str(n)] for n in range(5)]
+
+
+def test_non_ascii_titles_get_an_encoded_file_name(client, organizer):
+    event = make_event(organizer, title='音楽 Night')
+    make_review(event, 'guest@example.com')
+    login(client, organizer)
+
+    response = client.get(f'/event/{event.id}/export')
+    assert response.status_code == 200
+    disposition = response.headers['Content-Disposition']
+    # The header must be sendable by a WSGI server
+    disposition.encode('latin-1')
+    assert 'filename=" Night_reviews.csv"' in disposition
+    assert "filename*=UTF-8''%E9%9F%B3%E6%A5%BD%20Night_reviews.csv" in disposition
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from app import db, helpful_votes
+from app.http_cache import pages
+from app.models import EventStats, Review
+from tests.factories import make_review
+
+ORIGIN = {'Origin': 'http://localhost'}
+
+
+@pytest.fixture(autouse=True)
+def manual_flush(monkeypatch):
+    # Votes are flushed by the tests themselves rather than the background thread
+    monkeypatch.setattr(helpful_votes, 'ensure_flusher', lambda app: None)
+
+
+@pytest.fixture
+def review(event):
+    return make_review(event, 'guest@example.com')
+
+
+def vote(client, review_id, address='10.0.0.1', headers=ORIGIN):
+    return client.post(f'/api/review/{review_id}/helpful', headers=headers,
+                       environ_overrides={'REMOTE_ADDR': address})
+
+
+def stored_votes(review):
+    return db.session.scalar(db.select(Review.helpful_votes).where(Review.id == review.id))
+
+
+def test_sharded_counter_loses_no_increments():
+    counter = helpful_votes.ShardedCounter(shards=4)
+
+    def add():
+        for _ in range(2000):
+            counter.add('key')
+
+    threads = [threading.Thread(target=add) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.get('key') == 16000
+    assert counter.drain() == {'key': 16000}
+    assert counter.get('key') == 0
+
+
+def test_concurrent_votes_are_all_written(app, review):
+    # Threads have no app context to load an expired instance with
+    review_id = review.id
+
+    def voter(thread):
+        for n in range(25):
+            # A new client has no session cookie, so each vote is a new visitor
+            assert vote(app.test_client(), review_id, address=f'10.{thread}.0.{n}').get_json()['counted']
+
+    threads = [threading.Thread(target=voter, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert helpful_votes.count(review) == 200
+    assert helpful_votes.flush(app) == 200
+    db.session.expire_all()
+    assert stored_votes(review) == 200 == helpful_votes.count(review)
+
+
+def test_each_visitor_and_client_counts_once(app, client, review):
+    assert vote(client, review.id).get_json()['counted']
+    assert not vote(client, review.id).get_json()['counted']
+    # Without the cookie, the same address and browser are still the same client
+    assert not vote(app.test_client(), review.id).get_json()['counted']
+    # And the same cookie from another address is still the same visitor
+    assert not vote(client, review.id, address='10.0.0.2').get_json()['counted']
+    assert vote(app.test_client(), review.id, address='10.0.0.3').get_json()['counted']
+    assert helpful_votes.flush(app) == 2
+
+
+def test_cross_site_votes_are_refused(client, review):
+    assert vote(client, review.id, headers={}).status_code == 403
+    assert vote(client, review.id, headers={'Origin': 'https://evil.example'}).status_code == 403
+    assert vote(client, review.id, headers={'Referer': 'http://localhost/review/x/browse'}).status_code == 200
+
+    review.is_approved = False
+    db.session.commit()
+    assert vote(client, review.id, address='10.0.0.9').status_code == 404
+
+
+def test_flushes_refresh_an_event_once_per_interval(app, client, event, review):
+    browse = f'/review/{event.unique_code}/browse'
+    client.get(browse)
+    assert len(pages) == 1
+
+    vote(client, review.id)
+    helpful_votes.flush(app)
+    # The first flush for the event evicts its cached pages and bumps their validator
+    assert len(pages) == 0
+    db.session.expire_all()
+    version = db.session.get(EventStats, event.id).updated_at
+
+    client.get(browse)
+    for n in range(3):
+        vote(app.test_client(), review.id, address=f'10.0.1.{n}')
+        helpful_votes.flush(app)
+    # Later flushes within HELPFUL_VOTES_REFRESH_INTERVAL only write the counts
+    assert len(pages) == 1
+    db.session.expire_all()
+    assert db.session.get(EventStats, event.id).updated_at == version
+    assert stored_votes(review) == 4
@@ -0,0 +1,53 @@
+from tests.factories import login, make_review
+
+
+def test_browse_page_is_revalidated_and_served_from_cache(client, event, queries):
+    make_review(event, 'a@example.com')
+    url = f'/review/{event.unique_code}/browse'
+
+    first = client.get(url)
+    etag = first.headers['ETag'].strip('"')
+    assert 'public' in first.headers['Cache-Control']
+    assert client.get(url, headers={'If-None-Match': f'"{etag}"'}).status_code == 304
+
+    queries.clear()
+    cached = client.get(url)
+    assert cached.data == first.data
+    # Only the validator lookup runs; the reviews are not queried again
+    assert len(queries) == 1
+
+
+def test_a_new_review_changes_the_validator(client, event):
+    make_review(event, 'a@example.com')
+    url = f'/review/{event.unique_code}/browse'
+    etag = client.get(url).headers['ETag']
+
+    make_review(event, 'secondguest@example.com')
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert b'secondguest' in response.data
+
+
+def test_editing_the_event_evicts_its_pages(client, organizer, event):
+    make_review(event, 'a@example.com')
+    url = f'/review/{event.unique_code}/browse'
+    client.get(url)
+
+    login(client, organizer)
+    response = client.post(f'/event/{event.id}/edit', data={
+        'title': 'Summer Concert', 'category': event.category, 'venue': event.venue,
+        'event_date': event.event_date.isoformat(), 'capacity': event.capacity,
+    })
+    assert response.status_code == 302
+    client.get('/auth/logout')
+    assert b'Summer Concert' in client.get(url).data
+
+
+def test_signed_in_users_and_forms_are_not_shared(client, organizer, event):
+    make_review(event, 'a@example.com')
+    form = client.get(f'/review/{event.unique_code}')
+    assert 'private' in form.headers['Cache-Control']
+
+    login(client, organizer)
+    assert 'ETag' not in client.get(f'/review/{event.unique_code}/browse').headers
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import text, tuple_
+
+from app import db
+from app.models import Event, Review
+
+
+def query_plan(query):
+    sql = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')).all()
+    return ' '.join(row[-1] for row in rows)
+
+
+def test_review_pages_use_the_covering_index(event):
+    approved = Review.query.filter_by(event_id=event.id, is_approved=True)
+    later_page = approved.filter(tuple_(Review.submitted_at, Review.id) < (datetime(2026, 1, 1), 10))
+    for query in (approved, later_page):
+        plan = query_plan(query.order_by(Review.submitted_at.desc(), Review.id.desc()).limit(21))
+        assert 'ix_reviews_event_approved_submitted' in plan
+        assert 'TEMP B-TREE' not in plan
+
+
+def test_sorted_review_pages_use_their_indexes(event):
+    approved = Review.query.filter_by(event_id=event.id, is_approved=True)
+    for column, index in ((Review.quality_score, 'ix_reviews_event_approved_quality'),
+                          (Review.helpful_votes, 'ix_reviews_event_approved_helpful')):
+        plan = query_plan(approved.order_by(column.desc(), Review.id.desc()).limit(21))
+        assert index in plan
+        assert 'TEMP B-TREE' not in plan
+
+
+def test_dashboard_events_use_the_user_index(organizer):
+    plan = query_plan(Event.query.filter_by(user_id=organizer.id))
+    assert 'ix_events_user_id' in plan
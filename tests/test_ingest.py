@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from app import db, ingest
+from app.models import EventStats, Review
+
+
+@pytest.fixture(autouse=True)
+def queued_submissions(monkeypatch):
+    monkeypatch.setenv('REVIEW_INGEST', 'queue')
+    monkeypatch.setenv('REVIEW_INGEST_BACKEND', 'memory')
+    monkeypatch.setenv('REVIEW_INGEST_MAX_PENDING', '3')
+    # Batches are drained by the tests themselves rather than the background thread
+    monkeypatch.setattr(ingest, 'ensure_worker', lambda app: None)
+
+
+def submit(client, event, email):
+    return client.post(f'/review/{event.unique_code}/submit', data={
+        'reviewer_name': 'Guest', 'reviewer_email': email, 'star_rating': '5',
+    })
+
+
+def drain(app):
+    return ingest.IngestWorker(app, ingest.get_queue(app), batch_size=10).drain_once()
+
+
+def test_queued_submissions_are_written_in_one_batch(app, client, event):
+    tickets = []
+    for email in ('a@example.com', 'b@example.com', 'a@example.com'):
+        response = submit(client, event, email)
+        assert response.status_code == 302
+        tickets.append(response.location.split('ticket=')[1])
+    assert client.get(f'/api/submissions/{tickets[0]}').get_json()['status'] == ingest.PENDING
+
+    assert drain(app) == 3
+    statuses = [client.get(f'/api/submissions/{ticket}').get_json()['status'] for ticket in tickets]
+    assert statuses == [ingest.CREATED, ingest.CREATED, ingest.DUPLICATE]
+    db.session.expire_all()
+    assert Review.query.count() == db.session.get(EventStats, event.id).review_count == 2
+    assert client.get('/api/submissions/unknown').status_code == 404
+
+
+def test_a_full_queue_pushes_back(client, event):
+    for n in range(3):
+        assert submit(client, event, f'guest{n}@example.com').status_code == 302
+    response = submit(client, event, 'late@example.com')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+
+
+def test_batch_marks_duplicates(app, event):
+    queue = ingest.MemoryQueue()
+    for ticket, email in (('t1', 'a@example.com'), ('t2', 'a@example.com'), ('t3', 'b@example.com')):
+        review = Review(event_id=event.id, reviewer_name='Guest', reviewer_email=email, star_rating=4)
+        review.fill_defaults()
+        queue.put(ticket, ingest.encode_review(review))
+    ingest.process_batch(queue, queue.claim(10))
+    assert [queue.status(ticket) for ticket in ('t1', 't2', 't3')] == [ingest.CREATED, ingest.DUPLICATE,
+                                                                         ingest.CREATED]
+
+
+def test_a_bad_item_is_retried_alone_then_failed(app, event):
+    queue = ingest.MemoryQueue()
+    good = Review(event_id=event.id, reviewer_name='Guest', reviewer_email='a@example.com', star_rating=4)
+    good.fill_defaults()
+    queue.put('good', ingest.encode_review(good))
+    queue.put('bad', json.dumps({'no_such_column': 1, 'submitted_at': '2026-01-01T00:00:00'}))
+
+    ingest.process_batch(queue, queue.claim(10))
+    assert (queue.status('good'), queue.status('bad')) == (ingest.CREATED, ingest.PENDING)
+    for _ in range(ingest.MAX_ATTEMPTS - 1):
+        ingest.process_batch(queue, queue.claim(10))
+    assert queue.status('bad') == ingest.FAILED
+    assert queue.depth() == 0
+
+
+def test_sqlite_queue_recovers_stale_claims(tmp_path, monkeypatch):
+    queue = ingest.SQLiteQueue(str(tmp_path / 'queue.sqlite3'))
+    queue.put('t1', '{}')
+    assert queue.claim(5) == [('t1', '{}')]
+    assert queue.claim(5) == []
+
+    monkeypatch.setattr(ingest, 'STALE_CLAIM_SECONDS', -1)
+    assert queue.claim(5) == [('t1', '{}')]
+    queue.complete({'t1': ingest.CREATED})
+    assert (queue.status('t1'), queue.depth()) == (ingest.CREATED, 0)
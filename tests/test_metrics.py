@@ -0,0 +1,50 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from tests.factories import make_review
+
+
+@pytest.fixture
+def metrics_on(monkeypatch):
+    # Requested before app/client so create_app() sees the settings
+    monkeypatch.setenv('METRICS_ENABLED', 'True')
+    monkeypatch.setenv('METRICS_TOKEN', 'scrape-token')
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def scrape(client):
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'})
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def test_metrics_are_off_by_default(client):
+    assert client.get('/metrics').status_code == 404
+
+
+def test_requests_record_latency_and_sql_work(metrics_on, client, event):
+    make_review(event, 'guest@example.com')
+    url = f'/review/{event.unique_code}/browse'
+    labels = {'endpoint': 'main.browse_reviews', 'method': 'GET', 'status': '200'}
+    before = sample('http_request_duration_seconds_count', **labels)
+    statements = sample('http_request_db_statements_sum', endpoint='main.browse_reviews')
+
+    # Samples are recorded when the response is closed
+    for _ in range(2):
+        client.get(url).close()
+    assert sample('http_request_duration_seconds_count', **labels) == before + 2
+    assert sample('http_request_db_statements_sum', endpoint='main.browse_reviews') > statements
+
+    text = scrape(client)
+    assert 'http_request_db_seconds_bucket{endpoint="main.browse_reviews"' in text
+    # The second request was served from the page cache
+    assert 'cache_requests_total{cache="pages",result="hit"}' in text
+
+
+def test_scrapes_need_the_token(metrics_on, client):
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert 'db_statements_total' in scrape(client)
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from app import db
+from tests.factories import login, make_review
+
+
+def add_reviews(event, count, ties=True):
+    start = datetime(2026, 1, 1, 12)
+    reviews = []
+    for n in range(count):
+        # Groups of three share a timestamp, so the id must break ties
+        submitted_at = start + timedelta(minutes=n // 3 if ties else n)
+        reviews.append(make_review(event, f'guest{n}@example.com', star_rating=n % 5 + 1,
+                                   submitted_at=submitted_at))
+    return reviews
+
+
+def fetch_all(client, url, per_page):
+    ids, cursor, pages = [], None, 0
+    while True:
+        response = client.get(url, query_string={'per_page': per_page, 'cursor': cursor})
+        assert response.status_code == 200
+        data = response.get_json()
+        ids += [review['id'] for review in data['reviews']]
+        pages += 1
+        cursor = data['next_cursor']
+        if not cursor:
+            return ids, pages
+
+
+def test_pages_cover_every_approved_review_once(client, event):
+    reviews = add_reviews(event, 23)
+    reviews[4].is_approved = False
+    db.session.commit()
+
+    ids, pages = fetch_all(client, f'/api/review/{event.unique_code}/reviews', per_page=5)
+
+    expected = [review.id for review in sorted(reviews, key=lambda r: (r.submitted_at, r.id), reverse=True)
+                if review.is_approved]
+    assert ids == expected
+    assert pages == 5
+
+
+def test_organizer_list_pages_without_duplicates(client, organizer, event):
+    add_reviews(event, 7, ties=False)
+    login(client, organizer)
+    ids, _ = fetch_all(client, f'/api/event/{event.id}/reviews', per_page=3)
+    assert len(ids) == len(set(ids)) == 7
+
+
+def test_browse_page_links_to_the_next_page(client, event):
+    add_reviews(event, 25, ties=False)
+    response = client.get(f'/review/{event.unique_code}/browse')
+    assert response.status_code == 200
+    assert b'data-load-more' in response.data
+
+    cursor = client.get(f'/api/review/{event.unique_code}/reviews').get_json()['next_cursor']
+    second = client.get(f'/review/{event.unique_code}/browse', query_string={'cursor': cursor})
+    assert second.status_code == 200
+    assert b'data-load-more' not in second.data
+
+
+def test_malformed_cursor_is_rejected(client, event):
+    add_reviews(event, 3)
+    response = client.get(f'/api/review/{event.unique_code}/reviews', query_string={'cursor': 'not-a-cursor'})
+    assert response.status_code == 400
+    assert client.get(f'/review/{event.unique_code}/browse', query_string={'cursor': '%%%'}).status_code == 400
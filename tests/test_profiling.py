@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+
+import pytest
+
+from app import profiling
+from tests.factories import login, make_user
+
+TOKEN = {'X-Profile-Token': 'profile-token'}
+
+
+@pytest.fixture
+def profiling_on(monkeypatch, tmp_path):
+    # Requested before app/client so create_app() sees the settings
+    monkeypatch.setenv('PROFILING_TOKEN', 'profile-token')
+    monkeypatch.setenv('PROFILING_ADMIN_IDS', '1')
+    monkeypatch.setenv('PROFILING_INTERVAL', '0.001')
+    monkeypatch.setenv('PROFILING_DIR', str(tmp_path / 'profiles'))
+
+
+def test_profiling_is_off_by_default(client):
+    assert client.get('/admin/profiles', headers=TOKEN).status_code == 404
+
+
+def test_token_requests_write_a_profile(profiling_on, app, client, event):
+    assert client.get(f'/review/{event.unique_code}', headers=TOKEN).status_code == 200
+    assert client.get(f'/review/{event.unique_code}').status_code == 200
+
+    profiles = profiling.list_profiles(profiling.profile_dir(app))
+    assert [profile['endpoint'] for profile in profiles] == ['main.review_form']
+    assert profiles[0]['kind'] == 'folded'
+
+    page = client.get('/admin/profiles', headers=TOKEN)
+    assert page.status_code == 200 and b'main.review_form' in page.data
+    download = client.get(f"/admin/profiles/{profiles[0]['name']}", headers=TOKEN)
+    assert download.status_code == 200
+
+
+def test_cprofile_mode(profiling_on, app, client, event):
+    app.config['PROFILING_MODE'] = 'cprofile'
+    client.get(f'/review/{event.unique_code}/browse', headers=TOKEN)
+    directory = profiling.profile_dir(app)
+    paths = [os.path.join(directory, profile['name']) for profile in profiling.list_profiles(directory)]
+    assert paths[0].endswith('.pstats')
+    assert profiling.top_profiled_functions(paths)
+
+
+def test_profile_pages_are_for_admin_ids_only(profiling_on, client, organizer):
+    other = make_user('someone')
+    assert organizer.id == 1 and other.id == 2
+
+    login(client, other)
+    assert client.get('/admin/profiles').status_code == 404
+    client.get('/auth/logout')
+    login(client, organizer)
+    assert client.get('/admin/profiles').status_code == 200
+    assert client.get('/admin/profiles/notes.txt').status_code == 404
+
+
+def test_sampler_collapses_stacks_and_rotation_keeps_the_newest(tmp_path):
+    sampler = profiling.StackSampler(threading.get_ident(), 0.001)
+    sampler.start()
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    sampler.stop()
+    path = tmp_path / '1_main.index_5ms.folded'
+    sampler.write(path)
+    top = profiling.top_sampled_functions([path])
+    assert any('test_sampler_collapses_stacks' in frame for frame, _, _ in top)
+
+    for n in range(5):
+        (tmp_path / f'{n + 2}_main.index_5ms.folded').write_text('a 1\n')
+    profiling.rotate(tmp_path, 3)
+    assert sorted(os.listdir(tmp_path)) == [f'{n}_main.index_5ms.folded' for n in (4, 5, 6)]
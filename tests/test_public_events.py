@@ -0,0 +1,44 @@
+from datetime import date
+
+from app import db
+from app.public_events import PublicEvent, resolve_event
+from tests.factories import login, make_review
+
+
+def test_resolved_events_are_cached(event, queries):
+    resolved = resolve_event(event.unique_code)
+    assert isinstance(resolved, PublicEvent)
+    assert (resolved.id, resolved.title, resolved.event_date) == (event.id, event.title, event.event_date)
+
+    queries.clear()
+    assert resolve_event(event.unique_code).title == event.title
+    assert queries == []
+    assert resolve_event('NOPE1234') is None
+
+
+def test_aggregates_are_read_live(event):
+    resolved = resolve_event(event.unique_code)
+    assert resolved.get_review_count() == 0
+    make_review(event, 'a@example.com', star_rating=4)
+    resolved = resolve_event(event.unique_code)
+    assert (resolved.get_review_count(), resolved.get_average_rating()) == (1, 4.0)
+
+
+def test_edit_and_delete_invalidate(client, organizer, event):
+    code = event.unique_code
+    resolve_event(code)
+
+    login(client, organizer)
+    # Leaving allow_reviews unchecked turns reviews off
+    client.post(f'/event/{event.id}/edit', data={
+        'title': 'Summer Concert', 'category': event.category, 'venue': event.venue,
+        'event_date': date.today().isoformat(), 'capacity': event.capacity,
+    })
+    resolved = resolve_event(code)
+    assert (resolved.title, resolved.allow_reviews) == ('Summer Concert', False)
+    assert b'Reviews Not Available' in client.get(f'/review/{code}').data
+
+    db.session.delete(event)
+    db.session.commit()
+    assert resolve_event(code) is None
+    assert client.get(f'/review/{code}/browse').status_code == 404
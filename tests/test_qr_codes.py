@@ -0,0 +1,55 @@
+import os
+import zipfile
+from io import BytesIO
+
+from app.utils import QRCodeStore, get_storage_dir
+from tests.factories import login, make_event
+
+
+def test_qr_code_is_cached_and_answers_conditional_requests(client, organizer, event):
+    login(client, organizer)
+    first = client.get(f'/event/{event.id}/qr')
+    assert first.status_code == 200
+    assert first.mimetype == 'image/png'
+    etag = first.headers['ETag']
+
+    again = client.get(f'/event/{event.id}/qr', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+
+    larger = client.get(f'/event/{event.id}/qr', query_string={'size': 20})
+    assert larger.headers['ETag'] != etag
+    assert len(os.listdir(get_storage_dir('qr_codes'))) == 2
+
+
+def test_zip_contains_one_image_per_event(client, organizer, event):
+    make_event(organizer, title='Autumn Gala')
+    login(client, organizer)
+    response = client.get('/events/qr-codes.zip', query_string={'format': 'svg'})
+    assert response.status_code == 200
+
+    with zipfile.ZipFile(BytesIO(response.data)) as archive:
+        names = archive.namelist()
+    assert len(names) == 2
+    assert all(name.endswith('_QR.svg') for name in names)
+
+
+def test_sweep_caps_files_and_removes_legacy_ones(app):
+    store = QRCodeStore(max_entries=4, max_files=3)
+    directory = get_storage_dir('qr_codes')
+    for name in ('qr_code_1_20250101.png', 'leftover.png.1.2.tmp'):
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(b'old')
+    stale = os.path.join(directory, 'leftover.png.1.2.tmp')
+    os.utime(stale, (0, 0))
+
+    for n in range(5):
+        key, _ = store.get(f'https://example.com/review/{n}')
+        # Distinct mtimes, oldest first, whatever the filesystem's timestamp resolution
+        os.utime(os.path.join(directory, f'{key}.png'), (1000 + n, 1000 + n))
+    store.sweep(directory)
+
+    files = os.listdir(directory)
+    assert len(files) == 3
+    assert all(QRCodeStore.FILE_NAME.match(name) for name in files)
+    # The three most recent renders survive
+    assert {f'{store.key(f"https://example.com/review/{n}")}.png' for n in (2, 3, 4)} == set(files)
@@ -0,0 +1,57 @@
+import logging
+
+import pytest
+from flask import render_template_string
+
+from app import db
+from app.models import Review
+from app.query_budget import QueryBudgetExceeded, query_budget, statement_shape
+from tests.factories import make_review
+
+LOOP = '{% for id in ids %}{{ load(id).star_rating }}{% endfor %}'
+
+
+@pytest.fixture
+def n_plus_one(app, event):
+    """Routes that load each review with its own query, from a template loop"""
+    ids = [make_review(event, f'guest{n}@example.com').id for n in range(8)]
+
+    def render():
+        db.session.expire_all()
+        return render_template_string(LOOP, ids=ids, load=lambda review_id: db.session.get(Review, review_id))
+
+    app.add_url_rule('/n-plus-one', 'n_plus_one', render)
+    app.add_url_rule('/n-plus-one/allowed', 'n_plus_one_allowed', query_budget(max_repeats=10)(render))
+    return ids
+
+
+def test_statement_shape_collapses_in_lists_and_columns():
+    statement = 'SELECT reviews.id, reviews.event_id, reviews.reviewer_name, reviews.reviewer_email, ' \
+                'reviews.star_rating FROM reviews\n  WHERE reviews.id IN (?, ?, ?)'
+    assert statement_shape(statement) == 'SELECT … FROM reviews WHERE reviews.id IN (?)'
+
+
+def test_repeated_statements_raise_while_testing(client, n_plus_one):
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        client.get('/n-plus-one')
+    message = str(excinfo.value)
+    assert 'statement repeated 8 times (limit 5)' in message
+    assert 'template <string>:1' in message
+
+
+def test_routes_can_raise_their_budget(client, n_plus_one):
+    assert client.get('/n-plus-one/allowed').status_code == 200
+
+
+def test_warn_mode_logs_instead(app, client, n_plus_one, caplog):
+    app.config['TESTING'] = False
+    with caplog.at_level(logging.WARNING):
+        assert client.get('/n-plus-one').status_code == 200
+    assert 'Query budget exceeded in n_plus_one' in caplog.text
+
+
+def test_app_routes_stay_within_budget(client, event):
+    for n in range(30):
+        make_review(event, f'guest{n}@example.com')
+    assert client.get(f'/review/{event.unique_code}/browse').status_code == 200
+    assert client.get(f'/api/review/{event.unique_code}/reviews').status_code == 200
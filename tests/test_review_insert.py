@@ -0,0 +1,45 @@
+from app import db
+from app.models import EventStats, Review
+
+
+def review(event, email, **values):
+    return Review(event_id=event.id, reviewer_name='Guest', reviewer_email=email, star_rating=4, **values)
+
+
+def submit(client, event, email):
+    return client.post(f'/review/{event.unique_code}/submit', data={
+        'reviewer_name': 'Guest', 'reviewer_email': email, 'star_rating': '4',
+    }, follow_redirects=True)
+
+
+def test_insert_if_absent_reports_duplicates(event, queries):
+    first = review(event, 'guest@example.com')
+    queries.clear()
+    assert first.insert_if_absent()
+    assert len(queries) == 1
+    assert first.id is not None
+    # Column defaults are filled in without a reload
+    assert (first.is_approved, first.helpful_votes) == (True, 0) and first.submitted_at is not None
+
+    assert not review(event, 'guest@example.com').insert_if_absent()
+    assert Review.query.count() == 1
+
+
+def test_insert_many_keeps_the_first_of_each_reviewer(event):
+    review(event, 'a@example.com').insert_if_absent()
+    batch = [review(event, 'a@example.com'), review(event, 'b@example.com'),
+             review(event, 'b@example.com', review_text='second try'), review(event, 'c@example.com')]
+    created = Review.insert_many_if_absent(batch)
+    assert [r.reviewer_email for r in created] == ['b@example.com', 'c@example.com']
+    assert created[0] is batch[1]
+    assert Review.query.count() == 3
+    assert Review.insert_many_if_absent([]) == []
+
+
+def test_duplicate_submission_is_answered_not_counted(client, event):
+    assert b'Thank you for your review!' in submit(client, event, 'guest@example.com').data
+    assert b'already submitted' in submit(client, event, 'guest@example.com').data
+
+    db.session.expire_all()
+    assert Review.query.count() == 1
+    assert db.session.get(EventStats, event.id).review_count == 1
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Review, categories_to_mask
+from app.utils import decode_cursor, encode_cursor
+from tests.factories import make_review
+
+
+def fetch_all(client, event, sort, per_page=2):
+    url = f'/api/review/{event.unique_code}/reviews'
+    reviews, cursor = [], None
+    while True:
+        data = client.get(url, query_string={'sort': sort, 'per_page': per_page, 'cursor': cursor}).get_json()
+        reviews += data['reviews']
+        cursor = data['next_cursor']
+        if not cursor:
+            return reviews
+
+
+def test_quality_score_is_stored_on_every_write(event):
+    review = make_review(event, 'guest@example.com', star_rating=3, review_text='x' * 120,
+                         category_mask=categories_to_mask(['Great Sound', 'Good Venue']), would_recommend=True)
+    assert review.quality_score == 30 + 12 + 10 + 20
+
+    review.star_rating = 5
+    db.session.commit()
+    assert db.session.scalar(db.select(Review.quality_score).where(Review.id == review.id)) == 92
+
+
+def test_sorted_pages_cover_every_review_in_order(client, event):
+    for n in range(7):
+        review = make_review(event, f'guest{n}@example.com', star_rating=n % 5 + 1)
+        review.helpful_votes = n % 3
+    db.session.commit()
+
+    for sort, key in (('quality', 'quality_score'), ('helpful', 'helpful_votes')):
+        reviews = fetch_all(client, event, sort)
+        assert len({review['id'] for review in reviews}) == 7
+        assert reviews == sorted(reviews, key=lambda r: (r[key], r['id']), reverse=True)
+    assert client.get(f'/api/review/{event.unique_code}/reviews', query_string={'sort': 'oldest'}).status_code == 400
+
+
+def test_cursors_are_bound_to_their_sort(client, event):
+    for n in range(3):
+        make_review(event, f'guest{n}@example.com')
+    url = f'/api/review/{event.unique_code}/reviews'
+    cursor = client.get(url, query_string={'sort': 'quality', 'per_page': 1}).get_json()['next_cursor']
+
+    response = client.get(url, query_string={'sort': 'helpful', 'cursor': cursor})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Cursor was issued for sort=quality, not sort=helpful'
+    assert client.get(f'/review/{event.unique_code}/browse',
+                      query_string={'sort': 'newest', 'cursor': cursor}).status_code == 400
+
+
+def test_cursor_encoding_round_trips():
+    cursor = encode_cursor('helpful', 0, 42)
+    assert decode_cursor(cursor, 'helpful', int) == (0, 42)
+    assert decode_cursor(None, 'helpful', int) is None
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 'quality', int)
+    with pytest.raises(ValueError):
+        decode_cursor('helpful|x|1', 'helpful', int)
+
+
+def test_helpful_votes_cannot_be_null(event):
+    review = make_review(event, 'guest@example.com')
+    assert review.helpful_votes == 0
+    # A NULL would drop the review out of (helpful_votes, id) keyset pages
+    with pytest.raises(IntegrityError):
+        db.session.execute(db.text('UPDATE reviews SET helpful_votes = NULL'))
+    db.session.rollback()
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from app.models import Review
+from app.search import _escape_like, search_reviews, search_terms
+from tests.factories import make_event, make_review
+
+
+def test_search_is_scoped_to_the_event(organizer, event):
+    other = make_event(organizer, title='Autumn Gala')
+    mine = make_review(event, 'a@example.com', review_text='The acoustics were superb')
+    make_review(other, 'b@example.com', review_text='Superb acoustics here too')
+    make_review(event, 'c@example.com', review_text='Acoustics superb', is_approved=False)
+
+    reviews, snippets, next_cursor = search_reviews(event.id, 'superb acoust')
+    assert reviews == [mine]
+    assert '<mark>superb</mark>' in snippets[mine.id]
+    assert next_cursor is None
+    # The event id is an indexed column, not text a query can match
+    assert search_reviews(event.id, str(event.id))[0] == []
+
+
+def test_keyset_pages_return_every_match_once(event):
+    for n in range(7):
+        make_review(event, f'guest{n}@example.com', review_text='loud ' * (n % 3 + 1) + 'music')
+
+    ids, cursor = [], None
+    while True:
+        reviews, _, cursor = search_reviews(event.id, 'loud', cursor, per_page=3)
+        ids += [review.id for review in reviews]
+        if not cursor:
+            break
+    assert sorted(ids) == [review.id for review in Review.query.order_by(Review.id)]
+
+
+def test_search_api_rejects_a_cursor_from_another_sort(client, event):
+    for n in range(3):
+        make_review(event, f'guest{n}@example.com', review_text='great show')
+    url = f'/api/review/{event.unique_code}/reviews'
+
+    cursor = client.get(url, query_string={'per_page': 1}).get_json()['next_cursor']
+    response = client.get(url, query_string={'q': 'great', 'cursor': cursor})
+    assert response.status_code == 400
+    assert 'sort=newest' in response.get_json()['error']
+
+    data = client.get(url, query_string={'q': 'great', 'per_page': 2}).get_json()
+    assert len(data['reviews']) == 2 and 'snippet' in data['reviews'][0]
+    rest = client.get(url, query_string={'q': 'great', 'cursor': data['next_cursor']}).get_json()
+    assert len(rest['reviews']) == 1
+
+
+def test_like_fallback_escapes_wildcards(event):
+    make_review(event, 'a@example.com', review_text='100% worth it')
+    make_review(event, 'b@example.com', review_text='1000 people')
+
+    assert search_terms('100%') == ['100']
+    matches = Review.query.filter(Review.review_text.ilike(f'%{_escape_like("0%")}%', escape='\\'))
+    assert [review.review_text for review in matches] == ['100% worth it']
+    assert _escape_like('a_b\\') == 'a\\_b\\\\'
+
+
+def test_migrations_match_the_models_without_dropping_the_index(tmp_path):
+    # A subprocess, since the migration environment reconfigures logging for the process
+    env = dict(os.environ, FLASK_APP='run.py', SECRET_KEY='test-secret',
+               DATABASE_URL=f"sqlite:///{tmp_path / 'migrated.db'}")
+
+    def flask_db(command):
+        return subprocess.run([sys.executable, '-m', 'flask', 'db', command], env=env,
+                              cwd=Path(__file__).parent.parent, capture_output=True, text=True)
+
+    assert flask_db('upgrade').returncode == 0
+    result = flask_db('check')
+    assert result.returncode == 0, result.stderr
+    assert 'No new upgrade operations detected' in result.stdout + result.stderr
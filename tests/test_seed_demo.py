@@ -0,0 +1,49 @@
+import random
+
+from app import db
+from app.models import Event, EventStats, EventTerm, Review, User
+from app.search import search_reviews
+from scripts import seed_demo
+from tests.factories import make_review
+
+
+def snapshot():
+    db.session.expire_all()
+    # Events without reviews have no stats row until a rebuild adds an empty one
+    stats = {row.event_id: (row.review_count, row.approved_count, row.rating_sum)
+             for row in EventStats.query if row.review_count}
+    terms = {(row.event_id, row.term): row.count for row in EventTerm.query}
+    return stats, terms
+
+
+def test_reviews_per_event_is_long_tailed_and_exact():
+    counts = seed_demo.reviews_per_event(random.Random(3), 200, 100000)
+    assert sum(counts) == 100000
+    assert seed_demo.reviews_per_event(random.Random(3), 200, 100000) == counts
+    # A fifth of the events get most of the reviews
+    assert sum(sorted(counts, reverse=True)[:40]) > 50000
+
+
+def test_generated_data_matches_what_the_app_derives(app, capsys):
+    seed_demo.generate(organizers=3, events_per_organizer=4, total_reviews=600, seed=1,
+                       password='DemoPass123', batch_size=250)
+    assert 'Done in' in capsys.readouterr().out
+
+    assert User.query.count() == 3
+    assert Event.query.count() == 12
+    assert Review.query.count() == 600
+    assert User.query.first().check_password('DemoPass123')
+
+    generated = snapshot()
+    EventStats.rebuild()
+    EventTerm.rebuild()
+    db.session.commit()
+    assert snapshot() == generated
+
+
+def test_search_index_is_maintained_after_a_load(app):
+    seed_demo.generate(organizers=1, events_per_organizer=5, total_reviews=50, seed=2,
+                       password='DemoPass123', batch_size=1000)
+    event = Event.query.filter(Event.status == 'completed').first()
+    make_review(event, 'late@example.com', review_text='Zanzibar themed afterparty')
+    assert [review.reviewer_email for review in search_reviews(event.id, 'zanzibar')[0]] == ['late@example.com']
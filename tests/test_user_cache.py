@@ -0,0 +1,45 @@
+import pytest
+
+from app import db
+from app.user_cache import CachedUser, load_user
+from tests.factories import login
+
+
+def user_queries(queries):
+    return [statement for statement in queries if 'FROM users' in statement]
+
+
+def test_snapshot_is_cached_and_read_only(organizer, queries):
+    snapshot = load_user(str(organizer.id))
+    assert isinstance(snapshot, CachedUser)
+    assert (snapshot.username, snapshot.is_active, snapshot.is_authenticated) == ('organizer', True, True)
+    assert snapshot.check_password('Passw0rd!')
+
+    queries.clear()
+    assert load_user(organizer.id) is snapshot
+    assert queries == []
+    with pytest.raises(AttributeError):
+        snapshot.email = 'new@example.com'
+    assert load_user(999) is None
+
+
+def test_signed_in_requests_do_not_reload_the_user(client, organizer, event, queries):
+    login(client, organizer)
+    client.get('/dashboard')
+    queries.clear()
+    assert client.get('/dashboard').status_code == 200
+    assert user_queries(queries) == []
+
+
+def test_committed_changes_evict_the_snapshot(organizer):
+    snapshot = load_user(organizer.id)
+
+    organizer.is_active = False
+    db.session.flush()
+    db.session.rollback()
+    # A rolled-back change keeps the snapshot
+    assert load_user(organizer.id) is snapshot
+
+    organizer.is_active = False
+    db.session.commit()
+    assert not load_user(organizer.id).is_active